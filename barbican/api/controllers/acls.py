@@ -50,7 +50,10 @@ class SecretACLsController(controllers.ACLMixin):
         self.secret = secret
         self.secret_project_id = self.secret.project.external_id
         self.acl_repo = repo.get_secret_acl_repository()
-        self.validator = validators.ACLValidator()
+
+    @property
+    def validator(self):
+        return validators.ACLValidator()
 
     def get_acl_tuple(self, req, **kwargs):
         d = {'project_id': self.secret_project_id,
@@ -214,9 +217,12 @@ class ContainerACLsController(controllers.ACLMixin):
         self.container_id = container.id
         self.acl_repo = repo.get_container_acl_repository()
         self.container_repo = repo.get_container_repository()
-        self.validator = validators.ACLValidator()
         self.container_project_id = container.project.external_id
 
+    @property
+    def validator(self):
+        return validators.ACLValidator()
+
     def get_acl_tuple(self, req, **kwargs):
         d = {'project_id': self.container_project_id,
              'creator_id': self.container.creator_id}
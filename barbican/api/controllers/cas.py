@@ -313,16 +313,21 @@ class CertificateAuthoritiesController(controllers.ACLMixin):
                 limit=kw.get('limit', None),
                 plugin_name=plugin_name,
                 plugin_ca_id=plugin_ca_id,
-                project_id=project_model.id)
+                project_id=project_model.id,
+                marker=kw.get('marker'),
+                total=kw.get('total'))
         else:
             cas, offset, limit, total = self._get_subcas_and_root_cas(
                 offset=kw.get('offset', 0),
                 limit=kw.get('limit', None),
                 plugin_name=plugin_name,
                 plugin_ca_id=plugin_ca_id,
-                project_id=project_model.id)
+                project_id=project_model.id,
+                marker=kw.get('marker'),
+                total=kw.get('total'))
 
-        return self._display_cas(cas, offset, limit, total)
+        return self._display_cas(cas, offset, limit, total,
+                                 marker_paging='marker' in kw)
 
     @pecan.expose(generic=True, template='json')
     @controllers.handle_exceptions(u._('Certificate Authorities retrieval'))
@@ -348,9 +353,12 @@ class CertificateAuthoritiesController(controllers.ACLMixin):
             limit=kw.get('limit', None),
             plugin_name=plugin_name,
             plugin_ca_id=plugin_ca_id,
-            project_id=project_model.id)
+            project_id=project_model.id,
+            marker=kw.get('marker'),
+            total=kw.get('total'))
 
-        return self._display_cas(cas, offset, limit, total)
+        return self._display_cas(cas, offset, limit, total,
+                                 marker_paging='marker' in kw)
 
     def _get_project_cas(self, project_id, query_filters):
         cas, offset, limit, total = self.project_ca_repo.get_by_create_date(
@@ -366,7 +374,8 @@ class CertificateAuthoritiesController(controllers.ACLMixin):
         return total > 0
 
     def _get_subcas_and_project_cas(self, offset, limit, plugin_name,
-                                    plugin_ca_id, project_id):
+                                    plugin_ca_id, project_id, marker=None,
+                                    total=None):
         return self.ca_repo.get_by_create_date(
             offset_arg=offset,
             limit_arg=limit,
@@ -374,10 +383,13 @@ class CertificateAuthoritiesController(controllers.ACLMixin):
             plugin_ca_id=plugin_ca_id,
             project_id=project_id,
             restrict_to_project_cas=True,
-            suppress_exception=True)
+            suppress_exception=True,
+            marker_arg=marker,
+            total_arg=total)
 
     def _get_subcas_and_root_cas(self, offset, limit, plugin_name,
-                                 plugin_ca_id, project_id):
+                                 plugin_ca_id, project_id, marker=None,
+                                 total=None):
         return self.ca_repo.get_by_create_date(
             offset_arg=offset,
             limit_arg=limit,
@@ -385,18 +397,23 @@ class CertificateAuthoritiesController(controllers.ACLMixin):
             plugin_ca_id=plugin_ca_id,
             project_id=project_id,
             restrict_to_project_cas=False,
-            suppress_exception=True)
+            suppress_exception=True,
+            marker_arg=marker,
+            total_arg=total)
 
-    def _display_cas(self, cas, offset, limit, total):
+    def _display_cas(self, cas, offset, limit, total, marker_paging=False):
         if not cas:
-            cas_resp_overall = {'cas': [],
-                                'total': total}
+            cas_resp_overall = {'cas': []}
         else:
             cas_resp = [
                 hrefs.convert_certificate_authority_to_href(ca.id)
                 for ca in cas]
-            cas_resp_overall = hrefs.add_nav_hrefs('cas', offset, limit, total,
-                                                   {'cas': cas_resp})
+            cas_resp_overall = hrefs.add_nav_hrefs(
+                'cas', offset, limit, total, {'cas': cas_resp},
+                marker_paging=marker_paging,
+                next_marker=hrefs.get_next_marker(cas, limit))
+
+        if total is not None:
             cas_resp_overall.update({'total': total})
 
         return cas_resp_overall
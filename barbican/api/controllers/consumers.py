@@ -39,7 +39,6 @@ class ContainerConsumerController(controllers.ACLMixin):
     def __init__(self, consumer_id):
         self.consumer_id = consumer_id
         self.consumer_repo = repo.get_container_consumer_repository()
-        self.validator = validators.ContainerConsumerValidator()
 
     @pecan.expose(generic=True)
     def index(self):
@@ -73,9 +72,15 @@ class ContainerConsumersController(controllers.ACLMixin):
         self.container_id = container_id
         self.consumer_repo = repo.get_container_consumer_repository()
         self.container_repo = repo.get_container_repository()
-        self.validator = validators.ContainerConsumerValidator()
-        self.quota_enforcer = quota.QuotaEnforcer('consumers',
-                                                  self.consumer_repo)
+
+    # Only consumer registration needs the validator and quota enforcer.
+    @property
+    def validator(self):
+        return validators.ContainerConsumerValidator()
+
+    @property
+    def quota_enforcer(self):
+        return quota.QuotaEnforcer('consumers', self.consumer_repo)
 
     @pecan.expose()
     def _lookup(self, consumer_id, *remainder):
@@ -101,13 +106,15 @@ class ContainerConsumersController(controllers.ACLMixin):
             self.container_id,
             offset_arg=kw.get('offset', 0),
             limit_arg=kw.get('limit', None),
-            suppress_exception=True
+            suppress_exception=True,
+            marker_arg=kw.get('marker'),
+            total_arg=kw.get('total')
         )
 
         consumers, offset, limit, total = result
 
         if not consumers:
-            resp_ctrs_overall = {'consumers': [], 'total': total}
+            resp_ctrs_overall = {'consumers': []}
         else:
             resp_ctrs = [
                 hrefs.convert_to_hrefs(c.to_dict_fields())
@@ -118,8 +125,12 @@ class ContainerConsumersController(controllers.ACLMixin):
                 offset,
                 limit,
                 total,
-                {'consumers': resp_ctrs}
+                {'consumers': resp_ctrs},
+                marker_paging='marker' in kw,
+                next_marker=hrefs.get_next_marker(consumers, limit)
             )
+
+        if total is not None:
             resp_ctrs_overall.update({'total': total})
 
         LOG.info(u._LI('Retrieved a consumer list for project: %s'),
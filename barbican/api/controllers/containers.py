@@ -16,6 +16,7 @@ from barbican import api
 from barbican.api import controllers
 from barbican.api.controllers import acls
 from barbican.api.controllers import consumers
+from barbican.api.controllers import secrets
 from barbican.common import exception
 from barbican.common import hrefs
 from barbican.common import quota
@@ -25,10 +26,12 @@ from barbican.common import validators
 from barbican import i18n as u
 from barbican.model import models
 from barbican.model import repositories as repo
+from barbican.plugin import resources as plugin
 
 LOG = utils.getLogger(__name__)
 
 CONTAINER_GET = 'container:get'
+CONTAINER_DECRYPT = 'container:decrypt'
 
 
 def container_not_found():
@@ -45,10 +48,15 @@ class ContainerController(controllers.ACLMixin):
         self.container_id = container.id
         self.consumer_repo = repo.get_container_consumer_repository()
         self.container_repo = repo.get_container_repository()
-        self.validator = validators.ContainerValidator()
-        self.consumers = consumers.ContainerConsumersController(
-            self.container_id)
-        self.acl = acls.ContainerACLsController(self.container)
+
+    # Sub-controllers are only built when a request is routed to them.
+    @property
+    def consumers(self):
+        return consumers.ContainerConsumersController(self.container_id)
+
+    @property
+    def acl(self):
+        return acls.ContainerACLsController(self.container)
 
     def get_acl_tuple(self, req, **kwargs):
         d = self.get_acl_dict_for_user(req, self.container.container_acls)
@@ -75,6 +83,47 @@ class ContainerController(controllers.ACLMixin):
             hrefs.convert_to_hrefs(dict_fields)
         )
 
+    @pecan.expose(template='json')
+    @controllers.handle_exceptions(u._('Container payloads retrieval'))
+    @controllers.enforce_rbac(CONTAINER_DECRYPT)
+    def payloads(self, external_project_id, **kwargs):
+        """Returns the decrypted payloads of all the container's secrets.
+
+        Access is authorized against the container, then decryption is
+        authorized against each member secret, as its ACLs may be stricter
+        than the container's.
+        """
+        if pecan.request.method != 'GET':
+            pecan.abort(405)
+
+        members = self.container_repo.get_container_secrets(
+            self.container_id)
+
+        ctx = controllers._get_barbican_context(pecan.request)
+        for name, secret in members:
+            controllers._do_enforce_rbac(secrets.SecretController(secret),
+                                         pecan.request, 'secret:decrypt', ctx)
+
+        payloads = plugin.get_secrets([secret for name, secret in members])
+
+        LOG.info(u._LI('Retrieved container payloads for project: %s'),
+                 external_project_id)
+        return {
+            'container_ref': hrefs.convert_container_to_href(
+                self.container_id),
+            'secrets': [
+                {
+                    'name': name,
+                    'secret_ref': hrefs.convert_secret_to_href(secret.id),
+                    'payload': payload,
+                    'payload_content_type': content_type,
+                    'payload_content_encoding': 'base64' if payload else None
+                }
+                for (name, secret), (payload, content_type) in zip(members,
+                                                                   payloads)
+            ]
+        }
+
     @index.when(method='DELETE')
     @utils.allow_all_content_types
     @controllers.handle_exceptions(u._('Container deletion'))
@@ -139,13 +188,15 @@ class ContainersController(controllers.ACLMixin):
             offset_arg=kw.get('offset', 0),
             limit_arg=kw.get('limit', None),
             name_arg=kw.get('name', None),
-            suppress_exception=True
+            suppress_exception=True,
+            marker_arg=kw.get('marker'),
+            total_arg=kw.get('total')
         )
 
         containers, offset, limit, total = result
 
         if not containers:
-            resp_ctrs_overall = {'containers': [], 'total': total}
+            resp_ctrs_overall = {'containers': []}
         else:
             resp_ctrs = [
                 hrefs.convert_to_hrefs(c.to_dict_fields())
@@ -161,8 +212,12 @@ class ContainersController(controllers.ACLMixin):
                 offset,
                 limit,
                 total,
-                {'containers': resp_ctrs}
+                {'containers': resp_ctrs},
+                marker_paging='marker' in kw,
+                next_marker=hrefs.get_next_marker(containers, limit)
             )
+
+        if total is not None:
             resp_ctrs_overall.update({'total': total})
 
         LOG.info(u._LI('Retrieved container list for project: %s'), project_id)
@@ -68,7 +68,10 @@ class OrderController(controllers.ACLMixin):
         self.order = order
         self.order_repo = repo.get_order_repository()
         self.queue = queue_resource or async_client.TaskClient()
-        self.type_order_validator = validators.TypeOrderValidator()
+
+    @property
+    def type_order_validator(self):
+        return validators.TypeOrderValidator()
 
     @pecan.expose(generic=True)
     def index(self, **kwargs):
@@ -151,7 +154,7 @@ class OrdersController(controllers.ACLMixin):
         if not order:
             _order_not_found()
 
-        return OrderController(order, self.order_repo), remainder
+        return OrderController(order, self.queue), remainder
 
     @pecan.expose(generic=True)
     def index(self, **kwargs):
@@ -167,20 +170,23 @@ class OrdersController(controllers.ACLMixin):
         result = self.order_repo.get_by_create_date(
             external_project_id, offset_arg=kw.get('offset', 0),
             limit_arg=kw.get('limit', None), meta_arg=kw.get('meta', None),
-            suppress_exception=True)
+            suppress_exception=True, marker_arg=kw.get('marker'),
+            total_arg=kw.get('total'))
         orders, offset, limit, total = result
 
         if not orders:
-            orders_resp_overall = {'orders': [],
-                                   'total': total}
+            orders_resp_overall = {'orders': []}
         else:
             orders_resp = [
                 hrefs.convert_to_hrefs(o.to_dict_fields())
                 for o in orders
             ]
-            orders_resp_overall = hrefs.add_nav_hrefs('orders',
-                                                      offset, limit, total,
-                                                      {'orders': orders_resp})
+            orders_resp_overall = hrefs.add_nav_hrefs(
+                'orders', offset, limit, total, {'orders': orders_resp},
+                marker_paging='marker' in kw,
+                next_marker=hrefs.get_next_marker(orders, limit))
+
+        if total is not None:
             orders_resp_overall.update({'total': total})
 
         return orders_resp_overall
@@ -54,13 +54,21 @@ def _request_has_twsk_but_no_transport_key_id():
                          'transport key id has not been provided.'))
 
 
+def _is_payload_request(remainder):
+    """Tells if a request routed to a secret retrieves its payload."""
+    sub_resource = remainder[0] if remainder else ''
+    if sub_resource == 'payload':
+        return True
+    return (not sub_resource and pecan.request.method == 'GET' and
+            not controllers.is_json_request_accept(pecan.request))
+
+
 class SecretController(controllers.ACLMixin):
     """Handles Secret retrieval and deletion requests."""
 
     def __init__(self, secret):
         LOG.debug('=== Creating SecretController ===')
         self.secret = secret
-        self.transport_key_repo = repo.get_transport_key_repository()
 
     def get_acl_tuple(self, req, **kwargs):
         d = self.get_acl_dict_for_user(req, self.secret.secret_acls)
@@ -149,7 +157,8 @@ class SecretController(controllers.ACLMixin):
         if transport_key_id is None:
             _request_has_twsk_but_no_transport_key_id()
 
-        transport_key_model = self.transport_key_repo.get(
+        transport_key_repo = repo.get_transport_key_repository()
+        transport_key_model = transport_key_repo.get(
             entity_id=transport_key_id,
             suppress_exception=True)
 
@@ -220,6 +229,61 @@ class SecretController(controllers.ACLMixin):
         LOG.info(u._LI('Deleted secret for project: %s'), external_project_id)
 
 
+class SecretPayloadsController(controllers.ACLMixin):
+    """Handles requests for the payloads of several secrets at once."""
+
+    def __init__(self, secret_repo):
+        LOG.debug('Creating SecretPayloadsController')
+        self.validator = validators.SecretPayloadsValidator()
+        self.secret_repo = secret_repo
+
+    @pecan.expose(generic=True)
+    def index(self, **kwargs):
+        pecan.abort(405)  # HTTP 405 Method Not Allowed as default
+
+    @index.when(method='POST', template='json')
+    @controllers.handle_exceptions(u._('Secret payloads retrieval'))
+    @controllers.enforce_rbac('secrets:get')
+    @controllers.enforce_content_types(['application/json'])
+    def on_post(self, external_project_id, **kwargs):
+        data = api.load_body(pecan.request, validator=self.validator)
+
+        secret_refs = data['secret_refs']
+        secret_ids = [hrefs.get_secret_id_from_ref(secret_ref)
+                      for secret_ref in secret_refs]
+        for secret_id in secret_ids:
+            controllers.assert_is_valid_uuid_from_uri(secret_id)
+
+        found = self.secret_repo.get_secrets_by_ids(secret_ids)
+        if len(found) != len(secret_ids):
+            _secret_not_found()
+        secrets = [found[secret_id] for secret_id in secret_ids]
+
+        # Each secret has its own ACLs, so decryption is authorized for
+        # every secret before any payload is retrieved.
+        ctx = controllers._get_barbican_context(pecan.request)
+        for secret in secrets:
+            controllers._do_enforce_rbac(SecretController(secret),
+                                         pecan.request, 'secret:decrypt', ctx)
+
+        payloads = plugin.get_secrets(secrets)
+
+        LOG.info(u._LI('Retrieved %(count)s secret payloads for project: '
+                       '%(project)s'),
+                 {'count': len(secrets), 'project': external_project_id})
+        return {
+            'secrets': [
+                {
+                    'secret_ref': hrefs.convert_secret_to_href(secret.id),
+                    'payload': payload,
+                    'payload_content_type': content_type,
+                    'payload_content_encoding': 'base64'
+                }
+                for secret, (payload, content_type) in zip(secrets, payloads)
+            ]
+        }
+
+
 class SecretsController(controllers.ACLMixin):
     """Handles Secret creation requests."""
 
@@ -228,6 +292,7 @@ class SecretsController(controllers.ACLMixin):
         self.validator = validators.NewSecretValidator()
         self.secret_repo = repo.get_secret_repository()
         self.quota_enforcer = quota.QuotaEnforcer('secrets', self.secret_repo)
+        self.payloads = SecretPayloadsController(self.secret_repo)
 
     @pecan.expose()
     def _lookup(self, secret_id, *remainder):
@@ -238,7 +303,8 @@ class SecretsController(controllers.ACLMixin):
         controllers.assert_is_valid_uuid_from_uri(secret_id)
 
         secret = self.secret_repo.get_secret_by_id(
-            entity_id=secret_id, suppress_exception=True)
+            entity_id=secret_id, suppress_exception=True,
+            load_payload=_is_payload_request(remainder))
         if not secret:
             _secret_not_found()
 
@@ -285,14 +351,16 @@ class SecretsController(controllers.ACLMixin):
             bits=bits,
             suppress_exception=True,
             acl_only=kw.get('acl_only', None),
-            user_id=user_id
+            user_id=user_id,
+            marker_arg=kw.get('marker'),
+            total_arg=kw.get('total'),
+            load_store_metadata=True
         )
 
         secrets, offset, limit, total = result
 
         if not secrets:
-            secrets_resp_overall = {'secrets': [],
-                                    'total': total}
+            secrets_resp_overall = {'secrets': []}
         else:
             secrets_resp = [
                 hrefs.convert_to_hrefs(secret_fields(s))
@@ -300,8 +368,12 @@ class SecretsController(controllers.ACLMixin):
             ]
             secrets_resp_overall = hrefs.add_nav_hrefs(
                 'secrets', offset, limit, total,
-                {'secrets': secrets_resp}
+                {'secrets': secrets_resp},
+                marker_paging='marker' in kw,
+                next_marker=hrefs.get_next_marker(secrets, limit)
             )
+
+        if total is not None:
             secrets_resp_overall.update({'total': total})
 
         LOG.info(u._LI('Retrieved secret list for project: %s'),
@@ -60,6 +60,21 @@ db_opts = [
     cfg.BoolOpt('db_auto_create', default=True),
     cfg.IntOpt('max_limit_paging', default=100),
     cfg.IntOpt('default_limit_paging', default=10),
+    cfg.StrOpt('default_list_total', default='exact',
+               choices=['exact', 'approx', 'false'],
+               help=u._("Default for the 'total' URL parameter of list "
+                        "requests: 'exact' counts the matching entities, "
+                        "'approx' reads project usage counters where "
+                        "possible, and 'false' omits the total.")),
+    cfg.IntOpt('project_cache_ttl_seconds', default=300,
+               help=u._("Seconds to cache the mapping of external (Keystone) "
+                        "project IDs to Barbican projects in each process. "
+                        "Set to 0 to disable the cache.")),
+    cfg.IntOpt('project_cache_negative_ttl_seconds', default=5,
+               help=u._("Seconds to remember that no Barbican project exists "
+                        "for an external project ID. A project created by "
+                        "another process may be invisible to read requests "
+                        "for up to this long.")),
     cfg.StrOpt('sql_pool_class', default=None),
     cfg.BoolOpt('sql_pool_logging', default=False),
     cfg.IntOpt('sql_pool_size', default=None),
@@ -76,6 +91,13 @@ retry_opts = [
     cfg.FloatOpt(
         'periodic_interval_max_seconds', default=10.0,
         help=u._('Seconds (float) to wait between periodic schedule events')),
+    cfg.FloatOpt(
+        'certificate_status_batch_interval_seconds', default=0.0,
+        help=u._('Seconds (float) between queries asking a certificate '
+                 'plugin\'s CA which orders changed. Due status checks of '
+                 'unchanged orders are postponed until the next query. Only '
+                 'used for plugins that can list changed orders, 0 disables '
+                 'batch status checks')),
 ]
 
 queue_opt_group = cfg.OptGroup(name='queue',
@@ -127,6 +149,10 @@ ks_queue_opts = [
     cfg.IntOpt('thread_pool_size', default=10,
                help=u._('Define the number of max threads to be used for '
                         'notification server processing functionality.')),
+    cfg.IntOpt('project_cleanup_chunk_size', default=1000,
+               help=u._('Number of secrets, containers or KEKs of a deleted '
+                        'Keystone project that are deleted per database '
+                        'transaction when cleaning up the project.')),
 ]
 
 quota_opt_group = cfg.OptGroup(name='quotas',
@@ -147,7 +173,13 @@ quota_opts = [
                help='Number of consumers allowed per project'),
     cfg.IntOpt('quota_cas',
                default=-1,
-               help='Number of CAs allowed per project')
+               help='Number of CAs allowed per project'),
+    cfg.IntOpt('quota_cache_ttl_seconds',
+               default=10,
+               help=u._("Seconds to cache the effective quotas of a project "
+                        "in each process for quota enforcement. Quotas set "
+                        "through another process may take up to this long "
+                        "to be enforced. Set to 0 to disable the cache."))
 ]
 
 
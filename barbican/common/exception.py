@@ -214,6 +214,12 @@ class NoDataToProcess(BarbicanHTTPException):
     status_code = 400
 
 
+class InvalidMarker(BarbicanHTTPException):
+    message = u._("Paging marker '%(marker)s' was not found.")
+    client_message = u._("Provided paging marker is not valid")
+    status_code = 400
+
+
 class InvalidSortKey(Invalid):
     message = u._("Sort key supplied was not valid.")
 
@@ -108,21 +108,61 @@ def next_href(resources_name, offset, limit):
     return convert_list_to_href(resources_name, offset, limit)
 
 
+def convert_marker_list_to_href(resources_name, marker, limit):
+    """Supports pretty output of marker-paged list hrefs.
+
+    Convert the marker/limit info to a HATEOS-style href
+    suitable for use in a list navigation paging interface.
+    """
+    resource = '{0}?limit={1}&marker={2}'.format(resources_name, limit,
+                                                 marker)
+    return utils.hostname_for_refs(resource=resource)
+
+
+def get_next_marker(entities, limit):
+    """Returns the marker for the page after the given entities, if any.
+
+    A page holding fewer than limit entities is the last one.
+    """
+    if len(entities) < limit:
+        return None
+    return entities[-1].id
+
+
 def add_nav_hrefs(resources_name, offset, limit,
-                  total_elements, data):
+                  total_elements, data, marker_paging=False,
+                  next_marker=None):
     """Adds next and/or previous hrefs to paged list responses.
 
+    When the list was paged by marker, only a 'next' href can be built
+    cheaply, and it points past the last element of the current page. When
+    the total number of elements was not counted, a 'next' href is added
+    if the current page is full.
+
     :param resources_name: Name of api resource
     :param offset: Element number (ie. index) where current page starts
     :param limit: Max amount of elements listed on current page
-    :param num_elements: Total number of elements
+    :param num_elements: Total number of elements, or None if not counted
+    :param marker_paging: Whether the current page was retrieved by marker
+    :param next_marker: Marker for the next page, or None on the last page
     :returns: augmented dictionary with next and/or previous hrefs
     """
+    if marker_paging:
+        if next_marker:
+            data.update({'next': convert_marker_list_to_href(resources_name,
+                                                             next_marker,
+                                                             limit)})
+        return data
+
     if offset > 0:
         data.update({'previous': previous_href(resources_name,
                                                offset,
                                                limit)})
-    if total_elements > (offset + limit):
+    if total_elements is None:
+        has_next = next_marker is not None
+    else:
+        has_next = total_elements > (offset + limit)
+    if has_next:
         data.update({'next': next_href(resources_name,
                                        offset,
                                        limit)})
@@ -145,11 +185,12 @@ def get_container_id_from_ref(container_ref):
 def get_secret_id_from_ref(secret_ref):
     """Parse a secret reference and return the secret ID
 
-    TODO(Dave) Implement this, or make one generic ID from REF function
-
+    The secret ID is the right-most element of the URL, ignoring any
+    trailing slash.
     :param secret_ref: HTTP reference of secret
     :return: a string containing the ID of the secret
     """
+    return secret_ref.rstrip('/').rsplit('/', 1)[-1]
 
 
 def get_ca_id_from_ref(ca_ref):
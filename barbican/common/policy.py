@@ -0,0 +1,45 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Process-wide policy enforcer shared by request contexts.
+"""
+
+from oslo_policy import policy
+
+from barbican.common import config
+
+CONF = config.CONF
+
+_ENFORCER = None
+
+
+def get_enforcer():
+    """Returns the policy enforcer shared by all request contexts.
+
+    The enforcer reads the policy file on first use, then only re-reads it
+    when the file's modification time changes. The parsed rule checks are
+    kept in between, so rules are not parsed again for every request.
+    """
+    global _ENFORCER
+    if not _ENFORCER:
+        _ENFORCER = policy.Enforcer(CONF)
+    return _ENFORCER
+
+
+def reset():
+    """Drops the shared enforcer, so the next one loads the policy anew."""
+    global _ENFORCER
+    if _ENFORCER:
+        _ENFORCER.clear()
+    _ENFORCER = None
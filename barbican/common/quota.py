@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+import time
+
 from oslo_log import log as logging
 
 from barbican.common import config
@@ -30,6 +33,63 @@ DISABLED_VALUE = 0
 CONF = config.CONF
 
 
+class EffectiveQuotasCache(object):
+    """Process-local cache of effective quotas, keyed by external project ID.
+
+    Entries expire after CONF.quotas.quota_cache_ttl_seconds, and are dropped
+    as soon as the quotas of the project are set or deleted by this process.
+    """
+
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, external_project_id):
+        """Returns the cached quotas dict, or None if not cached."""
+        entry = self._entries.get(external_project_id)
+        if entry is None:
+            return None
+        expires_at, quotas = entry
+        if expires_at <= time.time():
+            return None
+        return quotas
+
+    def put(self, external_project_id, quotas):
+        """Caches the effective quotas dict of a project."""
+        ttl = CONF.quotas.quota_cache_ttl_seconds
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES:
+                now = time.time()
+                self._entries = dict(
+                    (key, entry) for key, entry in self._entries.items()
+                    if entry[0] > now)
+                if len(self._entries) >= self.MAX_ENTRIES:
+                    self._entries = {}
+            self._entries[external_project_id] = (time.time() + ttl,
+                                                  dict(quotas))
+
+    def invalidate(self, external_project_id=None):
+        """Drops the entry of a project, or every entry if none is given."""
+        with self._lock:
+            if external_project_id is None:
+                self._entries = {}
+            else:
+                self._entries.pop(external_project_id, None)
+
+
+_EFFECTIVE_QUOTAS_CACHE = EffectiveQuotasCache()
+
+
+def invalidate_effective_quotas(external_project_id=None):
+    """Drops cached effective quotas of a project, or of all projects."""
+    _EFFECTIVE_QUOTAS_CACHE.invalidate(external_project_id)
+
+
 class QuotaDriver(object):
     """Driver to enforce quotas and obtain quota information."""
 
@@ -92,6 +152,19 @@ class QuotaDriver(object):
                 self._extract_project_quotas(retrieved_project_quotas))
         return resp_quotas
 
+    def get_cached_effective_quotas(self, external_project_id):
+        """Return the effective quotas for a project, cached for a while
+
+        Used to enforce quotas, which happens on every resource creation.
+        :param external_project_id: external ID of current project
+        :return: dict with effective quotas
+        """
+        quotas = _EFFECTIVE_QUOTAS_CACHE.get(external_project_id)
+        if quotas is None:
+            quotas = self.get_effective_quotas(external_project_id)
+            _EFFECTIVE_QUOTAS_CACHE.put(external_project_id, quotas)
+        return quotas
+
     def is_unlimited_value(self, v):
         """A helper method to check for unlimited value."""
         return v <= UNLIMITED_VALUE
@@ -113,6 +186,7 @@ class QuotaDriver(object):
         # commit to DB to avoid async issues if the enforcer is called from
         # another thread
         repo.commit()
+        invalidate_effective_quotas(external_project_id)
 
     def get_project_quotas(self, external_project_id):
         """Retrieve configured quota information from database
@@ -157,7 +231,10 @@ class QuotaDriver(object):
         :raises NotFound: if project has no configured values
         :return: None
         """
-        self.repo.delete_by_external_project_id(external_project_id)
+        try:
+            self.repo.delete_by_external_project_id(external_project_id)
+        finally:
+            invalidate_effective_quotas(external_project_id)
 
     def get_quotas(self, external_project_id):
         """Get the effective quotas for a project
@@ -181,21 +258,26 @@ class QuotaEnforcer(object):
     def enforce(self, project):
         """Enforce the quota limit for the resource
 
+        Resources are not counted at all when the quota is unlimited, and
+        otherwise the project usage counter maintained by the repository is
+        read rather than counting the resources.
+
         :param project: the project object corresponding to the sender
         :raises QuotaReached: exception raised if quota forbids request
         :return: None
         """
-        quotas = self.quota_driver.get_effective_quotas(project.external_id)
+        quotas = self.quota_driver.get_cached_effective_quotas(
+            project.external_id)
         quota = quotas[self.resource_type]
 
-        reached = False
-        count = 0
         if self.quota_driver.is_unlimited_value(quota):
-            pass
-        elif self.quota_driver.is_disabled_value(quota):
+            return
+
+        reached = False
+        if self.quota_driver.is_disabled_value(quota):
             reached = True
         else:
-            count = self.resource_repo.get_count(project.id)
+            count = self.resource_repo.get_approximate_count(project.id)
             if count >= quota:
                 reached = True
 
@@ -47,4 +47,6 @@ def get_or_create_project(project_id):
         project.external_id = project_id
         project.status = models.States.ACTIVE
         project_repo.create_from(project)
+        # Drop the negative cache entry recorded by the lookup above.
+        repositories.invalidate_project_cache(project_id)
     return project
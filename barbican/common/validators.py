@@ -15,6 +15,7 @@ API JSON validators.
 
 import abc
 import base64
+import copy
 
 import jsonschema as schema
 from ldap3.core import exceptions as ldap_exceptions
@@ -43,6 +44,10 @@ MYSQL_SMALL_INT_MAX = 32767
 
 ACL_OPERATIONS = ['read', 'write', 'delete', 'list']
 
+# Compiled JSON schema validators, shared by all instances of a validator
+# class: {validator class: (schema, jsonschema validator)}
+_SCHEMA_VALIDATORS = {}
+
 
 def secret_too_big(data):
     if isinstance(data, six.text_type):
@@ -153,12 +158,35 @@ class ValidatorBase(object):
         :raises: InvalidObject exception if the data is not schema compliant.
         """
         try:
-            schema.validate(json_data, self.schema)
+            self._get_schema_validator().validate(json_data)
         except schema.ValidationError as e:
             raise exception.InvalidObject(schema=schema_name,
                                           reason=e.message,
                                           property=get_invalid_property(e))
 
+    def _get_schema_validator(self):
+        """Returns a compiled jsonschema validator for this schema.
+
+        Checking a schema against its metaschema and building a validator
+        for it costs far more than validating a typical request body, so it
+        is done once per validator class and the result shared by all its
+        instances. The validator is only recompiled when an instance's
+        schema differs from the compiled one, as it may for schemas built
+        from configuration.
+        """
+        validator = self.__dict__.get('_schema_validator')
+        if validator is None:
+            compiled = _SCHEMA_VALIDATORS.get(type(self))
+            if compiled is not None and compiled[0] == self.schema:
+                validator = compiled[1]
+            else:
+                validator_cls = schema.validators.validator_for(self.schema)
+                validator_cls.check_schema(self.schema)
+                validator = validator_cls(copy.deepcopy(self.schema))
+                _SCHEMA_VALIDATORS[type(self)] = (validator.schema, validator)
+            self._schema_validator = validator
+        return validator
+
     def _assert_validity(self, valid_condition, schema_name, message,
                          property):
         """Assert that a certain condition is met.
@@ -674,6 +702,39 @@ class ContainerConsumerValidator(ValidatorBase):
         return json_data
 
 
+class SecretPayloadsValidator(ValidatorBase):
+    """Validate a request for the payloads of several secrets."""
+
+    def __init__(self):
+        self.name = 'SecretPayloads'
+        self.schema = {
+            "type": "object",
+            "properties": {
+                "secret_refs": {
+                    "type": "array",
+                    "items": {"type": "string", "minLength": 1},
+                    "minItems": 1,
+                    "maxItems": CONF.max_limit_paging
+                }
+            },
+            "required": ["secret_refs"]
+        }
+
+    def validate(self, json_data, parent_schema=None):
+        schema_name = self._full_name(parent_schema)
+
+        self._assert_schema_is_valid(json_data, schema_name)
+
+        secret_refs = json_data['secret_refs']
+        self._assert_validity(
+            len(set(secret_refs)) == len(secret_refs),
+            schema_name,
+            u._("Duplicate secret refs are not allowed"),
+            "secret_refs")
+
+        return json_data
+
+
 class ContainerValidator(ValidatorBase):
     """Validator for all types of Container."""
 
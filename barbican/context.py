@@ -14,9 +14,9 @@
 #    under the License.
 
 import oslo_context
-from oslo_policy import policy
 
 from barbican.common import config
+from barbican.common import policy
 
 CONF = config.CONF
 
@@ -35,7 +35,7 @@ class RequestContext(oslo_context.context.RequestContext):
             kwargs['tenant'] = project
         self.project = project
         self.roles = roles or []
-        self.policy_enforcer = policy_enforcer or policy.Enforcer(CONF)
+        self.policy_enforcer = policy_enforcer or policy.get_enforcer()
         super(RequestContext, self).__init__(**kwargs)
 
     def to_dict(self):
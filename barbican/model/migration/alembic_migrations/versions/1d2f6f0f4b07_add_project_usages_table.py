@@ -0,0 +1,45 @@
+"""Add project usages table
+
+Revision ID: 1d2f6f0f4b07
+Revises: 4ecde3a3a72a
+Create Date: 2015-10-06 14:12:44.382155
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '1d2f6f0f4b07'
+down_revision = '4ecde3a3a72a'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    ctx = op.get_context()
+    con = op.get_bind()
+    table_exists = ctx.dialect.has_table(con.engine, 'project_usages')
+    if not table_exists:
+        op.create_table(
+            'project_usages',
+            sa.Column('id', sa.String(length=36), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('deleted_at', sa.DateTime(), nullable=True),
+            sa.Column('deleted', sa.Boolean(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('project_id', sa.String(length=36), nullable=False),
+            sa.Column('secrets', sa.Integer(), nullable=True),
+            sa.Column('orders', sa.Integer(), nullable=True),
+            sa.Column('containers', sa.Integer(), nullable=True),
+            sa.Column('consumers', sa.Integer(), nullable=True),
+            sa.Column('cas', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['project_id'],
+                                    ['projects.id'],
+                                    name='project_usages_fk'),
+            sa.PrimaryKeyConstraint('id'),
+            mysql_engine='InnoDB')
+        op.create_index(
+            op.f('ix_project_usages_project_id'),
+            'project_usages',
+            ['project_id'],
+            unique=True)
@@ -0,0 +1,30 @@
+"""Add composite indexes for listing and lookup queries
+
+Revision ID: 39cf2e645cba
+Revises: 1d2f6f0f4b07
+Create Date: 2015-10-08 10:21:37.114620
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '39cf2e645cba'
+down_revision = '1d2f6f0f4b07'
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index('ix_secrets_project_deleted_created', 'secrets',
+                    ['project_id', 'deleted', 'created_at'], unique=False)
+    op.create_index('ix_secrets_project_deleted_name', 'secrets',
+                    ['project_id', 'deleted', 'name'], unique=False)
+    op.create_index('ix_orders_project_deleted_created', 'orders',
+                    ['project_id', 'deleted', 'created_at'], unique=False)
+    op.create_index('ix_containers_project_deleted_created', 'containers',
+                    ['project_id', 'deleted', 'created_at'], unique=False)
+    op.create_index('ix_order_retry_tasks_deleted_retry_at',
+                    'order_retry_tasks', ['deleted', 'retry_at'],
+                    unique=False)
+    op.create_index('ix_kek_data_project_plugin_active', 'kek_data',
+                    ['project_id', 'plugin_name', 'active', 'deleted'],
+                    unique=False)
@@ -108,8 +108,13 @@ class ModelBase(object):
 
     status = sa.Column(sa.String(20), nullable=False, default=States.PENDING)
 
-    def save(self, session=None):
-        """Save this object."""
+    def save(self, session=None, flush=True):
+        """Save this object.
+
+        :param flush: False to only add this object to the session, so that
+                      it is written along with other objects at the next
+                      flush rather than on its own.
+        """
         # import api here to prevent circular dependency problem
         import barbican.model.repositories
         session = session or barbican.model.repositories.get_session()
@@ -117,8 +122,14 @@ class ModelBase(object):
         if self.id is None:
             self.created_at = timeutils.utcnow()
             self.updated_at = self.created_at
+            if not flush:
+                # Staged objects get their ID now so that other objects can
+                # refer to it, which also lets the flush insert the rows of
+                # a table with a single executemany() statement.
+                self.id = utils.generate_uuid()
         session.add(self)
-        session.flush()
+        if flush:
+            session.flush()
 
     def delete(self, session=None):
         """Delete this object."""
@@ -283,13 +294,11 @@ class Secret(BASE, SoftDeleteMixIn, ModelBase):
         index=True,
         nullable=False)
 
-    # TODO(jwood): Performance - Consider avoiding full load of all
-    #   datum attributes here. This is only being done to support the
-    #   building of the list of supported content types when secret
-    #   metadata is retrieved.
-    #   See barbican.api.resources.py::SecretsResource.on_get()
-    # Eager load this relationship via 'lazy=False'.
-    encrypted_data = orm.relationship("EncryptedDatum", lazy=False)
+    # Loaded on first access, as only the payload, store and delete paths
+    # need the encrypted data; metadata and listings build their content
+    # types from secret_store_metadata instead. The KEK of each datum is
+    # eager loaded along with it (see EncryptedDatum.kek_meta_project).
+    encrypted_data = orm.relationship("EncryptedDatum", lazy='select')
 
     secret_store_metadata = orm.relationship(
         "SecretStoreMetadatum",
@@ -297,6 +306,16 @@ class Secret(BASE, SoftDeleteMixIn, ModelBase):
         backref="secret",
         cascade="all, delete-orphan")
 
+    # Match the project listing queries: filtered by project and deleted
+    # flag, then either ordered by creation date or filtered by name.
+    __table_args__ = (
+        sa.Index('ix_secrets_project_deleted_created',
+                 'project_id', 'deleted', 'created_at'),
+        sa.Index('ix_secrets_project_deleted_name',
+                 'project_id', 'deleted', 'name'),
+        {'mysql_engine': 'InnoDB'}
+    )
+
     def __init__(self, parsed_request=None):
         """Creates secret from a dict."""
         super(Secret, self).__init__()
@@ -398,7 +417,8 @@ class EncryptedDatum(BASE, SoftDeleteMixIn, ModelBase):
     cypher_text = sa.Column(sa.Text)
     kek_meta_extended = sa.Column(sa.Text)
 
-    # Eager load this relationship via 'lazy=False'.
+    # Eager load this relationship via 'lazy=False', so that loading the
+    # encrypted data of a secret also loads the KEK needed to decrypt it.
     kek_meta_project = orm.relationship("KEKDatum", lazy=False)
 
     def __init__(self, secret=None, kek_datum=None):
@@ -461,6 +481,13 @@ class KEKDatum(BASE, SoftDeleteMixIn, ModelBase):
     mode = sa.Column(sa.String(255))
     plugin_meta = sa.Column(sa.Text)
 
+    # Match the active KEK lookup done for every secret encryption.
+    __table_args__ = (
+        sa.Index('ix_kek_data_project_plugin_active',
+                 'project_id', 'plugin_name', 'active', 'deleted'),
+        {'mysql_engine': 'InnoDB'}
+    )
+
     def _do_extra_dict_fields(self):
         """Sub-class hook method: return dict of fields."""
         return {'algorithm': self.algorithm}
@@ -510,6 +537,13 @@ class Order(BASE, SoftDeleteMixIn, ModelBase):
         backref="order",
         cascade="all, delete-orphan")
 
+    # Match the project listing query, ordered by creation date.
+    __table_args__ = (
+        sa.Index('ix_orders_project_deleted_created',
+                 'project_id', 'deleted', 'created_at'),
+        {'mysql_engine': 'InnoDB'}
+    )
+
     def __init__(self, parsed_request=None):
             """Creates a Order entity from a dict."""
             super(Order, self).__init__()
@@ -640,7 +674,12 @@ class OrderBarbicanMetadatum(BASE, SoftDeleteMixIn, ModelBase):
 class OrderRetryTask(BASE, SoftDeleteMixIn, ModelBase):
 
     __tablename__ = "order_retry_tasks"
-    __table_args__ = {"mysql_engine": "InnoDB"}
+    # Match the retry scheduler scan for tasks that are due.
+    __table_args__ = (
+        sa.Index('ix_order_retry_tasks_deleted_retry_at',
+                 'deleted', 'retry_at'),
+        {"mysql_engine": "InnoDB"}
+    )
     __table_initialized__ = False
 
     id = sa.Column(
@@ -678,6 +717,13 @@ class Container(BASE, SoftDeleteMixIn, ModelBase):
     consumers = sa.orm.relationship("ContainerConsumerMetadatum")
     creator_id = sa.Column(sa.String(255))
 
+    # Match the project listing query, ordered by creation date.
+    __table_args__ = (
+        sa.Index('ix_containers_project_deleted_created',
+                 'project_id', 'deleted', 'created_at'),
+        {'mysql_engine': 'InnoDB'}
+    )
+
     def __init__(self, parsed_request=None):
         """Creates a Container entity from a dict."""
         super(Container, self).__init__()
@@ -1329,3 +1375,54 @@ class ProjectQuotas(BASE, ModelBase):
         if self.cas:
             ret['cas'] = self.cas
         return ret
+
+
+class ProjectUsages(BASE, ModelBase):
+    """Stores Project resource usage counters.
+
+    Each counter holds the number of non-deleted entities of one resource
+    type owned by the project. Counters are adjusted as entities are created
+    and deleted, and a NULL counter has not been seeded with a full count
+    yet. They are approximate: expired secrets remain counted, for example.
+
+    Project usage deletes are not soft-deletes.
+    """
+
+    __tablename__ = 'project_usages'
+
+    project_id = sa.Column(
+        sa.String(36),
+        sa.ForeignKey('projects.id', name='project_usages_fk'),
+        index=True,
+        unique=True,
+        nullable=False)
+    secrets = sa.Column(sa.Integer, nullable=True)
+    orders = sa.Column(sa.Integer, nullable=True)
+    containers = sa.Column(sa.Integer, nullable=True)
+    consumers = sa.Column(sa.Integer, nullable=True)
+    cas = sa.Column(sa.Integer, nullable=True)
+
+    def __init__(self, project_id=None):
+        """Creates Project Usages entity for a project.
+
+        :param project_id: the internal id of the project
+        :return: None
+        """
+        super(ProjectUsages, self).__init__()
+
+        if project_id is None:
+            msg = u._("Must supply non-None {0} argument for ProjectUsages "
+                      "entry.")
+            raise exception.MissingArgumentError(msg.format("project_id"))
+        self.project_id = project_id
+
+    def _do_extra_dict_fields(self):
+        """Sub-class hook method: return dict of fields."""
+        return {
+            'project_id': self.project_id,
+            'secrets': self.secrets,
+            'orders': self.orders,
+            'containers': self.containers,
+            'consumers': self.consumers,
+            'cas': self.cas,
+        }
@@ -21,11 +21,13 @@ quite intense for sqlalchemy, and maybe could be simplified.
 """
 
 import logging
+import threading
 import time
 import uuid
 
 from oslo_utils import timeutils
 import sqlalchemy
+from sqlalchemy import and_
 from sqlalchemy import func as sa_func
 from sqlalchemy import or_
 import sqlalchemy.orm as sa_orm
@@ -62,6 +64,7 @@ _PREFERRED_CA_REPOSITORY = None
 _PROJECT_REPOSITORY = None
 _PROJECT_CA_REPOSITORY = None
 _PROJECT_QUOTAS_REPOSITORY = None
+_PROJECT_USAGES_REPOSITORY = None
 _SECRET_ACL_REPOSITORY = None
 _SECRET_META_REPOSITORY = None
 _SECRET_REPOSITORY = None
@@ -80,6 +83,7 @@ def hard_reset():
         _ENGINE.dispose()
     _ENGINE = None
     _SESSION_FACTORY = None
+    invalidate_project_cache()
 
     # Make sure we reinitialize the engine and session factory
     setup_database_engine_and_factory()
@@ -131,6 +135,23 @@ def commit():
     get_session().commit()
 
 
+def flush(entity_name="Entity"):
+    """Write the entities staged in the session so far to the database.
+
+    Typically performed at the end of an operation creating several
+    entities, which are then inserted together.
+
+    :param entity_name: name of the entities created, for the error raised
+                        should one of them already exist
+    :raises Duplicate: if an entity conflicts with an existing one
+    """
+    try:
+        get_session().flush()
+    except sqlalchemy.exc.IntegrityError:
+        LOG.exception(u._LE('Problem saving staged entities'))
+        _raise_entity_already_exists(entity_name)
+
+
 def rollback():
     """Rollback session state so far.
 
@@ -153,6 +174,91 @@ def get_session():
     return _SESSION_FACTORY()
 
 
+class ProjectCache(object):
+    """Process-local cache of projects, keyed by their external ID.
+
+    Positive entries hold a detached copy of the Project entity that sessions
+    adopt via merge(load=False), which does not issue a SELECT. Negative
+    entries record that no project exists for an external ID; they expire
+    quickly as another process may create the project at any time.
+    """
+
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, external_project_id):
+        """Returns a (found, project) tuple.
+
+        The project is None for negative entries.
+        """
+        entry = self._entries.get(external_project_id)
+        if entry is None:
+            return False, None
+        expires_at, project = entry
+        if expires_at <= time.time():
+            return False, None
+        return True, project
+
+    def put(self, external_project_id, entity):
+        """Caches a project entity, or its absence if entity is None."""
+        if entity is None:
+            ttl = CONF.project_cache_negative_ttl_seconds
+            project = None
+        else:
+            ttl = CONF.project_cache_ttl_seconds
+            project = self._detached_copy(entity)
+            if project is None:
+                return
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES:
+                now = time.time()
+                self._entries = dict(
+                    (key, entry) for key, entry in self._entries.items()
+                    if entry[0] > now)
+                if len(self._entries) >= self.MAX_ENTRIES:
+                    self._entries = {}
+            self._entries[external_project_id] = (time.time() + ttl, project)
+
+    def invalidate(self, external_project_id=None):
+        """Drops the entry of a project, or every entry if none is given."""
+        with self._lock:
+            if external_project_id is None:
+                self._entries = {}
+            else:
+                self._entries.pop(external_project_id, None)
+
+    def _detached_copy(self, entity):
+        # Only column attributes may be copied, otherwise the merge would
+        # also cascade to (and cache) loaded relationships such as cas.
+        state = sqlalchemy.inspect(entity)
+        relationships = set(state.mapper.relationships.keys())
+        if state.modified or not relationships <= state.unloaded:
+            return None
+
+        snapshot_session = sa_orm.Session()
+        try:
+            return snapshot_session.merge(entity, load=False)
+        finally:
+            snapshot_session.close()
+
+
+_PROJECT_CACHE = ProjectCache()
+
+
+def invalidate_project_cache(external_project_id=None):
+    """Drops a cached project, or all of them if no ID is given.
+
+    Typically performed when Keystone reports that a project was deleted.
+    """
+    _PROJECT_CACHE.invalidate(external_project_id)
+
+
 def _get_engine(engine):
     if not engine:
         connection = CONF.sql_connection
@@ -293,31 +399,101 @@ def clean_paging_values(offset_arg=0, limit_arg=CONF.default_limit_paging):
     return offset, limit
 
 
+TOTAL_EXACT = 'exact'
+TOTAL_APPROX = 'approx'
+TOTAL_NONE = 'false'
+
+
+def clean_total_value(total_arg=None):
+    """Cleans a raw 'total' listing value.
+
+    :param total_arg: One of 'exact' (or 'true'), 'approx' or 'false', case
+                      insensitive. Empty or unknown values select the
+                      configured default_list_total.
+    :returns: One of TOTAL_EXACT, TOTAL_APPROX or TOTAL_NONE.
+    """
+    total = (total_arg or '').lower()
+    if total == 'true':
+        total = TOTAL_EXACT
+    if total not in (TOTAL_EXACT, TOTAL_APPROX, TOTAL_NONE):
+        total = CONF.default_list_total
+    return total
+
+
+def _filter_by_marker(query, model_class, marker, sort_key='created_at'):
+    """Restricts a listing query to the entities that follow a marker.
+
+    Listings paged by marker are ordered by (sort_key, id), and the marker is
+    the ID of the last entity on the previous page. The next page then starts
+    with an index range scan instead of skipping over every earlier row, so
+    deep pages cost the same to retrieve as the first one.
+
+    :param query: Listing query to restrict.
+    :param model_class: Model class being listed.
+    :param marker: ID of the last entity on the previous page, or an empty
+                   value to retrieve the first page.
+    :param sort_key: Name of the model attribute the listing is ordered by.
+    :returns: The restricted and ordered query.
+    :raises exception.InvalidMarker: If the listing has no entity with the
+                                     marker ID, such as one of another
+                                     project.
+    """
+    sort_column = getattr(model_class, sort_key)
+    query = query.order_by(None).order_by(sort_column, model_class.id)
+
+    if marker:
+        # The marker is looked up within the listing, so an entity outside
+        # of it is refused just like an unknown one.
+        marker_row = query.filter(model_class.id == marker).with_entities(
+            sort_column).first()
+        if marker_row is None:
+            raise exception.InvalidMarker(marker=marker)
+        marker_value = marker_row[0]
+        query = query.filter(or_(
+            sort_column > marker_value,
+            and_(sort_column == marker_value, model_class.id > marker)))
+
+    return query
+
+
 def delete_all_project_resources(project_id):
     """Logic to cleanup all project resources.
 
-    This cleanup uses same alchemy session to perform all db operations as a
-    transaction and will commit only when all db operations are performed
-    without error.
+    Containers, secrets and KEKs are soft deleted with set-based statements,
+    in chunks that are each committed on their own so that large projects do
+    not hold a long running transaction. The project itself is deleted last,
+    so should the cleanup fail part way, handling the Keystone notification
+    again completes it.
     """
     session = get_session()
-
-    container_repo = get_container_repository()
-    container_repo.delete_project_entities(
-        project_id, suppress_exception=False, session=session)
-    # secret children SecretStoreMetadatum, EncryptedDatum
-    # and container_secrets are deleted as part of secret delete
-    secret_repo = get_secret_repository()
-    secret_repo.delete_project_entities(
-        project_id, suppress_exception=False, session=session)
-    kek_repo = get_kek_datum_repository()
-    kek_repo.delete_project_entities(
+    chunk_size = CONF.keystone_notifications.project_cleanup_chunk_size
+
+    # secret children SecretStoreMetadatum, EncryptedDatum, container_secrets
+    # and ACLs are deleted along with each chunk of secrets
+    for entity_repo in (get_container_repository(),
+                        get_secret_repository(),
+                        get_kek_datum_repository()):
+        entity_repo.bulk_delete_project_entities(
+            project_id, chunk_size, session=session)
+
+    usages_repo = get_project_usages_repository()
+    usages_repo.delete_project_entities(
         project_id, suppress_exception=False, session=session)
     project_repo = get_project_repository()
     project_repo.delete_project_entities(
         project_id, suppress_exception=False, session=session)
 
 
+def _soft_delete(query):
+    """Soft deletes the entities selected by a query in a single statement.
+
+    :return: the number of entities deleted
+    """
+    now = timeutils.utcnow()
+    return query.update({'deleted': True, 'deleted_at': now,
+                         'updated_at': now}, synchronize_session=False)
+
+
 class BaseRepo(object):
     """Base repository for the barbican entities.
 
@@ -356,8 +532,13 @@ class BaseRepo(object):
 
         return entity
 
-    def create_from(self, entity, session=None):
-        """Sub-class hook: create from entity."""
+    def create_from(self, entity, session=None, flush=True):
+        """Sub-class hook: create from entity.
+
+        :param flush: False to stage the entity, which is then inserted at
+                      the next flush of the session. See repositories.flush(),
+                      which then raises Duplicate for conflicting entities.
+        """
         if not entity:
             msg = u._(
                 "Must supply non-None {entity_name}."
@@ -382,18 +563,24 @@ class BaseRepo(object):
 
         try:
             LOG.debug("Saving entity...")
-            entity.save(session=session)
+            entity.save(session=session, flush=flush)
         except sqlalchemy.exc.IntegrityError:
             LOG.exception(u._LE('Problem saving entity for create'))
             _raise_entity_already_exists(self._do_entity_name())
 
+        self._update_usage(entity, 1, session)
+
         LOG.debug('Elapsed repo '
                   'create secret:%s', (time.time() - start))  # DEBUG
 
         return entity
 
-    def save(self, entity):
-        """Saves the state of the entity."""
+    def save(self, entity, flush=True):
+        """Saves the state of the entity.
+
+        :param flush: False to have the changes written at the next flush of
+                      the session.
+        """
         entity.updated_at = timeutils.utcnow()
 
         # Validate the attributes before we go any further. From my
@@ -403,7 +590,7 @@ class BaseRepo(object):
         # idiotic.
         self._do_validate(entity.to_dict())
 
-        entity.save()
+        entity.save(flush=flush)
 
     def delete_entity_by_id(self, entity_id, external_project_id,
                             session=None):
@@ -416,11 +603,28 @@ class BaseRepo(object):
                           session=session)
 
         entity.delete(session=session)
+        self._update_usage(entity, -1, session)
 
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
         return "Entity"
 
+    def _do_usage_resource(self):
+        """Sub-class hook: return the project usage counter of the entity.
+
+        Repositories whose entities are counted in the ProjectUsages table
+        return the name of their counter column, such as 'secrets'.
+        """
+        return None
+
+    def _do_bulk_delete_children(self, entity_ids, session):
+        """Sub-class hook: delete children of entities being bulk deleted.
+
+        The set-based counterpart of the models' _do_delete_children(), see
+        bulk_delete_project_entities().
+        """
+        pass
+
     def _do_build_get_query(self, entity_id, external_project_id, session):
         """Sub-class hook: build a retrieve query."""
         return None
@@ -512,6 +716,58 @@ class BaseRepo(object):
         else:
             return 0
 
+    def get_approximate_count(self, project_id, session=None):
+        """Gets the maintained count of entities associated with a project
+
+        The count is read from the project's usage counter, which is seeded
+        with get_count() the first time it is read. Repositories without a
+        usage counter return get_count().
+
+        :param project_id: id of barbican project entity
+        :param session: existing db session reference. If None, gets session.
+        :return: an number 0 or greater
+        """
+        resource = self._do_usage_resource()
+        if not resource:
+            return self.get_count(project_id, session=session)
+
+        usages_repo = get_project_usages_repository()
+        count = usages_repo.get_usage(project_id, resource, session=session)
+        if count is None:
+            count = self.get_count(project_id, session=session)
+            usages_repo.set_usage(project_id, resource, count,
+                                  session=session)
+        return max(0, count)
+
+    def _update_usage(self, entity, delta, session):
+        """Adjusts the usage counter of the project owning the entity."""
+        resource = self._do_usage_resource()
+        project_id = getattr(entity, 'project_id', None)
+        if resource and project_id:
+            get_project_usages_repository().adjust_usage(
+                project_id, resource, delta, session=session)
+
+    def _get_listing_total(self, query, total_arg, project_id=None,
+                           session=None):
+        """Gets the total for a listing query, as selected by total_arg.
+
+        :param query: Listing query, before paging is applied.
+        :param total_arg: Raw 'total' listing value, see clean_total_value().
+        :param project_id: id of the barbican project, if the listing
+                           selects every entity of that project.
+        :param session: existing db session reference.
+        :return: the exact or approximate total, or None if not wanted.
+        """
+        total_mode = clean_total_value(total_arg)
+        if total_mode == TOTAL_NONE:
+            return None
+
+        if (total_mode == TOTAL_APPROX and project_id and
+                self._do_usage_resource()):
+            return self.get_approximate_count(project_id, session=session)
+
+        return query.count()
+
     def delete_project_entities(self, project_id,
                                 suppress_exception=False,
                                 session=None):
@@ -543,6 +799,51 @@ class BaseRepo(object):
                                                       'project_id=%s'),
                                                   project_id)
 
+    def bulk_delete_project_entities(self, project_id, chunk_size,
+                                     session=None):
+        """Soft deletes entities for a given project, chunk by chunk.
+
+        Unlike delete_project_entities(), entities are not loaded: each chunk
+        of up to chunk_size entities is soft deleted along with its children
+        (see _do_bulk_delete_children()) using set-based statements, then
+        committed.
+
+        :param project_id: id of barbican project entity
+        :param chunk_size: number of entities deleted per transaction
+        :param session: existing db session reference. If None, gets session.
+        :return: the number of entities deleted
+        """
+        session = self.get_session(session)
+        query = self._build_get_project_entities_query(project_id, session)
+        model = query.column_descriptions[0]['entity']
+        ids_query = query.with_entities(model.id).limit(max(1, chunk_size))
+
+        total = 0
+        try:
+            while True:
+                entity_ids = [entity_id for (entity_id,) in ids_query]
+                if not entity_ids:
+                    break
+
+                self._do_bulk_delete_children(entity_ids, session)
+                _soft_delete(session.query(model).filter(
+                    model.id.in_(entity_ids)))
+                session.commit()
+
+                total += len(entity_ids)
+                LOG.info(u._LI('Deleted %(total)s %(entity)s entities so far '
+                               'for project_id=%(project_id)s'),
+                         {'total': total, 'entity': self._do_entity_name(),
+                          'project_id': project_id})
+        except sqlalchemy.exc.SQLAlchemyError:
+            LOG.exception(u._LE('Problem bulk deleting project related '
+                                'entities'))
+            raise exception.BarbicanException(u._('Error deleting project '
+                                                  'entities for '
+                                                  'project_id=%s'),
+                                              project_id)
+        return total
+
 
 class ProjectRepo(BaseRepo):
     """Repository for the Project entity."""
@@ -563,14 +864,22 @@ class ProjectRepo(BaseRepo):
                                     suppress_exception=False, session=None):
         session = self.get_session(session)
 
+        # Negative cache entries are not trusted here, as callers such as
+        # get_or_create_project() must not create a duplicate project.
+        found, project = _PROJECT_CACHE.get(external_project_id)
+        if project is not None:
+            return session.merge(project, load=False)
+
         try:
             query = session.query(models.Project)
             query = query.filter_by(external_id=external_project_id)
 
             entity = query.one()
+            _PROJECT_CACHE.put(external_project_id, entity)
 
         except sa_orm.exc.NoResultFound:
             entity = None
+            _PROJECT_CACHE.put(external_project_id, None)
             if not suppress_exception:
                 LOG.exception(u._LE("Problem getting Project %s"),
                               external_project_id)
@@ -581,6 +890,23 @@ class ProjectRepo(BaseRepo):
 
         return entity
 
+    def get_project_id(self, external_project_id, session=None):
+        """Returns the ID of the project with the given external ID.
+
+        Unlike find_by_external_project_id() this trusts negative cache
+        entries, so is meant for queries that only filter by project.
+
+        :param external_project_id: external ID of the project.
+        :param session: existing db session reference.
+        :returns: the project ID, or None if there is no such project.
+        """
+        found, project = _PROJECT_CACHE.get(external_project_id)
+        if not found:
+            project = self.find_by_external_project_id(
+                external_project_id, suppress_exception=True,
+                session=session)
+        return project.id if project else None
+
     def _build_get_project_entities_query(self, project_id, session):
         """Builds query for retrieving project for given id."""
         query = session.query(models.Project)
@@ -593,12 +919,17 @@ class SecretRepo(BaseRepo):
     def get_by_create_date(self, external_project_id, offset_arg=None,
                            limit_arg=None, name=None, alg=None, mode=None,
                            bits=0, secret_type=None, suppress_exception=False,
-                           session=None, acl_only=None, user_id=None):
+                           session=None, acl_only=None, user_id=None,
+                           marker_arg=None, total_arg=None,
+                           load_store_metadata=False):
         """Returns a list of secrets
 
         The returned secrets are ordered by the date they were created at
-        and paged based on the offset and limit fields. The external_project_id
-        is external-to-Barbican value assigned to the project by Keystone.
+        and paged based on the offset and limit fields, or on the marker
+        field if one is provided. The external_project_id is
+        external-to-Barbican value assigned to the project by Keystone.
+        If load_store_metadata is True, the secret store metadata of the
+        returned secrets is loaded up front with a single query.
         """
 
         offset, limit = clean_paging_values(offset_arg, limit_arg)
@@ -607,6 +938,7 @@ class SecretRepo(BaseRepo):
         utcnow = timeutils.utcnow()
 
         query = session.query(models.Secret)
+        query = query.order_by(models.Secret.created_at)
         query = query.filter_by(deleted=False)
 
         # Note(john-wood-w): SQLAlchemy requires '== None' below,
@@ -629,31 +961,93 @@ class SecretRepo(BaseRepo):
             query = query.join(models.SecretACL)
             query = query.join(models.SecretACLUser)
             query = query.filter(models.SecretACLUser.user_id == user_id)
+            filtered = True
+            project_id = None
         else:
-            query = query.join(models.Project)
-            query = query.filter(
-                models.Project.external_id == external_project_id)
-
-        total = query.count()
-        end_offset = offset + limit
-
-        LOG.debug('Retrieving from %s to %s', offset, end_offset)
-
-        query = query.limit(limit).offset(offset)
+            project_id = get_project_repository().get_project_id(
+                external_project_id, session=session)
+            query = query.filter(models.Secret.project_id == project_id)
+            filtered = any((name, alg, mode, bits > 0, secret_type))
+
+        total = self._get_listing_total(
+            query, total_arg, project_id=None if filtered else project_id,
+            session=session)
+
+        if marker_arg is None:
+            end_offset = offset + limit
+            LOG.debug('Retrieving from %s to %s', offset, end_offset)
+            query = query.limit(limit).offset(offset)
+        else:
+            offset = 0
+            LOG.debug('Retrieving %s after marker %s', limit, marker_arg)
+            query = _filter_by_marker(query, models.Secret, marker_arg)
+            query = query.limit(limit)
         entities = query.all()
 
+        if load_store_metadata:
+            self._load_secret_store_metadata(entities, session)
+
         LOG.debug('Number entities retrieved: %s out of %s',
                   len(entities), total)
 
-        if total <= 0 and not suppress_exception:
+        if not (total or entities) and not suppress_exception:
             _raise_no_entities_found(self._do_entity_name())
 
         return entities, offset, limit, total
 
+    def _load_secret_store_metadata(self, secrets, session):
+        """Loads the secret store metadata of secrets with one IN query.
+
+        Otherwise each access to an unloaded secret_store_metadata
+        collection, such as when building the content types of a listing,
+        issues its own SELECT.
+        """
+        secrets = [secret for secret in secrets
+                   if 'secret_store_metadata' in
+                   sqlalchemy.inspect(secret).unloaded]
+        if not secrets:
+            return
+
+        metadata = dict((secret.id, []) for secret in secrets)
+        query = session.query(models.SecretStoreMetadatum)
+        query = query.filter(
+            models.SecretStoreMetadatum.secret_id.in_(list(metadata)))
+        for datum in query:
+            metadata[datum.secret_id].append(datum)
+
+        for secret in secrets:
+            sa_orm.attributes.set_committed_value(
+                secret, 'secret_store_metadata', metadata[secret.id])
+
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
         return "Secret"
 
+    def _do_usage_resource(self):
+        """Sub-class hook: return the project usage counter of the entity."""
+        return 'secrets'
+
+    def _do_bulk_delete_children(self, entity_ids, session):
+        """Sub-class hook: delete children of secrets being bulk deleted."""
+        acl_ids = session.query(models.SecretACL.id).filter(
+            models.SecretACL.secret_id.in_(entity_ids))
+        session.query(models.SecretACLUser).filter(
+            models.SecretACLUser.acl_id.in_(acl_ids.subquery())).delete(
+            synchronize_session=False)
+        session.query(models.SecretACL).filter(
+            models.SecretACL.secret_id.in_(entity_ids)).delete(
+            synchronize_session=False)
+
+        session.query(models.ContainerSecret).filter(
+            models.ContainerSecret.secret_id.in_(entity_ids)).delete(
+            synchronize_session=False)
+
+        for child_model in (models.SecretStoreMetadatum,
+                            models.EncryptedDatum):
+            _soft_delete(session.query(child_model).filter(
+                child_model.secret_id.in_(entity_ids)).filter_by(
+                deleted=False))
+
     def _do_build_get_query(self, entity_id, external_project_id, session):
         """Sub-class hook: build a retrieve query."""
         utcnow = timeutils.utcnow()
@@ -663,11 +1057,13 @@ class SecretRepo(BaseRepo):
         expiration_filter = or_(models.Secret.expiration == None,
                                 models.Secret.expiration > utcnow)
 
+        project_id = get_project_repository().get_project_id(
+            external_project_id, session=session)
+
         query = session.query(models.Secret)
         query = query.filter_by(id=entity_id, deleted=False)
         query = query.filter(expiration_filter)
-        query = query.join(models.Project)
-        query = query.filter(models.Project.external_id == external_project_id)
+        query = query.filter(models.Secret.project_id == project_id)
         return query
 
     def _do_validate(self, values):
@@ -686,8 +1082,12 @@ class SecretRepo(BaseRepo):
         return query
 
     def get_secret_by_id(self, entity_id, suppress_exception=False,
-                         session=None):
-        """Gets secret by its entity id without project id check."""
+                         session=None, load_payload=False):
+        """Gets secret by its entity id without project id check.
+
+        If load_payload is True, the secret store metadata and encrypted data
+        needed to retrieve the payload are loaded in the same query.
+        """
         session = self.get_session(session)
         try:
             utcnow = timeutils.utcnow()
@@ -697,6 +1097,10 @@ class SecretRepo(BaseRepo):
                                     models.Secret.expiration > utcnow)
 
             query = session.query(models.Secret)
+            if load_payload:
+                query = query.options(
+                    sa_orm.joinedload(models.Secret.secret_store_metadata),
+                    sa_orm.joinedload(models.Secret.encrypted_data))
             query = query.filter_by(id=entity_id, deleted=False)
             query = query.filter(expiration_filter)
             entity = query.one()
@@ -711,6 +1115,35 @@ class SecretRepo(BaseRepo):
                         id=entity_id))
         return entity
 
+    def get_secrets_by_ids(self, secret_ids, session=None):
+        """Gets the secrets with the given entity ids without project check.
+
+        Deleted and expired secrets are left out. The encrypted data, KEK,
+        project and secret store metadata of the secrets are loaded along
+        with them, so reading their payloads issues no further queries.
+
+        :returns: dict of the secrets found, keyed by entity id
+        """
+        if not secret_ids:
+            return {}
+        session = self.get_session(session)
+
+        utcnow = timeutils.utcnow()
+        expiration_filter = or_(models.Secret.expiration == None,
+                                models.Secret.expiration > utcnow)
+
+        query = session.query(models.Secret)
+        query = query.options(
+            sa_orm.joinedload(models.Secret.project),
+            sa_orm.subqueryload(models.Secret.encrypted_data))
+        query = query.filter(models.Secret.id.in_(list(secret_ids)))
+        query = query.filter_by(deleted=False)
+        query = query.filter(expiration_filter)
+        secrets = query.all()
+
+        self._load_secret_store_metadata(secrets, session)
+        return dict((secret.id, secret) for secret in secrets)
+
 
 class EncryptedDatumRepo(BaseRepo):
     """Repository for the EncryptedDatum entity
@@ -737,9 +1170,11 @@ class SecretStoreMetadatumRepo(BaseRepo):
     Stores key/value information on behalf of a Secret.
     """
 
-    def save(self, metadata, secret_model):
+    def save(self, metadata, secret_model, flush=True):
         """Saves the the specified metadata for the secret.
 
+        :param flush: False to stage the metadata, which is then inserted at
+                      the next flush of the session.
         :raises NotFound if entity does not exist.
         """
         now = timeutils.utcnow()
@@ -748,7 +1183,10 @@ class SecretStoreMetadatumRepo(BaseRepo):
             meta_model = models.SecretStoreMetadatum(k, v)
             meta_model.updated_at = now
             meta_model.secret = secret_model
-            meta_model.save()
+            meta_model.save(flush=False)
+
+        if flush:
+            self.get_session().flush()
 
     def get_metadata_for_secret(self, secret_id):
         """Returns a dict of SecretStoreMetadatum instances."""
@@ -794,7 +1232,11 @@ class KEKDatumRepo(BaseRepo):
                                  plugin_name,
                                  suppress_exception=False,
                                  session=None):
-        """Find or create a KEK datum instance."""
+        """Find or create a KEK datum instance.
+
+        A created KEK datum is staged, so it is inserted along with the
+        secret data it is first used for.
+        """
         if not plugin_name:
             raise exception.BarbicanException(
                 u._('Tried to register crypto plugin with null or empty '
@@ -824,7 +1266,7 @@ class KEKDatumRepo(BaseRepo):
             kek_datum.plugin_name = plugin_name
             kek_datum.status = models.States.ACTIVE
 
-            self.save(kek_datum)
+            self.save(kek_datum, flush=False)
 
         return kek_datum
 
@@ -857,11 +1299,13 @@ class OrderRepo(BaseRepo):
 
     def get_by_create_date(self, external_project_id, offset_arg=None,
                            limit_arg=None, meta_arg=None,
-                           suppress_exception=False, session=None):
+                           suppress_exception=False, session=None,
+                           marker_arg=None, total_arg=None):
         """Returns a list of orders
 
         The list is ordered by the date they were created at and paged
-        based on the offset and limit fields.
+        based on the offset and limit fields, or on the marker field if one
+        is provided.
 
         :param external_project_id: The keystone id for the project.
         :param offset_arg: The entity number where the query result should
@@ -871,6 +1315,10 @@ class OrderRepo(BaseRepo):
         :param suppress_exception: Whether NoResultFound exceptions should be
                                    suppressed.
         :param session: SQLAlchemy session object.
+        :param marker_arg: ID of the last order of the previous page. If
+                           provided (even empty), the offset is ignored.
+        :param total_arg: Whether and how to count the total, see
+                          clean_total_value().
 
         :returns: Tuple consisting of (list_of_entities, offset, limit, total).
         """
@@ -886,19 +1334,28 @@ class OrderRepo(BaseRepo):
         if meta_arg:
             query = query.filter(models.Order.meta.contains(meta_arg))
 
-        query = query.join(models.Project, models.Order.project)
-        query = query.filter(models.Project.external_id == external_project_id)
-
-        start = offset
-        end = offset + limit
-        LOG.debug('Retrieving from %s to %s', start, end)
-        total = query.count()
-        entities = query.offset(start).limit(limit).all()
+        project_id = get_project_repository().get_project_id(
+            external_project_id, session=session)
+        query = query.filter(models.Order.project_id == project_id)
+
+        total = self._get_listing_total(
+            query, total_arg, project_id=None if meta_arg else project_id,
+            session=session)
+        if marker_arg is None:
+            start = offset
+            end = offset + limit
+            LOG.debug('Retrieving from %s to %s', start, end)
+            query = query.offset(start)
+        else:
+            offset = 0
+            LOG.debug('Retrieving %s after marker %s', limit, marker_arg)
+            query = _filter_by_marker(query, models.Order, marker_arg)
+        entities = query.limit(limit).all()
         LOG.debug('Number entities retrieved: %s out of %s',
                   len(entities), total
                   )
 
-        if total <= 0 and not suppress_exception:
+        if not (total or entities) and not suppress_exception:
             _raise_no_entities_found(self._do_entity_name())
 
         return entities, offset, limit, total
@@ -907,12 +1364,18 @@ class OrderRepo(BaseRepo):
         """Sub-class hook: return entity name, such as for debugging."""
         return "Order"
 
+    def _do_usage_resource(self):
+        """Sub-class hook: return the project usage counter of the entity."""
+        return 'orders'
+
     def _do_build_get_query(self, entity_id, external_project_id, session):
         """Sub-class hook: build a retrieve query."""
+        project_id = get_project_repository().get_project_id(
+            external_project_id, session=session)
+
         query = session.query(models.Order)
         query = query.filter_by(id=entity_id, deleted=False)
-        query = query.join(models.Project, models.Order.project)
-        query = query.filter(models.Project.external_id == external_project_id)
+        query = query.filter(models.Order.project_id == project_id)
         return query
 
     def _do_validate(self, values):
@@ -1021,6 +1484,24 @@ class OrderBarbicanMetadatumRepo(BaseRepo):
 
         return {m.key: m.value for m in metadata}
 
+    def get_values_for_orders(self, order_ids, key, session=None):
+        """Returns a dict of order IDs to their value for a metadata key.
+
+        Orders without the key are left out of the dict.
+        """
+        if not order_ids:
+            return {}
+
+        session = self.get_session(session)
+
+        query = session.query(models.OrderBarbicanMetadatum.order_id,
+                              models.OrderBarbicanMetadatum.value)
+        query = query.filter_by(deleted=False, key=key)
+        query = query.filter(
+            models.OrderBarbicanMetadatum.order_id.in_(list(order_ids)))
+
+        return dict(query.all())
+
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
         return "OrderBarbicanMetadatum"
@@ -1085,6 +1566,51 @@ class OrderRetryTaskRepo(BaseRepo):
 
         return entities, offset, limit, total
 
+    def postpone_tasks(self, task_ids, retry_at, session=None):
+        """Moves the retry time of the specified tasks to retry_at.
+
+        :returns: The number of tasks updated.
+        """
+        if not task_ids:
+            return 0
+
+        session = self.get_session(session)
+
+        query = session.query(models.OrderRetryTask)
+        query = query.filter_by(deleted=False)
+        query = query.filter(models.OrderRetryTask.id.in_(list(task_ids)))
+
+        return query.update(
+            {models.OrderRetryTask.retry_at: retry_at,
+             models.OrderRetryTask.updated_at: timeutils.utcnow()},
+            synchronize_session=False)
+
+    def expedite_tasks_for_orders(self, order_ids, retry_task, retry_at,
+                                  session=None):
+        """Moves the orders' tasks that retry later than retry_at up to it.
+
+        :param order_ids: IDs of the orders whose tasks are expedited.
+        :param retry_task: Name of the retried task to expedite.
+        :param retry_at: Time the tasks should be retried at the latest.
+        :param session: SQLAlchemy session object.
+        :returns: The number of tasks updated.
+        """
+        if not order_ids:
+            return 0
+
+        session = self.get_session(session)
+
+        query = session.query(models.OrderRetryTask)
+        query = query.filter_by(deleted=False, retry_task=retry_task)
+        query = query.filter(
+            models.OrderRetryTask.order_id.in_(list(order_ids)))
+        query = query.filter(models.OrderRetryTask.retry_at > retry_at)
+
+        return query.update(
+            {models.OrderRetryTask.retry_at: retry_at,
+             models.OrderRetryTask.updated_at: timeutils.utcnow()},
+            synchronize_session=False)
+
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
         return "OrderRetryTask"
@@ -1105,12 +1631,14 @@ class ContainerRepo(BaseRepo):
 
     def get_by_create_date(self, external_project_id, offset_arg=None,
                            limit_arg=None, name_arg=None,
-                           suppress_exception=False, session=None):
+                           suppress_exception=False, session=None,
+                           marker_arg=None, total_arg=None):
         """Returns a list of containers
 
         The list is ordered by the date they were created at and paged
-        based on the offset and limit fields. The external_project_id is
-        external-to-Barbican value assigned to the project by Keystone.
+        based on the offset and limit fields, or on the marker field if one
+        is provided. The external_project_id is external-to-Barbican value
+        assigned to the project by Keystone.
         """
 
         offset, limit = clean_paging_values(offset_arg, limit_arg)
@@ -1124,19 +1652,28 @@ class ContainerRepo(BaseRepo):
         if name_arg:
             query = query.filter(models.Container.name.like(name_arg))
 
-        query = query.join(models.Project, models.Container.project)
-        query = query.filter(models.Project.external_id == external_project_id)
-
-        start = offset
-        end = offset + limit
-        LOG.debug('Retrieving from %s to %s', start, end)
-        total = query.count()
-        entities = query.offset(start).limit(limit).all()
+        project_id = get_project_repository().get_project_id(
+            external_project_id, session=session)
+        query = query.filter(models.Container.project_id == project_id)
+
+        total = self._get_listing_total(
+            query, total_arg, project_id=None if name_arg else project_id,
+            session=session)
+        if marker_arg is None:
+            start = offset
+            end = offset + limit
+            LOG.debug('Retrieving from %s to %s', start, end)
+            query = query.offset(start)
+        else:
+            offset = 0
+            LOG.debug('Retrieving %s after marker %s', limit, marker_arg)
+            query = _filter_by_marker(query, models.Container, marker_arg)
+        entities = query.limit(limit).all()
         LOG.debug('Number entities retrieved: %s out of %s',
                   len(entities), total
                   )
 
-        if total <= 0 and not suppress_exception:
+        if not (total or entities) and not suppress_exception:
             _raise_no_entities_found(self._do_entity_name())
 
         return entities, offset, limit, total
@@ -1145,12 +1682,33 @@ class ContainerRepo(BaseRepo):
         """Sub-class hook: return entity name, such as for debugging."""
         return "Container"
 
+    def _do_usage_resource(self):
+        """Sub-class hook: return the project usage counter of the entity."""
+        return 'containers'
+
+    def _do_bulk_delete_children(self, entity_ids, session):
+        """Sub-class hook: delete children of containers being bulk deleted."""
+        session.query(models.ContainerSecret).filter(
+            models.ContainerSecret.container_id.in_(entity_ids)).delete(
+            synchronize_session=False)
+
+        acl_ids = session.query(models.ContainerACL.id).filter(
+            models.ContainerACL.container_id.in_(entity_ids))
+        session.query(models.ContainerACLUser).filter(
+            models.ContainerACLUser.acl_id.in_(acl_ids.subquery())).delete(
+            synchronize_session=False)
+        session.query(models.ContainerACL).filter(
+            models.ContainerACL.container_id.in_(entity_ids)).delete(
+            synchronize_session=False)
+
     def _do_build_get_query(self, entity_id, external_project_id, session):
         """Sub-class hook: build a retrieve query."""
+        project_id = get_project_repository().get_project_id(
+            external_project_id, session=session)
+
         query = session.query(models.Container)
         query = query.filter_by(id=entity_id, deleted=False)
-        query = query.join(models.Project, models.Container.project)
-        query = query.filter(models.Project.external_id == external_project_id)
+        query = query.filter(models.Container.project_id == project_id)
         return query
 
     def _do_validate(self, values):
@@ -1185,6 +1743,39 @@ class ContainerRepo(BaseRepo):
                         id=entity_id))
         return entity
 
+    def get_container_secrets(self, container_id, session=None):
+        """Gets the member secrets of a container with a single query.
+
+        Deleted and expired secrets are left out. The project, ACLs,
+        encrypted data, KEK and secret store metadata of each secret are
+        loaded along with it, so authorizing and reading their payloads
+        issues no further queries.
+
+        :returns: list of (name, secret) tuples, ordered by name
+        """
+        session = self.get_session(session)
+
+        utcnow = timeutils.utcnow()
+        expiration_filter = or_(models.Secret.expiration == None,
+                                models.Secret.expiration > utcnow)
+
+        query = session.query(models.ContainerSecret.name, models.Secret)
+        query = query.filter(
+            models.ContainerSecret.container_id == container_id)
+        query = query.filter_by(deleted=False)
+        query = query.join(
+            models.Secret,
+            models.ContainerSecret.secret_id == models.Secret.id)
+        query = query.filter_by(deleted=False)
+        query = query.filter(expiration_filter)
+        query = query.options(
+            sa_orm.joinedload(models.Secret.project),
+            sa_orm.joinedload(models.Secret.secret_acls),
+            sa_orm.joinedload(models.Secret.encrypted_data),
+            sa_orm.joinedload(models.Secret.secret_store_metadata))
+        query = query.order_by(models.ContainerSecret.name)
+        return query.all()
+
 
 class ContainerSecretRepo(BaseRepo):
         """Repository for the ContainerSecret entity."""
@@ -1207,11 +1798,12 @@ class ContainerConsumerRepo(BaseRepo):
 
     def get_by_container_id(self, container_id,
                             offset_arg=None, limit_arg=None,
-                            suppress_exception=False, session=None):
+                            suppress_exception=False, session=None,
+                            marker_arg=None, total_arg=None):
         """Returns a list of Consumers
 
-        The list is ordered by the date they were created at and paged
-        based on the offset and limit fields.
+        The list is ordered by name and paged based on the offset and limit
+        fields, or on the marker field if one is provided.
         """
 
         offset, limit = clean_paging_values(offset_arg, limit_arg)
@@ -1225,16 +1817,24 @@ class ContainerConsumerRepo(BaseRepo):
             models.ContainerConsumerMetadatum.container_id == container_id
         )
 
-        start = offset
-        end = offset + limit
-        LOG.debug('Retrieving from %s to %s', start, end)
-        total = query.count()
-        entities = query.offset(start).limit(limit).all()
+        total = self._get_listing_total(query, total_arg, session=session)
+        if marker_arg is None:
+            start = offset
+            end = offset + limit
+            LOG.debug('Retrieving from %s to %s', start, end)
+            query = query.offset(start)
+        else:
+            offset = 0
+            LOG.debug('Retrieving %s after marker %s', limit, marker_arg)
+            query = _filter_by_marker(
+                query, models.ContainerConsumerMetadatum, marker_arg,
+                sort_key='name')
+        entities = query.limit(limit).all()
         LOG.debug('Number entities retrieved: %s out of %s',
                   len(entities), total
                   )
 
-        if total <= 0 and not suppress_exception:
+        if not (total or entities) and not suppress_exception:
             _raise_no_entities_found(self._do_entity_name())
 
         return entities, offset, limit, total
@@ -1267,6 +1867,7 @@ class ContainerConsumerRepo(BaseRepo):
             container.updated_at = timeutils.utcnow()
             container.consumers.append(new_consumer)
             container.save(session=session)
+            self._update_usage(new_consumer, 1, session)
         except sqlalchemy.exc.IntegrityError:
             session.rollback()  # We know consumer already exists.
 
@@ -1278,15 +1879,22 @@ class ContainerConsumerRepo(BaseRepo):
             existing_consumer = self.get_by_values(
                 new_consumer.container_id, new_consumer.name, new_consumer.URL,
                 show_deleted=True)
+            was_deleted = existing_consumer.deleted
             existing_consumer.deleted = False
             existing_consumer.deleted_at = None
             # We are not concerned about timing here -- set only, no reads
             existing_consumer.save()
+            if was_deleted:
+                self._update_usage(existing_consumer, 1, session)
 
     def _do_entity_name(self):
         """Sub-class hook: return entity name, such as for debugging."""
         return "ContainerConsumer"
 
+    def _do_usage_resource(self):
+        """Sub-class hook: return the project usage counter of the entity."""
+        return 'consumers'
+
     def _do_build_get_query(self, entity_id, external_project_id, session):
         """Sub-class hook: build a retrieve query."""
         query = session.query(models.ContainerConsumerMetadatum)
@@ -1383,11 +1991,13 @@ class CertificateAuthorityRepo(BaseRepo):
                            plugin_name=None, plugin_ca_id=None,
                            suppress_exception=False, session=None,
                            show_expired=False, project_id=None,
-                           restrict_to_project_cas=False):
+                           restrict_to_project_cas=False, marker_arg=None,
+                           total_arg=None):
         """Returns a list of certificate authorities
 
         The returned certificate authorities are ordered by the date they
-        were created and paged based on the offset and limit fields.
+        were created and paged based on the offset and limit fields, or on
+        the marker field if one is provided.
         """
 
         offset, limit = clean_paging_values(offset_arg, limit_arg)
@@ -1438,16 +2048,23 @@ class CertificateAuthorityRepo(BaseRepo):
             query = query.filter(
                 models.CertificateAuthority.plugin_ca_id.like(plugin_ca_id))
 
-        start = offset
-        end = offset + limit
-        LOG.debug('Retrieving from %s to %s', start, end)
-        total = query.count()
-        entities = query.offset(start).limit(limit).all()
+        total = self._get_listing_total(query, total_arg, session=session)
+        if marker_arg is None:
+            start = offset
+            end = offset + limit
+            LOG.debug('Retrieving from %s to %s', start, end)
+            query = query.offset(start)
+        else:
+            offset = 0
+            LOG.debug('Retrieving %s after marker %s', limit, marker_arg)
+            query = _filter_by_marker(
+                query, models.CertificateAuthority, marker_arg)
+        entities = query.limit(limit).all()
         LOG.debug('Number entities retrieved: %s out of %s',
                   len(entities), total
                   )
 
-        if total <= 0 and not suppress_exception:
+        if not (total or entities) and not suppress_exception:
             _raise_no_entities_found(self._do_entity_name())
 
         return entities, offset, limit, total
@@ -1490,6 +2107,10 @@ class CertificateAuthorityRepo(BaseRepo):
         """Sub-class hook: return entity name, such as for debugging."""
         return "CertificateAuthority"
 
+    def _do_usage_resource(self):
+        """Sub-class hook: return the project usage counter of the entity."""
+        return 'cas'
+
     def _do_build_get_query(self, entity_id, external_project_id, session):
         """Sub-class hook: build a retrieve query."""
         utcnow = timeutils.utcnow()
@@ -2009,9 +2630,10 @@ class ProjectQuotasRepo(BaseRepo):
         :return: None or Python dict of project quotas for project
         """
         session = self.get_session(session)
+        project_id = get_project_repository().get_project_id(
+            external_project_id, session=session)
         query = session.query(models.ProjectQuotas)
-        query = query.join(models.Project, models.ProjectQuotas.project)
-        query = query.filter(models.Project.external_id == external_project_id)
+        query = query.filter_by(project_id=project_id)
         try:
             entity = query.one()
         except sa_orm.exc.NoResultFound:
@@ -2033,9 +2655,10 @@ class ProjectQuotasRepo(BaseRepo):
         """
 
         session = self.get_session(session)
+        project_id = get_project_repository().get_project_id(
+            external_project_id, session=session)
         query = session.query(models.ProjectQuotas)
-        query = query.join(models.Project, models.ProjectQuotas.project)
-        query = query.filter(models.Project.external_id == external_project_id)
+        query = query.filter_by(project_id=project_id)
         try:
             entity = query.one()
         except sa_orm.exc.NoResultFound:
@@ -2046,130 +2669,274 @@ class ProjectQuotasRepo(BaseRepo):
         entity.delete(session=session)
 
 
+class ProjectUsagesRepo(BaseRepo):
+    """Repository for the ProjectUsages entity."""
+
+    def _do_entity_name(self):
+        """Sub-class hook: return entity name, such as for debugging."""
+        return "ProjectUsages"
+
+    def _do_build_get_query(self, entity_id, external_project_id, session):
+        """Sub-class hook: build a retrieve query."""
+        return session.query(models.ProjectUsages).filter_by(id=entity_id)
+
+    def _do_validate(self, values):
+        """Sub-class hook: validate values."""
+        pass
+
+    def _build_get_project_entities_query(self, project_id, session):
+        """Builds query for retrieving usage counters of given project.
+
+        :param project_id: id of barbican project entity
+        :param session: existing db session reference.
+        """
+        return session.query(models.ProjectUsages).filter_by(
+            project_id=project_id)
+
+    def get_usage(self, project_id, resource, session=None):
+        """Returns a project's usage counter for a resource.
+
+        :param project_id: ID of project whose usage is wanted
+        :param resource: name of the counter, such as 'secrets'
+        :param session: SQLAlchemy session object.
+        :return: the counter value, or None if not seeded yet
+        """
+        session = self.get_session(session)
+        query = session.query(getattr(models.ProjectUsages, resource))
+        row = query.filter_by(project_id=project_id).first()
+        return row[0] if row else None
+
+    def set_usage(self, project_id, resource, count, session=None):
+        """Seeds a project's usage counter for a resource.
+
+        Should another request create the project's counters concurrently,
+        the session is rolled back before they are updated.
+
+        :param project_id: ID of project whose usage is set
+        :param resource: name of the counter, such as 'secrets'
+        :param count: value to set the counter to
+        :param session: SQLAlchemy session object.
+        :return: None
+        """
+        session = self.get_session(session)
+        query = self._build_get_project_entities_query(project_id, session)
+        if query.update({resource: count}, synchronize_session=False):
+            return
+
+        entity = models.ProjectUsages(project_id)
+        setattr(entity, resource, count)
+        try:
+            entity.save(session=session)
+        except sqlalchemy.exc.IntegrityError:
+            # Counters are seeded before a request changes anything, and
+            # others can't create them for a project not committed yet, so
+            # rolling back loses none of the caller's changes.
+            session.rollback()
+            LOG.debug("Usages of project %s were created concurrently, "
+                      "updating them instead", project_id)
+            query = self._build_get_project_entities_query(project_id,
+                                                           session)
+            query.update({resource: count}, synchronize_session=False)
+
+    def adjust_usage(self, project_id, resource, delta, session=None):
+        """Adds delta to a project's usage counter for a resource.
+
+        The update is done in the database, so concurrent adjustments are
+        not lost. Counters that were not seeded yet are left alone.
+
+        :param project_id: ID of project whose usage changed
+        :param resource: name of the counter, such as 'secrets'
+        :param delta: amount to add to the counter
+        :param session: SQLAlchemy session object.
+        :return: None
+        """
+        session = self.get_session(session)
+        column = getattr(models.ProjectUsages, resource)
+        # The counter row is never staged, so there is no need to flush the
+        # entities staged for creation (and being counted) beforehand.
+        query = self._build_get_project_entities_query(
+            project_id, session).autoflush(False)
+        query.update({column: column + delta}, synchronize_session=False)
+
+    def delete_project_entities(self, project_id,
+                                suppress_exception=False,
+                                session=None):
+        """Deletes the usage counters of a given project.
+
+        Usage counters are not soft deleted, so they are reseeded should the
+        project be used again.
+        """
+        session = self.get_session(session)
+        query = self._build_get_project_entities_query(project_id, session)
+        try:
+            query.delete(synchronize_session=False)
+        except sqlalchemy.exc.SQLAlchemyError:
+            LOG.exception(u._LE('Problem deleting project usages'))
+            if not suppress_exception:
+                raise exception.BarbicanException(u._('Error deleting project '
+                                                      'usages for '
+                                                      'project_id=%s'),
+                                                  project_id)
+
+
 def get_ca_repository():
     """Returns a singleton Secret repository instance."""
     global _CA_REPOSITORY
-    return _get_repository(_CA_REPOSITORY, CertificateAuthorityRepo)
+    if not _CA_REPOSITORY:
+        _CA_REPOSITORY = CertificateAuthorityRepo()
+    return _CA_REPOSITORY
 
 
 def get_container_acl_repository():
     """Returns a singleton Container ACL repository instance."""
     global _CONTAINER_ACL_REPOSITORY
-    return _get_repository(_CONTAINER_ACL_REPOSITORY, ContainerACLRepo)
+    if not _CONTAINER_ACL_REPOSITORY:
+        _CONTAINER_ACL_REPOSITORY = ContainerACLRepo()
+    return _CONTAINER_ACL_REPOSITORY
 
 
 def get_container_consumer_repository():
     """Returns a singleton Container Consumer repository instance."""
     global _CONTAINER_CONSUMER_REPOSITORY
-    return _get_repository(_CONTAINER_CONSUMER_REPOSITORY,
-                           ContainerConsumerRepo)
+    if not _CONTAINER_CONSUMER_REPOSITORY:
+        _CONTAINER_CONSUMER_REPOSITORY = ContainerConsumerRepo()
+    return _CONTAINER_CONSUMER_REPOSITORY
 
 
 def get_container_repository():
     """Returns a singleton Container repository instance."""
     global _CONTAINER_REPOSITORY
-    return _get_repository(_CONTAINER_REPOSITORY, ContainerRepo)
+    if not _CONTAINER_REPOSITORY:
+        _CONTAINER_REPOSITORY = ContainerRepo()
+    return _CONTAINER_REPOSITORY
 
 
 def get_container_secret_repository():
     """Returns a singleton Container-Secret repository instance."""
     global _CONTAINER_SECRET_REPOSITORY
-    return _get_repository(_CONTAINER_SECRET_REPOSITORY, ContainerSecretRepo)
+    if not _CONTAINER_SECRET_REPOSITORY:
+        _CONTAINER_SECRET_REPOSITORY = ContainerSecretRepo()
+    return _CONTAINER_SECRET_REPOSITORY
 
 
 def get_encrypted_datum_repository():
     """Returns a singleton Encrypted Datum repository instance."""
     global _ENCRYPTED_DATUM_REPOSITORY
-    return _get_repository(_ENCRYPTED_DATUM_REPOSITORY, EncryptedDatumRepo)
+    if not _ENCRYPTED_DATUM_REPOSITORY:
+        _ENCRYPTED_DATUM_REPOSITORY = EncryptedDatumRepo()
+    return _ENCRYPTED_DATUM_REPOSITORY
 
 
 def get_kek_datum_repository():
     """Returns a singleton KEK Datum repository instance."""
     global _KEK_DATUM_REPOSITORY
-    return _get_repository(_KEK_DATUM_REPOSITORY, KEKDatumRepo)
+    if not _KEK_DATUM_REPOSITORY:
+        _KEK_DATUM_REPOSITORY = KEKDatumRepo()
+    return _KEK_DATUM_REPOSITORY
 
 
 def get_order_plugin_meta_repository():
     """Returns a singleton Order-Plugin meta repository instance."""
     global _ORDER_PLUGIN_META_REPOSITORY
-    return _get_repository(_ORDER_PLUGIN_META_REPOSITORY,
-                           OrderPluginMetadatumRepo)
+    if not _ORDER_PLUGIN_META_REPOSITORY:
+        _ORDER_PLUGIN_META_REPOSITORY = OrderPluginMetadatumRepo()
+    return _ORDER_PLUGIN_META_REPOSITORY
 
 
 def get_order_barbican_meta_repository():
     """Returns a singleton Order-Barbican meta repository instance."""
     global _ORDER_BARBICAN_META_REPOSITORY
-    return _get_repository(_ORDER_BARBICAN_META_REPOSITORY,
-                           OrderBarbicanMetadatumRepo)
+    if not _ORDER_BARBICAN_META_REPOSITORY:
+        _ORDER_BARBICAN_META_REPOSITORY = OrderBarbicanMetadatumRepo()
+    return _ORDER_BARBICAN_META_REPOSITORY
 
 
 def get_order_repository():
     """Returns a singleton Order repository instance."""
     global _ORDER_REPOSITORY
-    return _get_repository(_ORDER_REPOSITORY, OrderRepo)
+    if not _ORDER_REPOSITORY:
+        _ORDER_REPOSITORY = OrderRepo()
+    return _ORDER_REPOSITORY
 
 
 def get_order_retry_tasks_repository():
     """Returns a singleton OrderRetryTask repository instance."""
     global _ORDER_RETRY_TASK_REPOSITORY
-    return _get_repository(_ORDER_RETRY_TASK_REPOSITORY, OrderRetryTaskRepo)
+    if not _ORDER_RETRY_TASK_REPOSITORY:
+        _ORDER_RETRY_TASK_REPOSITORY = OrderRetryTaskRepo()
+    return _ORDER_RETRY_TASK_REPOSITORY
 
 
 def get_preferred_ca_repository():
     """Returns a singleton Secret repository instance."""
     global _PREFERRED_CA_REPOSITORY
-    return _get_repository(_PREFERRED_CA_REPOSITORY,
-                           PreferredCertificateAuthorityRepo)
+    if not _PREFERRED_CA_REPOSITORY:
+        _PREFERRED_CA_REPOSITORY = PreferredCertificateAuthorityRepo()
+    return _PREFERRED_CA_REPOSITORY
 
 
 def get_project_repository():
     """Returns a singleton Project repository instance."""
     global _PROJECT_REPOSITORY
-    return _get_repository(_PROJECT_REPOSITORY, ProjectRepo)
+    if not _PROJECT_REPOSITORY:
+        _PROJECT_REPOSITORY = ProjectRepo()
+    return _PROJECT_REPOSITORY
 
 
 def get_project_ca_repository():
     """Returns a singleton Secret repository instance."""
     global _PROJECT_CA_REPOSITORY
-    return _get_repository(_PROJECT_CA_REPOSITORY,
-                           ProjectCertificateAuthorityRepo)
+    if not _PROJECT_CA_REPOSITORY:
+        _PROJECT_CA_REPOSITORY = ProjectCertificateAuthorityRepo()
+    return _PROJECT_CA_REPOSITORY
 
 
 def get_project_quotas_repository():
     """Returns a singleton Project Quotas repository instance."""
     global _PROJECT_QUOTAS_REPOSITORY
-    return _get_repository(_PROJECT_QUOTAS_REPOSITORY,
-                           ProjectQuotasRepo)
+    if not _PROJECT_QUOTAS_REPOSITORY:
+        _PROJECT_QUOTAS_REPOSITORY = ProjectQuotasRepo()
+    return _PROJECT_QUOTAS_REPOSITORY
+
+
+def get_project_usages_repository():
+    """Returns a singleton Project Usages repository instance."""
+    global _PROJECT_USAGES_REPOSITORY
+    if not _PROJECT_USAGES_REPOSITORY:
+        _PROJECT_USAGES_REPOSITORY = ProjectUsagesRepo()
+    return _PROJECT_USAGES_REPOSITORY
 
 
 def get_secret_acl_repository():
     """Returns a singleton Secret ACL repository instance."""
     global _SECRET_ACL_REPOSITORY
-    return _get_repository(_SECRET_ACL_REPOSITORY, SecretACLRepo)
+    if not _SECRET_ACL_REPOSITORY:
+        _SECRET_ACL_REPOSITORY = SecretACLRepo()
+    return _SECRET_ACL_REPOSITORY
 
 
 def get_secret_meta_repository():
     """Returns a singleton Secret meta repository instance."""
     global _SECRET_META_REPOSITORY
-    return _get_repository(_SECRET_META_REPOSITORY, SecretStoreMetadatumRepo)
+    if not _SECRET_META_REPOSITORY:
+        _SECRET_META_REPOSITORY = SecretStoreMetadatumRepo()
+    return _SECRET_META_REPOSITORY
 
 
 def get_secret_repository():
     """Returns a singleton Secret repository instance."""
     global _SECRET_REPOSITORY
-    return _get_repository(_SECRET_REPOSITORY, SecretRepo)
+    if not _SECRET_REPOSITORY:
+        _SECRET_REPOSITORY = SecretRepo()
+    return _SECRET_REPOSITORY
 
 
 def get_transport_key_repository():
     """Returns a singleton Transport Key repository instance."""
     global _TRANSPORT_KEY_REPOSITORY
-    return _get_repository(_TRANSPORT_KEY_REPOSITORY, TransportKeyRepo)
-
-
-def _get_repository(global_ref, repo_class):
-    if not global_ref:
-        global_ref = repo_class()
-    return global_ref
+    if not _TRANSPORT_KEY_REPOSITORY:
+        _TRANSPORT_KEY_REPOSITORY = TransportKeyRepo()
+    return _TRANSPORT_KEY_REPOSITORY
 
 
 def _raise_entity_not_found(entity_name, entity_id):
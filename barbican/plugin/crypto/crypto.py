@@ -281,6 +281,24 @@ class CryptoPluginBase(object):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def decrypt_batch(self, decrypt_requests, kek_meta_dto, project_id):
+        """Decrypt several encrypted datums protected by the same KEK.
+
+        Plugins may override this to reuse work across the datums, such as
+        unwrapping the KEK or opening an HSM session once for the batch. By
+        default each datum is decrypted with :meth:`decrypt`.
+
+        :param decrypt_requests: list of (decrypt_dto, kek_meta_extended)
+            tuples, as would be passed to :meth:`decrypt`.
+        :param kek_meta_dto: Key encryption key metadata shared by the datums
+        :param project_id: Project ID associated with the encrypted datums.
+        :returns: list of unencrypted byte data, in the order of
+            decrypt_requests
+        """
+        return [self.decrypt(decrypt_dto, kek_meta_dto, kek_meta_extended,
+                             project_id)
+                for decrypt_dto, kek_meta_extended in decrypt_requests]
+
     @abc.abstractmethod
     def bind_kek_metadata(self, kek_meta_dto):
         """Key Encryption Key Metadata binding function
@@ -47,6 +47,10 @@ config.parse_args(CONF)
 
 
 class _CryptoPluginManager(named.NamedExtensionManager):
+
+    # Bounds the number of key specs whose supporting plugin is remembered.
+    MAX_CAPABILITY_ENTRIES = 1000
+
     def __init__(self, conf=CONF, invoke_args=(), invoke_kwargs={}):
         """Crypto Plugin Manager
 
@@ -66,6 +70,9 @@ class _CryptoPluginManager(named.NamedExtensionManager):
         plugin_utils.instantiate_plugins(
             self, invoke_args, invoke_kwargs)
 
+        self._plugin_tables_source = None
+        self._refresh_plugin_tables()
+
     def get_plugin_store_generate(self, type_needed, algorithm=None,
                                   bit_length=None, mode=None):
         """Gets a secret store or generate plugin that supports provided type.
@@ -74,16 +81,27 @@ class _CryptoPluginManager(named.NamedExtensionManager):
         type of plugin required
         :returns: CryptoPluginBase plugin implementation
         """
-        active_plugins = plugin_utils.get_active_plugins(self)
+        self._refresh_plugin_tables()
 
-        if len(active_plugins) < 1:
+        if not self._plugins_by_name:
             raise crypto.CryptoPluginNotFound()
 
-        for generating_plugin in active_plugins:
-            if generating_plugin.supports(
-                    type_needed, algorithm, bit_length, mode):
-                break
+        key = (type_needed, algorithm, bit_length, mode)
+        if key in self._supporting_plugins:
+            generating_plugin = self._supporting_plugins[key]
         else:
+            for generating_plugin in plugin_utils.get_active_plugins(self):
+                if generating_plugin.supports(
+                        type_needed, algorithm, bit_length, mode):
+                    break
+            else:
+                generating_plugin = None
+
+            if len(self._supporting_plugins) >= self.MAX_CAPABILITY_ENTRIES:
+                self._supporting_plugins.clear()
+            self._supporting_plugins[key] = generating_plugin
+
+        if generating_plugin is None:
             raise secret_store.SecretStorePluginNotFound()
 
         return generating_plugin
@@ -95,20 +113,32 @@ class _CryptoPluginManager(named.NamedExtensionManager):
         type of plugin required
         :returns: CryptoPluginBase plugin implementation
         """
-        active_plugins = plugin_utils.get_active_plugins(self)
+        self._refresh_plugin_tables()
 
-        if len(active_plugins) < 1:
+        if not self._plugins_by_name:
             raise crypto.CryptoPluginNotFound()
 
-        for decrypting_plugin in active_plugins:
-            plugin_name = utils.generate_fullname_for(decrypting_plugin)
-            if plugin_name == plugin_name_for_store:
-                break
-        else:
+        decrypting_plugin = self._plugins_by_name.get(plugin_name_for_store)
+        if decrypting_plugin is None:
             raise secret_store.SecretStorePluginNotFound()
 
         return decrypting_plugin
 
+    def _refresh_plugin_tables(self):
+        """Builds the lookup tables of the active plugins.
+
+        The plugins are keyed by their full name, and the capability table
+        remembers the plugin found for each support type and key attributes.
+        The tables are only rebuilt if the extensions list gets replaced.
+        """
+        if self._plugin_tables_source is not self.extensions:
+            self._plugins_by_name = dict(
+                (utils.generate_fullname_for(plugin), plugin)
+                for plugin in plugin_utils.get_active_plugins(self)
+            )
+            self._supporting_plugins = {}
+            self._plugin_tables_source = self.extensions
+
 
 def get_manager():
     """Return a singleton crypto plugin manager."""
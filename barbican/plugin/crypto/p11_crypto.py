@@ -40,6 +40,27 @@ p11_crypto_plugin_opts = [
     cfg.IntOpt('slot_id',
                help=u._('HSM Slot ID'),
                default=1),
+    cfg.IntOpt('session_pool_min_size',
+               help=u._('Number of logged in HSM sessions opened at '
+                        'startup and kept in the session pool'),
+               default=1),
+    cfg.IntOpt('session_pool_max_size',
+               help=u._('Maximum number of HSM sessions the session pool '
+                        'may hold open at once'),
+               default=10),
+    cfg.IntOpt('session_pool_timeout',
+               help=u._('Seconds to wait for an HSM session to become '
+                        'available when the session pool is exhausted'),
+               default=30),
+    cfg.IntOpt('kek_cache_size',
+               help=u._('Maximum number of unwrapped project KEK handles '
+                        'to keep cached across pooled sessions, 0 disables '
+                        'the cache'),
+               default=100),
+    cfg.IntOpt('kek_cache_ttl',
+               help=u._('Seconds an unwrapped project KEK handle may be '
+                        'reused before it is unwrapped again'),
+               default=300),
 ]
 CONF.register_group(p11_crypto_plugin_group)
 CONF.register_opts(p11_crypto_plugin_opts, group=p11_crypto_plugin_group)
@@ -63,19 +84,24 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
             library_path=conf.p11_crypto_plugin.library_path,
             login_passphrase=conf.p11_crypto_plugin.login,
             slot_id=conf.p11_crypto_plugin.slot_id,
-            ffi=ffi
+            ffi=ffi,
+            session_pool_min_size=conf.p11_crypto_plugin.session_pool_min_size,
+            session_pool_max_size=conf.p11_crypto_plugin.session_pool_max_size,
+            session_pool_timeout=conf.p11_crypto_plugin.session_pool_timeout,
+            key_cache_size=conf.p11_crypto_plugin.kek_cache_size,
+            key_cache_ttl=conf.p11_crypto_plugin.kek_cache_ttl
         )
         self.pkcs11.cache_mkek_and_hmac(conf.p11_crypto_plugin.mkek_label,
                                         conf.p11_crypto_plugin.hmac_label)
 
     def encrypt(self, encrypt_dto, kek_meta_dto, project_id):
-        session = self.pkcs11.create_working_session()
+        return self.pkcs11.call_with_session(self._encrypt, encrypt_dto,
+                                             kek_meta_dto)
 
+    def _encrypt(self, session, encrypt_dto, kek_meta_dto):
         meta = json.loads(kek_meta_dto.plugin_meta)
-        key = self.pkcs11.unwrap_key(
-            meta['iv'], meta['hmac'], meta['wrapped_key'],
-            meta['mkek_label'], meta['hmac_label'], session
-        )
+        key = self.pkcs11.get_unwrapped_kek(kek_meta_dto.kek_label, meta,
+                                            session)
         iv = self.pkcs11.generate_random(16, session)
         ck_mechanism = self.pkcs11.build_gcm_mech(iv)
 
@@ -98,19 +124,34 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
             'iv': base64.b64encode(self.pkcs11.ffi.buffer(iv)[:])
         })
 
-        self.pkcs11.close_session(session)
-
         return plugin.ResponseDTO(cyphertext, kek_meta_extended)
 
     def decrypt(self, decrypt_dto, kek_meta_dto, kek_meta_extended,
                 project_id):
-        session = self.pkcs11.create_working_session()
+        return self.pkcs11.call_with_session(self._decrypt, decrypt_dto,
+                                             kek_meta_dto, kek_meta_extended)
+
+    def decrypt_batch(self, decrypt_requests, kek_meta_dto, project_id):
+        return self.pkcs11.call_with_session(self._decrypt_batch,
+                                             decrypt_requests, kek_meta_dto)
+
+    def _decrypt(self, session, decrypt_dto, kek_meta_dto, kek_meta_extended):
+        key = self._get_kek(session, kek_meta_dto)
+        return self._decrypt_with_key(session, key, decrypt_dto,
+                                      kek_meta_extended)
+
+    def _decrypt_batch(self, session, decrypt_requests, kek_meta_dto):
+        key = self._get_kek(session, kek_meta_dto)
+        return [self._decrypt_with_key(session, key, decrypt_dto,
+                                       kek_meta_extended)
+                for decrypt_dto, kek_meta_extended in decrypt_requests]
 
+    def _get_kek(self, session, kek_meta_dto):
         meta = json.loads(kek_meta_dto.plugin_meta)
-        key = self.pkcs11.unwrap_key(
-            meta['iv'], meta['hmac'], meta['wrapped_key'],
-            meta['mkek_label'], meta['hmac_label'], session
-        )
+        return self.pkcs11.get_unwrapped_kek(kek_meta_dto.kek_label, meta,
+                                             session)
+
+    def _decrypt_with_key(self, session, key, decrypt_dto, kek_meta_extended):
         meta_extended = json.loads(kek_meta_extended)
         iv = base64.b64decode(meta_extended['iv'])
         iv = self.pkcs11.ffi.new("CK_BYTE[]", iv)
@@ -131,20 +172,19 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
         )
         self.pkcs11.check_error(rv)
 
-        self.pkcs11.close_session(session)
         return self.pkcs11.unpad(self.pkcs11.ffi.buffer(pt, pt_len[0])[:])
 
     def bind_kek_metadata(self, kek_meta_dto):
         # Enforce idempotency: If we've already generated a key leave now.
         if not kek_meta_dto.plugin_meta:
-            session = self.pkcs11.create_working_session()
-
             kek_length = 32
             kek_meta_dto.plugin_meta = json.dumps(
-                self.pkcs11.generate_wrapped_kek(
-                    kek_meta_dto.kek_label,
-                    kek_length,
-                    session
+                self.pkcs11.call_with_session(
+                    lambda session: self.pkcs11.generate_wrapped_kek(
+                        kek_meta_dto.kek_label,
+                        kek_length,
+                        session
+                    )
                 )
             )
             # To be persisted by Barbican:
@@ -152,16 +192,13 @@ class P11CryptoPlugin(plugin.CryptoPluginBase):
             kek_meta_dto.bit_length = kek_length * 8
             kek_meta_dto.mode = 'CBC'
 
-            # Clean up
-            self.pkcs11.close_session(session)
-
         return kek_meta_dto
 
     def generate_symmetric(self, generate_dto, kek_meta_dto, project_id):
         byte_length = generate_dto.bit_length / 8
-        session = self.pkcs11.create_working_session()
-        buf = self.pkcs11.generate_random(byte_length, session)
-        self.pkcs11.close_session(session)
+        buf = self.pkcs11.call_with_session(
+            lambda session: self.pkcs11.generate_random(byte_length, session)
+        )
         rand = self.pkcs11.ffi.buffer(buf)[:]
         assert len(rand) == byte_length
         return self.encrypt(plugin.EncryptDTO(rand), kek_meta_dto, project_id)
@@ -12,7 +12,10 @@
 
 import base64
 import collections
+import hashlib
 import textwrap
+import threading
+import time
 
 import cffi
 from cryptography.hazmat.primitives import padding
@@ -28,11 +31,15 @@ CKAttributes = collections.namedtuple("CKAttributes", ["template", "cffivals"])
 CKMechanism = collections.namedtuple("CKMechanism", ["mech", "cffivals"])
 
 CKR_OK = 0
+CKR_USER_ALREADY_LOGGED_IN = 0x100
 CKF_RW_SESSION = (1 << 1)
 CKF_SERIAL_SESSION = (1 << 2)
 CKU_SO = 0
 CKU_USER = 1
 
+CKS_RO_USER_FUNCTIONS = 1
+CKS_RW_USER_FUNCTIONS = 3
+
 CKO_SECRET_KEY = 4
 CKK_AES = 0x1f
 
@@ -212,6 +219,18 @@ ERROR_CODES = {
     1 << 31: 'CKR_VENDOR_DEFINED'
 }
 
+CKR_SESSION_CLOSED = 0xb0
+CKR_SESSION_HANDLE_INVALID = 0xb3
+CKR_USER_NOT_LOGGED_IN = 0x101
+
+# Response codes after which a session has to be replaced (or logged in
+# again) before it can be used for any further operation.
+SESSION_ERROR_CODES = (
+    CKR_SESSION_CLOSED,
+    CKR_SESSION_HANDLE_INVALID,
+    CKR_USER_NOT_LOGGED_IN,
+)
+
 
 def build_ffi():
     ffi = cffi.FFI()
@@ -255,6 +274,13 @@ def build_ffi():
         unsigned long ulAADLen;
         unsigned long ulTagBits;
     } CK_AES_GCM_PARAMS;
+
+    typedef struct CK_SESSION_INFO {
+        CK_SLOT_ID slotID;
+        unsigned long state;
+        CK_FLAGS flags;
+        unsigned long ulDeviceError;
+    } CK_SESSION_INFO;
     """))
     # FUNCTIONS
     ffi.cdef(textwrap.dedent("""
@@ -262,12 +288,14 @@ def build_ffi():
     CK_RV C_OpenSession(CK_SLOT_ID, CK_FLAGS, void *, CK_NOTIFY,
                         CK_SESSION_HANDLE *);
     CK_RV C_CloseSession(CK_SESSION_HANDLE);
+    CK_RV C_GetSessionInfo(CK_SESSION_HANDLE, CK_SESSION_INFO *);
     CK_RV C_Login(CK_SESSION_HANDLE, CK_USER_TYPE, CK_UTF8CHAR_PTR,
                   CK_ULONG);
     CK_RV C_FindObjectsInit(CK_SESSION_HANDLE, CK_ATTRIBUTE *, CK_ULONG);
     CK_RV C_FindObjects(CK_SESSION_HANDLE, CK_OBJECT_HANDLE *, CK_ULONG,
                         CK_ULONG *);
     CK_RV C_FindObjectsFinal(CK_SESSION_HANDLE);
+    CK_RV C_DestroyObject(CK_SESSION_HANDLE, CK_OBJECT_HANDLE);
     CK_RV C_GenerateKey(CK_SESSION_HANDLE, CK_MECHANISM *, CK_ATTRIBUTE *,
                         CK_ULONG, CK_OBJECT_HANDLE *);
     CK_RV C_UnwrapKey(CK_SESSION_HANDLE, CK_MECHANISM *, CK_OBJECT_HANDLE,
@@ -308,9 +336,223 @@ class P11CryptoKeyHandleException(exception.BarbicanException):
     message = u._("No key handle was found")
 
 
+class P11CryptoSessionException(P11CryptoPluginException):
+    message = u._("HSM session is no longer usable")
+
+
+class P11CryptoSessionPoolTimeout(P11CryptoPluginException):
+    message = u._("Timed out waiting for an available HSM session")
+
+
+class SessionPool(object):
+    """Bounded pool of opened and logged in PKCS#11 sessions.
+
+    Sessions are opened lazily up to max_size and handed back to the pool
+    once an operation is done with them, so that the C_OpenSession and
+    C_Login round trips are only paid when the pool grows. Every checkout
+    verifies the session with C_GetSessionInfo, logging it back in or
+    replacing it when the HSM no longer considers it usable.
+    """
+
+    def __init__(self, pkcs11, min_size=1, max_size=10, timeout=30):
+        if max_size < 1:
+            raise ValueError(u._("max_size must be at least 1"))
+        self.pkcs11 = pkcs11
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = collections.Counter()
+
+    def fill(self):
+        """Opens sessions until the pool holds at least min_size of them."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            self.put(self._open())
+
+    def get(self):
+        """Checks out a healthy, logged in session.
+
+        Blocks for up to timeout seconds when max_size sessions are
+        already checked out.
+        """
+        deadline = time.time() + self.timeout
+        with self._cond:
+            self._stats['checkouts'] += 1
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise P11CryptoSessionPoolTimeout()
+                self._stats['waits'] += 1
+                self._cond.wait(remaining)
+
+            if self._idle:
+                session = self._idle.pop()
+            else:
+                session = None
+                self._size += 1
+
+        if session is None:
+            return self._open()
+        return self._check(session)
+
+    def put(self, session):
+        """Returns a checked out session to the pool."""
+        with self._cond:
+            self._idle.append(session)
+            self._cond.notify()
+
+    def discard(self, session):
+        """Closes a checked out session instead of returning it."""
+        self._close(session)
+        with self._cond:
+            self._size -= 1
+            self._stats['discarded'] += 1
+            self._cond.notify()
+
+    def get_stats(self):
+        """Returns a snapshot of the pool counters and current sizes."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+        return stats
+
+    def _open(self):
+        try:
+            session = self.pkcs11.create_working_session()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['opened'] += 1
+        return session
+
+    def _close(self, session):
+        try:
+            self.pkcs11.close_session(session)
+        except P11CryptoPluginException:
+            LOG.debug("Unable to close discarded HSM session %s", session)
+
+    def _check(self, session):
+        try:
+            state = self.pkcs11.get_session_state(session)
+        except P11CryptoSessionException:
+            LOG.warning(u._LW("Replacing invalid HSM session %s"), session)
+            self._close(session)
+            with self._cond:
+                self._stats['replaced'] += 1
+            return self._open()
+
+        if state not in (CKS_RW_USER_FUNCTIONS, CKS_RO_USER_FUNCTIONS):
+            LOG.debug("Logging HSM session %s back in", session)
+            try:
+                self.pkcs11.login(self.pkcs11.login_passphrase, session)
+            except Exception:
+                self.discard(session)
+                raise
+            with self._cond:
+                self._stats['relogins'] += 1
+        return session
+
+
+class KeyHandleCache(object):
+    """LRU cache of unwrapped key handles with a time to live.
+
+    Unwrapped keys are session objects that only live as long as the
+    session they were unwrapped into, so every cached handle is bound to
+    its pooled session and only handed back out to that same session.
+    Handles dropped from the cache are queued and destroyed in the HSM the
+    next time their session is checked out. A max_size of 0 disables
+    caching: every handle is queued for destruction right away.
+    """
+
+    def __init__(self, max_size=100, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._expired = collections.defaultdict(list)
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+
+    def get(self, session, key):
+        """Returns the cached handle for key in session, or None."""
+        cache_key = (session,) + key
+        with self._lock:
+            entry = self._entries.pop(cache_key, None)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+
+            handle, expires_at = entry
+            if expires_at <= time.time():
+                self._expired[session].append(handle)
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+
+            # Re-insert to mark the entry as most recently used
+            self._entries[cache_key] = entry
+            self._stats['hits'] += 1
+            return handle
+
+    def put(self, session, key, handle):
+        cache_key = (session,) + key
+        with self._lock:
+            previous = self._entries.pop(cache_key, None)
+            if previous is not None:
+                self._expired[session].append(previous[0])
+            self._entries[cache_key] = (handle, time.time() + self.ttl)
+
+            while len(self._entries) > self.max_size:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._expired[evicted_key[0]].append(evicted[0])
+                self._stats['evictions'] += 1
+
+    def pop_expired(self, session):
+        """Returns the handles in session that are due for destruction."""
+        with self._lock:
+            return self._expired.pop(session, [])
+
+    def remove_session(self, session):
+        """Forgets every handle bound to a session that is being closed."""
+        with self._lock:
+            for cache_key in list(self._entries):
+                if cache_key[0] == session:
+                    del self._entries[cache_key]
+            self._expired.pop(session, None)
+
+    def invalidate(self, mkek_label):
+        """Drops every handle that was unwrapped with the given MKEK."""
+        with self._lock:
+            for cache_key in list(self._entries):
+                if cache_key[-1] == mkek_label:
+                    handle, _ = self._entries.pop(cache_key)
+                    self._expired[cache_key[0]].append(handle)
+                    self._stats['invalidations'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        return stats
+
+
 class PKCS11(object):
 
-    def __init__(self, library_path, login_passphrase, slot_id, ffi=None):
+    def __init__(self, library_path, login_passphrase, slot_id, ffi=None,
+                 session_pool_min_size=1, session_pool_max_size=10,
+                 session_pool_timeout=30, key_cache_size=100,
+                 key_cache_ttl=300):
         self.ffi = build_ffi() if not ffi else ffi
         self.lib = self.ffi.dlopen(library_path)
 
@@ -324,24 +566,59 @@ class PKCS11(object):
 
         self.check_error(self.lib.C_Initialize(self.ffi.NULL))
 
-        # Open session to perform self-test and get/generate mkek and hmac
-        session = self.create_working_session()
-        self.perform_rng_self_test(session)
+        self.key_cache = KeyHandleCache(max_size=key_cache_size,
+                                        ttl=key_cache_ttl)
+        self.session_pool = SessionPool(self,
+                                        min_size=session_pool_min_size,
+                                        max_size=session_pool_max_size,
+                                        timeout=session_pool_timeout)
+        self.session_pool.fill()
 
-        # Clean up the active session
-        self.close_session(session)
+        # Borrow a session to perform the RNG self-test
+        self.call_with_session(self.perform_rng_self_test)
 
     def cache_mkek_and_hmac(self, mkek_label, hmac_label):
-        session = self.create_working_session()
         self.current_mkek_label = mkek_label
         self.current_hmac_label = hmac_label
         LOG.debug("Current mkek label: %s", self.current_mkek_label)
         LOG.debug("Current hmac label: %s", self.current_hmac_label)
 
         # cache current MKEK handle in the dictionary
+        self.call_with_session(self._cache_mkek_and_hmac)
+
+    def _cache_mkek_and_hmac(self, session):
         self.get_mkek(self.current_mkek_label, session)
         self.get_hmac_key(self.current_hmac_label, session)
-        self.close_session(session)
+
+    def call_with_session(self, func, *args, **kwargs):
+        """Calls func with a pooled session as its first argument.
+
+        The session goes back to the pool once func returns. A session
+        the HSM reports as closed, invalid or logged out is replaced and
+        the call is retried once; any other HSM failure discards the
+        session, as it may still have an operation in progress.
+        """
+        for attempt in range(2):
+            session = self.session_pool.get()
+            try:
+                for handle in self.key_cache.pop_expired(session):
+                    self.destroy_object(handle, session)
+                result = func(session, *args, **kwargs)
+            except P11CryptoSessionException:
+                self.session_pool.discard(session)
+                if attempt:
+                    raise
+                LOG.warning(u._LW("HSM session %s became unusable, "
+                                  "retrying with a new session"), session)
+                continue
+            except P11CryptoPluginException:
+                self.session_pool.discard(session)
+                raise
+            except Exception:
+                self.session_pool.put(session)
+                raise
+            self.session_pool.put(session)
+            return result
 
     def perform_rng_self_test(self, session):
         test_random = self.generate_random(100, session)
@@ -363,6 +640,9 @@ class PKCS11(object):
         return session
 
     def close_session(self, session):
+        # Session objects, and with them any cached key handles, are
+        # destroyed by the HSM along with the session.
+        self.key_cache.remove_session(session)
         rv = self.lib.C_CloseSession(session)
         self.check_error(rv)
 
@@ -373,17 +653,43 @@ class PKCS11(object):
             password,
             len(password)
         )
-        self.check_error(rv)
+        # The login state is shared by all the sessions of the application,
+        # so it's already logged in while any other session is open.
+        if rv != CKR_USER_ALREADY_LOGGED_IN:
+            self.check_error(rv)
 
     def create_working_session(self):
-        """Automatically opens a session and performs a login."""
+        """Automatically opens a session and performs a login.
+
+        The session is only logged in if the application isn't logged in
+        already, and is closed again if it can't be logged in.
+        """
         session = self.open_session(self.slot_id)
-        self.login(self.login_passphrase, session)
+        try:
+            state = self.get_session_state(session)
+            if state not in (CKS_RW_USER_FUNCTIONS, CKS_RO_USER_FUNCTIONS):
+                self.login(self.login_passphrase, session)
+        except Exception:
+            try:
+                self.close_session(session)
+            except P11CryptoPluginException:
+                LOG.debug("Unable to close HSM session %s", session)
+            raise
         return session
 
+    def get_session_state(self, session):
+        session_info = self.ffi.new("CK_SESSION_INFO *")
+        rv = self.lib.C_GetSessionInfo(session, session_info)
+        self.check_error(rv)
+        return session_info.state
+
     def check_error(self, value):
         if value != CKR_OK:
-            raise P11CryptoPluginException(u._(
+            if value in SESSION_ERROR_CODES:
+                exception_class = P11CryptoSessionException
+            else:
+                exception_class = P11CryptoPluginException
+            raise exception_class(u._(
                 "HSM returned response code: {hex_value} {code}").format(
                     hex_value=hex(value),
                     code=ERROR_CODES.get(value, 'CKR_????')
@@ -510,6 +816,10 @@ class PKCS11(object):
         else:
             raise P11CryptoPluginKeyException()
 
+    def destroy_object(self, object_handle, session):
+        rv = self.lib.C_DestroyObject(session, object_handle)
+        self.check_error(rv)
+
     def generate_random(self, length, session):
         buf = self.ffi.new("CK_BYTE[{0}]".format(length))
         rv = self.lib.C_GenerateRandom(session, buf, length)
@@ -547,31 +857,38 @@ class PKCS11(object):
                    key_length, session):
         unwrapped_kek = self.unwrap_key(iv, hmac, wrapped_key, mkek_label,
                                         hmac_label, session)
-        mkek = self.key_handles[self.current_mkek_label]
-
-        iv = self.generate_random(16, session)
-        mech = self.ffi.new("CK_MECHANISM *")
-        mech.mechanism = CKM_AES_CBC_PAD
-        mech.parameter = iv
-        mech.parameter_len = 16
-
-        padded_length = key_length + self.block_size
-
-        buf = self.ffi.new("CK_BYTE[{0}]".format(padded_length))
-        buf_len = self.ffi.new("CK_ULONG *", padded_length)
-
-        rv = self.lib.C_WrapKey(
-            session,
-            mech,
-            mkek,
-            unwrapped_kek,
-            buf,
-            buf_len
-        )
-        self.check_error(rv)
+        # The unwrapped KEK is a session object, and pooled sessions stay
+        # open, so it is destroyed once wrapped again.
+        try:
+            if mkek_label != self.current_mkek_label:
+                self.key_cache.invalidate(mkek_label)
+            mkek = self.key_handles[self.current_mkek_label]
+
+            iv = self.generate_random(16, session)
+            mech = self.ffi.new("CK_MECHANISM *")
+            mech.mechanism = CKM_AES_CBC_PAD
+            mech.parameter = iv
+            mech.parameter_len = 16
+
+            padded_length = key_length + self.block_size
+
+            buf = self.ffi.new("CK_BYTE[{0}]".format(padded_length))
+            buf_len = self.ffi.new("CK_ULONG *", padded_length)
+
+            rv = self.lib.C_WrapKey(
+                session,
+                mech,
+                mkek,
+                unwrapped_kek,
+                buf,
+                buf_len
+            )
+            self.check_error(rv)
 
-        wrapped_kek = self.ffi.buffer(buf, buf_len[0])[:]
-        hmac = self.compute_hmac(wrapped_kek, session)
+            wrapped_kek = self.ffi.buffer(buf, buf_len[0])[:]
+            hmac = self.compute_hmac(wrapped_kek, session)
+        finally:
+            self.destroy_object(unwrapped_kek, session)
 
         return {
             'iv': base64.b64encode(self.ffi.buffer(iv)[:]),
@@ -598,23 +915,28 @@ class PKCS11(object):
             Attribute(CKA_EXTRACTABLE, True)
         ])
         kek = self.generate_kek(ck_attributes.template, session)
-        mech = self.ffi.new("CK_MECHANISM *")
-        mech.mechanism = CKM_AES_CBC_PAD
-        iv = self.generate_random(16, session)
-        mech.parameter = iv
-        mech.parameter_len = 16
-        mkek = self.key_handles[self.current_mkek_label]
-        # Since we're using CKM_AES_CBC_PAD the maximum length of the
-        # padded key will be the key length + one block. We allocate the
-        # worst case scenario as a CK_BYTE array.
-        padded_length = key_length + self.block_size
-
-        buf = self.ffi.new("CK_BYTE[{0}]".format(padded_length))
-        buf_len = self.ffi.new("CK_ULONG *", padded_length)
-        rv = self.lib.C_WrapKey(session, mech, mkek, kek, buf, buf_len)
-        self.check_error(rv)
-        wrapped_key = self.ffi.buffer(buf, buf_len[0])[:]
-        hmac = self.compute_hmac(wrapped_key, session)
+        # The KEK is a session object, and pooled sessions stay open, so it
+        # is destroyed once wrapped.
+        try:
+            mech = self.ffi.new("CK_MECHANISM *")
+            mech.mechanism = CKM_AES_CBC_PAD
+            iv = self.generate_random(16, session)
+            mech.parameter = iv
+            mech.parameter_len = 16
+            mkek = self.key_handles[self.current_mkek_label]
+            # Since we're using CKM_AES_CBC_PAD the maximum length of the
+            # padded key will be the key length + one block. We allocate the
+            # worst case scenario as a CK_BYTE array.
+            padded_length = key_length + self.block_size
+
+            buf = self.ffi.new("CK_BYTE[{0}]".format(padded_length))
+            buf_len = self.ffi.new("CK_ULONG *", padded_length)
+            rv = self.lib.C_WrapKey(session, mech, mkek, kek, buf, buf_len)
+            self.check_error(rv)
+            wrapped_key = self.ffi.buffer(buf, buf_len[0])[:]
+            hmac = self.compute_hmac(wrapped_key, session)
+        finally:
+            self.destroy_object(kek, session)
         return {
             'iv': base64.b64encode(self.ffi.buffer(iv)[:]),
             'wrapped_key': base64.b64encode(wrapped_key),
@@ -650,6 +972,32 @@ class PKCS11(object):
         )
         self.check_error(rv)
 
+    def get_unwrapped_kek(self, kek_label, plugin_meta, session):
+        """Returns a handle to a project KEK unwrapped into session.
+
+        The HMAC check and C_UnwrapKey are skipped when the same wrapped
+        key was already unwrapped into this session and is still cached.
+
+        :param kek_label: label of the project KEK
+        :param plugin_meta: dict of the KEK's stored plugin metadata
+        :param session: active HSM session
+        """
+        key = (
+            kek_label,
+            hashlib.sha256(plugin_meta['wrapped_key'].encode('utf-8'))
+            .hexdigest(),
+            plugin_meta['mkek_label'],
+        )
+        handle = self.key_cache.get(session, key)
+        if handle is None:
+            handle = self.unwrap_key(
+                plugin_meta['iv'], plugin_meta['hmac'],
+                plugin_meta['wrapped_key'], plugin_meta['mkek_label'],
+                plugin_meta['hmac_label'], session
+            )
+            self.key_cache.put(session, key, handle)
+        return handle
+
     def unwrap_key(self, iv, hmac, wrapped_key, mkek_label, hmac_label,
                    session):
         """Unwraps byte string to key handle in HSM.
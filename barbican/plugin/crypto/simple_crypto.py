@@ -79,6 +79,11 @@ class SimpleCryptoPlugin(c.CryptoPluginBase):
         decryptor = fernet.Fernet(kek)
         return decryptor.decrypt(encrypted)
 
+    def decrypt_batch(self, decrypt_requests, kek_meta_dto, project_id):
+        decryptor = fernet.Fernet(self._get_kek(kek_meta_dto))
+        return [decryptor.decrypt(decrypt_dto.encrypted)
+                for decrypt_dto, kek_meta_extended in decrypt_requests]
+
     def bind_kek_metadata(self, kek_meta_dto):
         kek_meta_dto.algorithm = 'aes'
         kek_meta_dto.bit_length = 128
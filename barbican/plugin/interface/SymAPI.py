@@ -16,10 +16,12 @@ import sys
 if sys.version_info[:2] > (2,7):
     print "This library only works with Python 2.7."
     exit()
+from suds.cache import ObjectCache
 from suds.client import Client
 from suds.transport.http import HttpTransport
 import urllib2, urllib, httplib, socket
 import ssl
+import threading
 #httplib.HTTPConnection.debuglevel = 5
 
 # Error Codes:
@@ -34,6 +36,14 @@ import ssl
 # @copyright Symantec Corp. 2014, 2015
 #
 # CHANGELOG:
+# v1.4:
+# - SOAP clients are built (and their WSDL parsed) once per API and reused.
+#   Every call works on a clone of the cached client, so a single SymAPI
+#   object can be shared by concurrent (green)threads.
+# - Added setWSDLCache to keep parsed WSDLs on disk. Together with
+#   setOrderAPIURL/setQueryAPIURL pointing to local ('file://') copies of
+#   the WSDLs, no WSDL needs to be downloaded at all.
+# - Fixed setQueryAPIURL changing the URL of the order API.
 # v1.3:
 # - Added new API functions released in April 2015:
 #   QUERY:
@@ -59,7 +69,7 @@ import ssl
 # Initial version 
  ################################################
 
-class SymAPI:
+class SymAPI(object):
     # URL to WSDL-file for test environment order-API
     url_orderAPI_demo = 'https://test-api.geotrust.com/webtrust/order.jws?WSDL' 
     # URL to WSDL-file for productive environment order-API
@@ -71,7 +81,7 @@ class SymAPI:
     url_queryAPI = 'https://api.ws.symantec.com/webtrust/query.jws?WSDL'
     
     def __version(self):
-        return '1.3'
+        return '1.4'
 
     def __str__(self):
         return "Symantec SSL API v%s" % self.__version() + "\nPython library by Tobias Zatti\nSupport: tobias_zatti@symantec.com"
@@ -98,8 +108,13 @@ class SymAPI:
         self.username = username
         # Your API password
         self.userpassword = password
-        # The SOAP client 
-        self.client = None
+        # The SOAP client of the current (green)thread, see client below
+        self.__local = threading.local()
+        # Cached SOAP clients by WSDL URL, see __getCachedClient
+        self.__clients = {}
+        self.__clientsLock = threading.Lock()
+        # On-disk cache for parsed WSDLs (None uses the suds default)
+        self.wsdlCache = None
         # Proxy
         self.proxy = proxy
         # ApiVersion
@@ -136,8 +151,27 @@ class SymAPI:
 
     def setProxy(self, proxy_server, proxy_port):
         self.proxy = '%s:%s' % (proxy_server, proxy_port)
+        self.clearClients()
         self.log("Set proxy \"%s\"" % self.proxy)
 
+    def setWSDLCache(self, location, days = 1):
+        """Keeps parsed WSDL files in the given directory, so they are
+        neither downloaded nor parsed again by other processes or after
+        a restart.
+        @param string: Cache directory
+        @param int: Days after which a cached WSDL is fetched again
+        """
+        self.wsdlCache = ObjectCache(location = location, days = days)
+        self.clearClients()
+        self.log("Caching WSDL files in \"%s\"" % location)
+
+    def clearClients(self):
+        """Drops the cached SOAP clients, so the next call builds them
+        again from the WSDL.
+        """
+        with self.__clientsLock:
+            self.__clients = {}
+
     def __credentialsSet(self):
         """Checks if credentials have been entered
         """
@@ -202,18 +236,47 @@ class SymAPI:
         else:
             exit(1000)
 
+    def __getClient(self):
+        return getattr(self.__local, 'client', None)
+
+    def __setCurrentClient(self, client):
+        self.__local.client = client
+
+    # The client used by the calls of the current (green)thread
+    client = property(__getClient, __setCurrentClient)
+
     def __setClient(self, type):
+        """Selects a client for the given API type. It is a clone of the
+        cached client: clones share the parsed WSDL, but not their options
+        or the last sent and received messages.
+        """
+        self.client = self.__getCachedClient(self.__getAPIURL(type)).clone()
+
+    def __getCachedClient(self, url):
+        client = self.__clients.get(url)
+        if client == None:
+            with self.__clientsLock:
+                client = self.__clients.get(url)
+                if client == None:
+                    client = self.__createClient(url)
+                    self.__clients[url] = client
+        return client
+
+    def __createClient(self, url):
+        kwargs = {}
+        if self.wsdlCache != None:
+            kwargs['cache'] = self.wsdlCache
         if self.proxy == None:
             self.log("Connecting directly..")
-            self.client = Client(self.__getAPIURL(type))
+            return Client(url, **kwargs)
         else:
             self.log("Connecting using proxy \"%s\"" % self.proxy)
             opener = urllib2.build_opener(ConnectHTTPHandler(proxy=self.proxy), ConnectHTTPSHandler(proxy=self.proxy))
             urllib2.install_opener(opener)
             t = HttpTransport()
             t.urlopener = opener
-            print t
-            self.client = Client(self.__getAPIURL(type), transport=t)    
+            self.log(t)
+            return Client(url, transport=t, **kwargs)
 
 
     def setOrderAPIURL(self, url):
@@ -222,21 +285,21 @@ class SymAPI:
         """
         if self.useTestAPI:
             self.url_orderAPI_demo = url
-            self.log("Changed DEMO URL for order API to:", url)
+            self.log("Changed DEMO URL for order API to: %s" % url)
         else:
             self.url_orderAPI = url
-            self.log("Changed PRODUCTION URL for order API to:", url)
+            self.log("Changed PRODUCTION URL for order API to: %s" % url)
 
     def setQueryAPIURL(self, url):
         """
         Changes the URL for the query API for the currently set mode.
         """
         if self.useTestAPI:
-            self.url_orderAPI_demo = url
-            self.log("Changed DEMO URL for query API to:", url)
+            self.url_queryAPI_demo = url
+            self.log("Changed DEMO URL for query API to: %s" % url)
         else:
-            self.url_orderAPI = url
-            self.log("Changed PRODUCTION URL for query API to:", url)
+            self.url_queryAPI = url
+            self.log("Changed PRODUCTION URL for query API to: %s" % url)
 
     def log (self, string, force = False, type = "msg"):
         """Prints the given string with time stamp for debugging reasons.
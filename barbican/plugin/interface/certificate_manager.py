@@ -24,6 +24,7 @@ import abc
 import datetime
 
 from oslo_config import cfg
+from oslo_utils import timeutils
 import six
 from stevedore import named
 
@@ -38,6 +39,8 @@ from barbican.plugin.util import utils as plugin_utils
 LOG = utils.getLogger(__name__)
 CONF = config.new_config()
 
+_CERTIFICATE_PLUGIN_MANAGER = None
+
 # Configuration for certificate processing plugins:
 DEFAULT_PLUGIN_NAMESPACE = 'barbican.certificate.plugin'
 DEFAULT_PLUGINS = ['simple_certificate']
@@ -52,7 +55,13 @@ cert_opts = [
     cfg.MultiStrOpt('enabled_certificate_plugins',
                     default=DEFAULT_PLUGINS,
                     help=u._('List of certificate plugins to load.')
-                    )
+                    ),
+    cfg.FloatOpt('ca_refresh_interval_max_seconds',
+                 default=3600.0,
+                 help=u._('Maximum seconds (float) a plugin\'s CA entries '
+                          'are trusted to be current before the CA table '
+                          'is checked for that plugin again')
+                 ),
 ]
 CONF.register_group(cert_opt_group)
 CONF.register_opts(cert_opts, group=cert_opt_group)
@@ -82,6 +91,7 @@ CONF.register_opts(cert_event_opts, group=cert_event_opt_group)
 ERROR_RETRY_MSEC = 300000
 RETRY_MSEC = 3600000
 CA_INFO_DEFAULT_EXPIRATION_DAYS = 1
+CA_REFRESH_RETRY_SECONDS = 60
 
 CA_PLUGIN_TYPE_DOGTAG = "dogtag"
 CA_PLUGIN_TYPE_SYMANTEC = "symantec"
@@ -370,6 +380,24 @@ class CertificatePluginBase(object):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def get_changed_orders(self, modified_since):
+        """Returns the orders whose status changed with the CA since a time.
+
+        Plugins able to list the changed orders with a single request to
+        their CA allow the retry scheduler to poll the CA once per interval,
+        and to only check the status of the orders that changed, rather than
+        calling check_certificate_status() for every pending order.
+
+        :param modified_since: UTC datetime to list changes from
+        :returns: set of the order IDs passed to issue_certificate_request()
+                  whose status changed, or None if the plugin cannot list
+                  changed orders (or the CA failed to list them), in which
+                  case the status of every pending order is checked
+        :raises: any error reaching the CA, which the retry scheduler logs
+                 before checking the status of every pending order
+        """
+        return None
+
     @abc.abstractmethod
     def supports(self, certificate_spec):
         """Returns if the plugin supports the certificate type.
@@ -563,8 +591,14 @@ class BarbicanMetaDTO(object):
 
 
 class CertificatePluginManager(named.NamedExtensionManager):
+    """Provides services for certificate plugins.
+
+    Each time this class is initialized it will load a new instance of each
+    enabled plugin, and re-run entry point discovery. This is undesirable,
+    so rather than initializing a new instance of this class use the
+    get_manager() function at the module level.
+    """
     def __init__(self, conf=CONF, invoke_args=(), invoke_kwargs={}):
-        self.ca_repo = repos.get_ca_repository()
         super(CertificatePluginManager, self).__init__(
             conf.certificate.namespace,
             conf.certificate.enabled_certificate_plugins,
@@ -576,6 +610,24 @@ class CertificatePluginManager(named.NamedExtensionManager):
         plugin_utils.instantiate_plugins(
             self, invoke_args, invoke_kwargs)
 
+        self._plugins_by_name = {}
+        self._plugins_by_name_source = None
+        self._plugin_names_by_ca_id = {}
+
+        # Maps plugin names to the time until which their CA table entries
+        # are known to be unexpired.
+        self._ca_table_fresh_until = {}
+        self.refresh_interval_max = datetime.timedelta(
+            seconds=conf.certificate.ca_refresh_interval_max_seconds)
+
+        # Set when a background task keeps the CA table fresh, so that
+        # certificate order processing doesn't have to.
+        self.refreshed_in_background = False
+
+    @property
+    def ca_repo(self):
+        return repos.get_ca_repository()
+
     def get_plugin(self, certificate_spec):
         """Gets a supporting certificate plugin.
 
@@ -603,10 +655,10 @@ class CertificatePluginManager(named.NamedExtensionManager):
         :param plugin_name: Name of the plugin to invoke
         :returns: CertificatePluginBase plugin implementation
         """
-        for plugin in plugin_utils.get_active_plugins(self):
-            if utils.generate_fullname_for(plugin) == plugin_name:
-                return plugin
-        raise CertificatePluginNotFound(plugin_name)
+        plugin = self._get_plugins_by_name().get(plugin_name)
+        if plugin is None:
+            raise CertificatePluginNotFound(plugin_name)
+        return plugin
 
     def get_plugin_by_ca_id(self, ca_id):
         """Gets a plugin based on the ca_id.
@@ -614,17 +666,48 @@ class CertificatePluginManager(named.NamedExtensionManager):
         :param ca_id: id for CA in the CertificateAuthorities table
         :returns: CertificatePluginBase plugin implementation
         """
-        ca = self.ca_repo.get(ca_id, suppress_exception=True)
-        if not ca:
-            raise CertificatePluginNotFoundForCAID(ca_id)
+        plugin_name = self._plugin_names_by_ca_id.get(ca_id)
+        if plugin_name is None:
+            ca = self.ca_repo.get(ca_id, suppress_exception=True)
+            if not ca:
+                raise CertificatePluginNotFoundForCAID(ca_id)
+            plugin_name = ca.plugin_name
+            self._plugin_names_by_ca_id[ca_id] = plugin_name
+
+        return self.get_plugin_by_name(plugin_name)
 
-        return self.get_plugin_by_name(ca.plugin_name)
+    def forget_ca(self, ca_id):
+        """Drops a deleted CA from the CA to plugin lookup map."""
+        self._plugin_names_by_ca_id.pop(ca_id, None)
+
+    def _get_plugins_by_name(self):
+        """Returns a dict of the active plugins keyed by their full name.
+
+        The dict is built once and only rebuilt if the extensions list
+        gets replaced.
+        """
+        if self._plugins_by_name_source is not self.extensions:
+            self._plugins_by_name = dict(
+                (utils.generate_fullname_for(plugin), plugin)
+                for plugin in plugin_utils.get_active_plugins(self)
+            )
+            self._plugins_by_name_source = self.extensions
+        return self._plugins_by_name
 
     def refresh_ca_table(self):
-        """Refreshes the CertificateAuthority table."""
+        """Refreshes the CertificateAuthority table.
+
+        The table is only checked for plugins whose CA entries may have
+        expired since this process last checked or refreshed them.
+
+        :returns: Seconds until the table next needs to be checked
+        """
         updates_made = False
         for plugin in plugin_utils.get_active_plugins(self):
             plugin_name = utils.generate_fullname_for(plugin)
+            if not self._is_ca_table_stale(plugin_name):
+                continue
+
             cas, offset, limit, total = self.ca_repo.get_by_create_date(
                 plugin_name=plugin_name,
                 suppress_exception=True)
@@ -634,10 +717,15 @@ class CertificatePluginManager(named.NamedExtensionManager):
                 # Most of the time, this will be a no-op for plugins.
                 self.update_ca_info(plugin)
                 updates_made = True
+            else:
+                self._mark_ca_table_fresh(
+                    plugin_name, [ca.expiration for ca in cas])
         if updates_made:
             # commit to DB to avoid async issues with different threads
             repos.commit()
 
+        return self._seconds_until_ca_refresh()
+
     def update_ca_info(self, cert_plugin):
         """Update the CA info for a particular plugin."""
 
@@ -680,6 +768,48 @@ class CertificatePluginManager(named.NamedExtensionManager):
                 # The plugin gave an invalid CA, log and continue
                 LOG.error(u._LE("ERROR adding CA from plugin: %s"), e.message)
 
+        if new_ca_infos:
+            self._mark_ca_table_fresh(
+                plugin_name,
+                [self._parse_expiration(ca_info.get(INFO_EXPIRATION))
+                 for ca_info in new_ca_infos.values()])
+
+    def _is_ca_table_stale(self, plugin_name):
+        fresh_until = self._ca_table_fresh_until.get(plugin_name)
+        return not fresh_until or fresh_until <= datetime.datetime.utcnow()
+
+    def _mark_ca_table_fresh(self, plugin_name, expirations):
+        """Records when the earliest of a plugin's CA entries expires."""
+        now = datetime.datetime.utcnow()
+        fresh_until = now + self.refresh_interval_max
+        for expiration in expirations:
+            if expiration and expiration < fresh_until:
+                fresh_until = expiration
+        if fresh_until <= now:
+            # The plugin handed out expired CAs, don't ask it again right away
+            fresh_until = now + datetime.timedelta(
+                seconds=CA_REFRESH_RETRY_SECONDS)
+        self._ca_table_fresh_until[plugin_name] = fresh_until
+
+    def _seconds_until_ca_refresh(self):
+        now = datetime.datetime.utcnow()
+        next_refresh = now + self.refresh_interval_max
+        for plugin in plugin_utils.get_active_plugins(self):
+            fresh_until = self._ca_table_fresh_until.get(
+                utils.generate_fullname_for(plugin))
+            if not fresh_until:
+                # Plugin didn't provide any CAs, so ask it again later on.
+                fresh_until = now + datetime.timedelta(
+                    seconds=CA_REFRESH_RETRY_SECONDS)
+            next_refresh = min(next_refresh, fresh_until)
+        return max(timeutils.delta_seconds(now, next_refresh), 0)
+
+    def _parse_expiration(self, expiration):
+        if isinstance(expiration, six.string_types):
+            expiration = timeutils.normalize_time(
+                timeutils.parse_isotime(expiration.strip()))
+        return expiration
+
     def _add_ca(self, plugin_name, plugin_ca_id, ca_info):
         parsed_ca = dict(ca_info)
         parsed_ca['plugin_name'] = plugin_name
@@ -689,6 +819,7 @@ class CertificatePluginManager(named.NamedExtensionManager):
 
     def _delete_ca(self, ca):
         self.ca_repo.delete_entity_by_id(ca.id, None)
+        self.forget_ca(ca.id)
 
 
 class _CertificateEventPluginManager(named.NamedExtensionManager,
@@ -751,3 +882,11 @@ class _CertificateEventPluginManager(named.NamedExtensionManager,
 
 
 EVENT_PLUGIN_MANAGER = _CertificateEventPluginManager()
+
+
+def get_manager():
+    """Returns the process wide certificate plugin manager."""
+    global _CERTIFICATE_PLUGIN_MANAGER
+    if not _CERTIFICATE_PLUGIN_MANAGER:
+        _CERTIFICATE_PLUGIN_MANAGER = CertificatePluginManager()
+    return _CERTIFICATE_PLUGIN_MANAGER
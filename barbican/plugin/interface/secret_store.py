@@ -409,6 +409,18 @@ class SecretStoreBase(object):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def get_secrets(self, secrets):
+        """Retrieves several secrets from the secret store.
+
+        Plugins able to fetch secrets in bulk may override this method. By
+        default each secret is retrieved with :meth:`get_secret`.
+
+        :param secrets: list of (secret_type, secret_metadata) tuples
+        :returns: list of SecretDTOs, in the order of secrets
+        """
+        return [self.get_secret(secret_type, secret_metadata)
+                for secret_type, secret_metadata in secrets]
+
     @abc.abstractmethod
     def generate_supports(self, key_spec):
         """Returns a boolean indicating if the secret type is supported.
@@ -484,6 +496,10 @@ def _enforce_extensions_configured(plugin_related_function):
 
 
 class SecretStorePluginManager(named.NamedExtensionManager):
+
+    # Bounds the number of key specs whose supporting plugin is remembered.
+    MAX_CAPABILITY_ENTRIES = 1000
+
     def __init__(self, conf=CONF, invoke_args=(), invoke_kwargs={}):
         super(SecretStorePluginManager, self).__init__(
             conf.secretstore.namespace,
@@ -496,6 +512,9 @@ class SecretStorePluginManager(named.NamedExtensionManager):
         plugin_utils.instantiate_plugins(
             self, invoke_args, invoke_kwargs)
 
+        self._plugin_tables_source = None
+        self._refresh_plugin_tables()
+
     @_enforce_extensions_configured
     def get_plugin_store(self, key_spec, plugin_name=None,
                          transport_key_needed=False):
@@ -507,21 +526,23 @@ class SecretStorePluginManager(named.NamedExtensionManager):
         key is required.
         :returns: SecretStoreBase plugin implementation
         """
-        active_plugins = plugin_utils.get_active_plugins(self)
+        self._refresh_plugin_tables()
 
         if plugin_name is not None:
-            for plugin in active_plugins:
-                if utils.generate_fullname_for(plugin) == plugin_name:
-                    return plugin
-            raise SecretStorePluginNotFound(plugin_name)
+            plugin = self._plugins_by_name.get(plugin_name)
+            if plugin is None:
+                raise SecretStorePluginNotFound(plugin_name)
+            return plugin
 
         if not transport_key_needed:
-            for plugin in active_plugins:
-                if plugin.store_secret_supports(key_spec):
-                    return plugin
+            plugin = self._get_supporting_plugin(
+                self._store_plugins, key_spec,
+                lambda plugin: plugin.store_secret_supports(key_spec))
+            if plugin is not None:
+                return plugin
 
         else:
-            for plugin in active_plugins:
+            for plugin in plugin_utils.get_active_plugins(self):
                 if (plugin.get_transport_key() is not None and
                         plugin.store_secret_supports(key_spec)):
                     return plugin
@@ -543,11 +564,12 @@ class SecretStorePluginManager(named.NamedExtensionManager):
                  found it's because the plugin parameters were not properly
                  configured on the database side.
         """
+        self._refresh_plugin_tables()
 
-        for plugin in plugin_utils.get_active_plugins(self):
-            if utils.generate_fullname_for(plugin) == plugin_name:
-                return plugin
-        raise StorePluginNotAvailableOrMisconfigured(plugin_name)
+        plugin = self._plugins_by_name.get(plugin_name)
+        if plugin is None:
+            raise StorePluginNotAvailableOrMisconfigured(plugin_name)
+        return plugin
 
     @_enforce_extensions_configured
     def get_plugin_generate(self, key_spec):
@@ -557,11 +579,52 @@ class SecretStorePluginManager(named.NamedExtensionManager):
         generate
         :returns: SecretStoreBase plugin implementation
         """
+        self._refresh_plugin_tables()
+
+        plugin = self._get_supporting_plugin(
+            self._generate_plugins, key_spec,
+            lambda plugin: plugin.generate_supports(key_spec))
+        if plugin is None:
+            raise SecretStoreSupportedPluginNotFound()
+        return plugin
+
+    def _refresh_plugin_tables(self):
+        """Builds the lookup tables of the active plugins.
+
+        The plugins are keyed by their full name, and the capability tables
+        remember the plugin found for each key spec. The tables are only
+        rebuilt if the extensions list gets replaced.
+        """
+        if self._plugin_tables_source is not self.extensions:
+            self._plugins_by_name = dict(
+                (utils.generate_fullname_for(plugin), plugin)
+                for plugin in plugin_utils.get_active_plugins(self)
+            )
+            self._store_plugins = {}
+            self._generate_plugins = {}
+            self._plugin_tables_source = self.extensions
+
+    def _get_supporting_plugin(self, capability_table, key_spec, supports):
+        """Returns the first active plugin that supports a key spec.
+
+        The result, None if no plugin supports the key spec, is remembered in
+        capability_table for the key spec's attributes.
+        """
+        key = (key_spec.alg, key_spec.bit_length, key_spec.mode,
+               key_spec.passphrase is not None) if key_spec else None
+        if key in capability_table:
+            return capability_table[key]
 
         for plugin in plugin_utils.get_active_plugins(self):
-            if plugin.generate_supports(key_spec):
-                return plugin
-        raise SecretStoreSupportedPluginNotFound()
+            if supports(plugin):
+                break
+        else:
+            plugin = None
+
+        if len(capability_table) >= self.MAX_CAPABILITY_ENTRIES:
+            capability_table.clear()
+        capability_table[key] = plugin
+        return plugin
 
 
 def get_manager():
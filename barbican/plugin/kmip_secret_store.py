@@ -19,7 +19,10 @@ An implementation of the SecretStore that uses the KMIP backend.
 
 import base64
 import os
+import socket
 import stat
+import threading
+import time
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
@@ -27,6 +30,7 @@ from cryptography.hazmat.primitives import serialization
 from kmip.core import enums
 from kmip.core.factories import credentials
 from kmip.pie import client
+from kmip.pie import exceptions as kmip_exceptions
 from kmip.pie import objects
 
 from oslo_config import cfg
@@ -79,7 +83,24 @@ kmip_opts = [
     cfg.BoolOpt('pkcs1_only',
                 default=False,
                 help=u._('Only support PKCS#1 encoding of asymmetric keys'),
-                )
+                ),
+    cfg.IntOpt('pool_max_size',
+               default=10,
+               help=u._('Maximum number of KMIP server connections the '
+                        'connection pool may hold open at once'),
+               ),
+    cfg.IntOpt('pool_timeout',
+               default=30,
+               help=u._('Seconds to wait for a KMIP server connection to '
+                        'become available when the connection pool is '
+                        'exhausted'),
+               ),
+    cfg.IntOpt('pool_max_idle_seconds',
+               default=60,
+               help=u._('Seconds a pooled KMIP server connection may stay '
+                        'unused before it is closed, 0 keeps idle '
+                        'connections open indefinitely'),
+               ),
 ]
 CONF.register_group(kmip_opt_group)
 CONF.register_opts(kmip_opts, group=kmip_opt_group)
@@ -130,6 +151,148 @@ class KMIPSecretStoreError(Exception):
         super(KMIPSecretStoreError, self).__init__(what)
 
 
+class KMIPClientPoolTimeout(KMIPSecretStoreError):
+    def __init__(self):
+        super(KMIPClientPoolTimeout, self).__init__(
+            u._("Timed out waiting for an available KMIP server connection"))
+
+
+class KMIPClientPool(object):
+    """Bounded pool of open KMIP client connections.
+
+    Connections are opened lazily up to max_size and handed back to the pool
+    once an operation is done with them, so that the TLS handshake with the
+    KMIP server is only paid when the pool grows. Connections left unused
+    for longer than max_idle seconds are closed, and a reused connection
+    that turns out to be broken is replaced. Only idempotent operations are
+    then retried once: the server may have carried out a create or register
+    request before the connection broke, and retrying it would leave a
+    duplicate managed object behind.
+    """
+
+    RETRIED_METHODS = frozenset(['get', 'destroy'])
+
+    def __init__(self, create_client, max_size=10, timeout=30, max_idle=60,
+                 clients=()):
+        if max_size < 1:
+            raise ValueError(u._("max_size must be at least 1"))
+        self.create_client = create_client
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        # Idle (client, last used time) pairs, the time is None for clients
+        # that were not opened yet.
+        self._idle = [(c, None) for c in clients]
+        self._size = len(self._idle)
+        self._cond = threading.Condition()
+
+    def call(self, method, *args):
+        """Invokes a ProxyKmipClient method with a pooled connection."""
+        for attempt in range(2):
+            kmip_client, reused = self.get()
+            try:
+                result = getattr(kmip_client, method)(*args)
+            except kmip_exceptions.KmipOperationFailure:
+                # The server answered, so the connection is still usable.
+                self.put(kmip_client)
+                raise
+            except socket.error:
+                self.discard(kmip_client)
+                if (attempt or not reused or
+                        method not in self.RETRIED_METHODS):
+                    raise
+                LOG.warning(u._LW("KMIP server connection was lost, "
+                                  "retrying with a new connection"))
+                continue
+            except Exception:
+                # The connection may be left mid-response, don't reuse it.
+                self.discard(kmip_client)
+                raise
+            self.put(kmip_client)
+            return result
+
+    def get(self):
+        """Checks out an open client.
+
+        Blocks for up to timeout seconds when max_size clients are already
+        checked out.
+
+        :returns: tuple of the client and whether its connection was opened
+                  before
+        """
+        deadline = time.time() + self.timeout
+        with self._cond:
+            expired = self._pop_expired()
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise KMIPClientPoolTimeout()
+                self._cond.wait(remaining)
+
+            if self._idle:
+                kmip_client, last_used = self._idle.pop()
+            else:
+                kmip_client, last_used = None, None
+                self._size += 1
+
+        for idle_client in expired:
+            self._close(idle_client)
+
+        if last_used is not None:
+            return kmip_client, True
+        return self._open(kmip_client), False
+
+    def put(self, kmip_client):
+        """Returns a checked out client to the pool."""
+        with self._cond:
+            self._idle.append((kmip_client, time.time()))
+            self._cond.notify()
+
+    def discard(self, kmip_client):
+        """Closes a checked out client instead of returning it."""
+        self._close(kmip_client)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _pop_expired(self):
+        if not self.max_idle:
+            return []
+        oldest = time.time() - self.max_idle
+        expired = [c for c, last_used in self._idle
+                   if last_used is not None and last_used < oldest]
+        if expired:
+            self._idle = [(c, last_used) for c, last_used in self._idle
+                          if last_used is None or last_used >= oldest]
+            self._size -= len(expired)
+            self._cond.notify_all()
+        return expired
+
+    def _open(self, kmip_client=None):
+        try:
+            kmip_client = kmip_client or self.create_client()
+            kmip_client.open()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        # Have the OS detect connections silently dropped by the server or
+        # a firewall while they sit in the pool.
+        sock = getattr(kmip_client.proxy, 'socket', None)
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        LOG.debug("Opened connection to KMIP server")
+        return kmip_client
+
+    def _close(self, kmip_client):
+        try:
+            kmip_client.close()
+        except Exception:
+            LOG.debug("Unable to close discarded KMIP server connection")
+
+
 class KMIPSecretStore(ss.SecretStoreBase):
 
     KEY_UUID = "key_uuid"
@@ -223,8 +386,22 @@ class KMIPSecretStore(ss.SecretStoreBase):
                     credential_type,
                     credential_value))
 
+        self.conf = conf
+        self.client = self._create_client()
+
+        # The client above is the first pooled one, more are created as
+        # concurrent operations need them.
         config = conf.kmip_plugin
-        self.client = client.ProxyKmipClient(
+        self.client_pool = KMIPClientPool(
+            self._create_client,
+            max_size=config.pool_max_size,
+            timeout=config.pool_timeout,
+            max_idle=config.pool_max_idle_seconds,
+            clients=[self.client])
+
+    def _create_client(self):
+        config = self.conf.kmip_plugin
+        return client.ProxyKmipClient(
             hostname=config.host,
             port=config.port,
             cert=config.certfile,
@@ -257,13 +434,11 @@ class KMIPSecretStore(ss.SecretStoreBase):
 
         algorithm = self._get_kmip_algorithm(key_spec.alg)
         try:
-            with self.client:
-                LOG.debug("Opened connection to KMIP client for secret " +
-                          "generation")
-                uuid = self.client.create(algorithm, key_spec.bit_length)
-                LOG.debug("SUCCESS: Symmetric key generated with "
-                          "uuid: %s", uuid)
-                return {KMIPSecretStore.KEY_UUID: uuid}
+            uuid = self.client_pool.call('create', algorithm,
+                                         key_spec.bit_length)
+            LOG.debug("SUCCESS: Symmetric key generated with "
+                      "uuid: %s", uuid)
+            return {KMIPSecretStore.KEY_UUID: uuid}
         except Exception as e:
             LOG.exception(u._LE("Error opening or writing to client"))
             raise ss.SecretGeneralException(str(e))
@@ -299,20 +474,17 @@ class KMIPSecretStore(ss.SecretStoreBase):
         length = key_spec.bit_length
 
         try:
-            with self.client:
-                LOG.debug("Opened connection to KMIP client for asymmetric " +
-                          "secret generation")
-                public_uuid, private_uuid = self.client.create_key_pair(
-                    algorithm, length)
-                LOG.debug("SUCCESS: Asymmetric key pair generated with "
-                          "public key uuid: %s and private key uuid: %s",
-                          public_uuid, private_uuid)
-                private_key_metadata = {KMIPSecretStore.KEY_UUID: private_uuid}
-                public_key_metadata = {KMIPSecretStore.KEY_UUID: public_uuid}
-                passphrase_metadata = None
-                return ss.AsymmetricKeyMetadataDTO(private_key_metadata,
-                                                   public_key_metadata,
-                                                   passphrase_metadata)
+            public_uuid, private_uuid = self.client_pool.call(
+                'create_key_pair', algorithm, length)
+            LOG.debug("SUCCESS: Asymmetric key pair generated with "
+                      "public key uuid: %s and private key uuid: %s",
+                      public_uuid, private_uuid)
+            private_key_metadata = {KMIPSecretStore.KEY_UUID: private_uuid}
+            public_key_metadata = {KMIPSecretStore.KEY_UUID: public_uuid}
+            passphrase_metadata = None
+            return ss.AsymmetricKeyMetadataDTO(private_key_metadata,
+                                               public_key_metadata,
+                                               passphrase_metadata)
         except Exception as e:
             LOG.exception(u._LE("Error opening or writing to client"))
             raise ss.SecretGeneralException(str(e))
@@ -342,11 +514,9 @@ class KMIPSecretStore(ss.SecretStoreBase):
         secret = self._get_kmip_secret(secret_dto)
 
         try:
-            with self.client:
-                LOG.debug("Opened connection to KMIP client")
-                uuid = self.client.register(secret)
-                LOG.debug("SUCCESS: Key stored with uuid: %s", uuid)
-                return {KMIPSecretStore.KEY_UUID: uuid}
+            uuid = self.client_pool.call('register', secret)
+            LOG.debug("SUCCESS: Key stored with uuid: %s", uuid)
+            return {KMIPSecretStore.KEY_UUID: uuid}
         except Exception as e:
             LOG.exception(u._LE("Error opening or writing to client"))
             raise ss.SecretGeneralException(str(e))
@@ -363,11 +533,8 @@ class KMIPSecretStore(ss.SecretStoreBase):
         LOG.debug("Starting secret retrieval with KMIP plugin")
         uuid = str(secret_metadata[KMIPSecretStore.KEY_UUID])
         try:
-            with self.client:
-                LOG.debug("Opened connection to KMIP client for secret " +
-                          "retrieval")
-                managed_object = self.client.get(uuid)
-                return self._get_barbican_secret(managed_object, secret_type)
+            managed_object = self.client_pool.call('get', uuid)
+            return self._get_barbican_secret(managed_object, secret_type)
         except Exception as e:
             LOG.exception(u._LE("Error opening or writing to client"))
             raise ss.SecretGeneralException(str(e))
@@ -404,9 +571,7 @@ class KMIPSecretStore(ss.SecretStoreBase):
         LOG.debug("Starting secret deletion with KMIP plugin")
         uuid = str(secret_metadata[KMIPSecretStore.KEY_UUID])
         try:
-            with self.client:
-                LOG.debug("Opened connection to KMIP client")
-                self.client.destroy(uuid)
+            self.client_pool.call('destroy', uuid)
         except Exception as e:
             LOG.exception(u._LE("Error opening or writing to client"))
             raise ss.SecretGeneralException(str(e))
@@ -11,13 +11,165 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import threading
+import time
+
+from oslo_config import cfg
+import six
+
+from barbican.common import config
 from barbican.common import utils
+from barbican import i18n as u
 from barbican.model import models
 from barbican.model import repositories as repos
 from barbican.plugin.interface import secret_store
 from barbican.plugin import store_crypto
 from barbican.plugin.util import translations as tr
 
+CONF = config.new_config()
+
+payload_cache_opt_group = cfg.OptGroup(name='secret_payload_cache',
+                                       title='Secret Payload Cache Options')
+payload_cache_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help=u._('Cache decrypted secret payloads in each process, '
+                         'so secrets retrieved often are not decrypted by '
+                         'their plugin every time.')),
+    cfg.IntOpt('ttl_seconds',
+               default=30,
+               help=u._('Seconds a decrypted payload is kept in the cache.')),
+    cfg.IntOpt('max_entries',
+               default=128,
+               help=u._('Maximum number of payloads kept in the cache.')),
+    cfg.IntOpt('max_bytes',
+               default=1048576,
+               help=u._('Maximum total size in bytes of the payloads kept in '
+                        'the cache.')),
+    cfg.ListOpt('secret_types',
+                default=[secret_store.SecretType.SYMMETRIC,
+                         secret_store.SecretType.PUBLIC,
+                         secret_store.SecretType.PRIVATE,
+                         secret_store.SecretType.PASSPHRASE,
+                         secret_store.SecretType.CERTIFICATE,
+                         secret_store.SecretType.OPAQUE],
+                help=u._('Types of secrets whose payloads may be cached.'))
+]
+CONF.register_group(payload_cache_opt_group)
+CONF.register_opts(payload_cache_opts, group=payload_cache_opt_group)
+config.parse_args(CONF)
+
+
+class SecretPayloadCache(object):
+    """Process-local cache of decrypted secret payloads.
+
+    Payloads are keyed by secret ID and last update time, so a secret updated
+    by another process is not served from here. Entries expire after
+    ttl_seconds, and the least recently used ones are evicted to stay within
+    max_entries and max_bytes. Payloads are held in bytearrays that are
+    overwritten with zeros when evicted, as far as Python allows: copies
+    made by the plugins or the interpreter are not covered.
+    """
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def is_enabled_for(self, secret_model):
+        conf = CONF.secret_payload_cache
+        return (conf.enabled and conf.ttl_seconds > 0 and
+                secret_model.id is not None and
+                secret_model.secret_type in conf.secret_types)
+
+    def get(self, secret_model):
+        """Returns the cached payload of a secret, or None if not cached."""
+        key = (secret_model.id, secret_model.updated_at)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] <= time.time():
+                self._drop(entry)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries[key] = entry
+            self.hits += 1
+            _, payload, is_text = entry
+            return payload.decode('utf-8') if is_text else bytes(payload)
+
+    def put(self, secret_model, secret):
+        """Caches the decrypted payload of a secret."""
+        conf = CONF.secret_payload_cache
+        is_text = isinstance(secret, six.text_type)
+        payload = bytearray(secret, 'utf-8') if is_text else bytearray(secret)
+        if len(payload) > conf.max_bytes:
+            _zeroize(payload)
+            return
+
+        key = (secret_model.id, secret_model.updated_at)
+        with self._lock:
+            self._invalidate(secret_model.id)
+            while self._entries and (
+                    len(self._entries) >= conf.max_entries or
+                    self._bytes + len(payload) > conf.max_bytes):
+                self._drop(self._entries.popitem(last=False)[1])
+                self.evictions += 1
+            if conf.max_entries <= 0:
+                _zeroize(payload)
+                return
+
+            self._entries[key] = (time.time() + conf.ttl_seconds, payload,
+                                  is_text)
+            self._bytes += len(payload)
+
+    def invalidate(self, secret_id=None):
+        """Drops the payload of a secret, or every payload if none is given."""
+        with self._lock:
+            if secret_id is None:
+                for entry in self._entries.values():
+                    self._drop(entry)
+                self._entries.clear()
+            else:
+                self._invalidate(secret_id)
+
+    def stats(self):
+        """Returns the hit, miss and eviction counters and the cache size."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+    def _invalidate(self, secret_id):
+        for key in [key for key in self._entries if key[0] == secret_id]:
+            self._drop(self._entries.pop(key))
+
+    def _drop(self, entry):
+        self._bytes -= len(entry[1])
+        _zeroize(entry[1])
+
+
+def _zeroize(payload):
+    payload[:] = b'\x00' * len(payload)
+
+
+_PAYLOAD_CACHE = SecretPayloadCache()
+
+
+def invalidate_payload_cache(secret_id=None):
+    """Drops cached payloads of a secret, or of all secrets."""
+    _PAYLOAD_CACHE.invalidate(secret_id)
+
+
+def get_payload_cache_stats():
+    """Returns the counters of this process' secret payload cache."""
+    return _PAYLOAD_CACHE.stats()
+
 
 def _get_transport_key_model(key_spec, transport_key_needed):
     key_model = None
@@ -81,6 +233,7 @@ def store_secret(unencrypted_raw, content_type_raw, content_encoding,
         key_model = _get_transport_key_model(key_spec, transport_key_needed)
 
         _save_secret_in_repo(secret_model, project_model)
+        repos.flush('Secret')
         return secret_model, key_model
 
     plugin_name, transport_key = _get_plugin_name_and_transport_key(
@@ -105,6 +258,8 @@ def store_secret(unencrypted_raw, content_type_raw, content_encoding,
     _save_secret_in_repo(secret_model, project_model)
     _save_secret_metadata_in_repo(secret_model, secret_metadata, store_plugin,
                                   content_type)
+    repos.flush('Secret')
+    _PAYLOAD_CACHE.invalidate(secret_model.id)
 
     return secret_model, None
 
@@ -113,6 +268,13 @@ def get_secret(requesting_content_type, secret_model, project_model,
                twsk=None, transport_key=None):
     tr.analyze_before_decryption(requesting_content_type)
 
+    use_cache = twsk is None and _PAYLOAD_CACHE.is_enabled_for(secret_model)
+    if use_cache:
+        secret = _PAYLOAD_CACHE.get(secret_model)
+        if secret is not None:
+            return tr.denormalize_after_decryption(secret,
+                                                   requesting_content_type)
+
     secret_metadata = _get_secret_meta(secret_model)
 
     if twsk is not None:
@@ -132,11 +294,64 @@ def get_secret(requesting_content_type, secret_model, project_model,
         del secret_metadata['transport_key']
         del secret_metadata['trans_wrapped_session_key']
 
+    if use_cache:
+        _PAYLOAD_CACHE.put(secret_model, secret_dto.secret)
+
     # Denormalize the secret.
     return tr.denormalize_after_decryption(secret_dto.secret,
                                            requesting_content_type)
 
 
+def get_secrets(secret_models):
+    """Retrieve the payloads of several secrets from their secure backends.
+
+    Secrets kept by the same plugin are handed to that plugin in a single
+    get_secrets() call. The secret models should have their project, secret
+    store metadata and encrypted data loaded, as by
+    SecretRepo.get_secrets_by_ids().
+
+    :returns: list of (payload, content_type) tuples in the order of
+        secret_models, with payloads base64 encoded. Both are None for
+        secrets without stored data.
+    """
+    plugin_manager = secret_store.get_manager()
+
+    requests_by_plugin = collections.OrderedDict()
+    content_types = []
+    for index, secret_model in enumerate(secret_models):
+        secret_metadata = _get_secret_meta(secret_model)
+        content_types.append(secret_metadata.get('content_type'))
+        requests_by_plugin.setdefault(
+            secret_metadata.get('plugin_name'), []).append(
+                (index, secret_metadata))
+
+    payloads = [None] * len(secret_models)
+    for plugin_name, requests in requests_by_plugin.items():
+        if plugin_name is None:
+            continue
+        retrieve_plugin = plugin_manager.get_plugin_retrieve_delete(
+            plugin_name)
+        is_store_crypto = isinstance(retrieve_plugin,
+                                     store_crypto.StoreCryptoAdapterPlugin)
+
+        plugin_requests = []
+        for index, metadata in requests:
+            secret_model = secret_models[index]
+            if is_store_crypto:
+                context = store_crypto.StoreCryptoContext(
+                    secret_model.project, secret_model=secret_model)
+                plugin_requests.append(
+                    (secret_model.secret_type, metadata, context))
+            else:
+                plugin_requests.append((secret_model.secret_type, metadata))
+
+        secret_dtos = retrieve_plugin.get_secrets(plugin_requests)
+        for (index, metadata), secret_dto in zip(requests, secret_dtos):
+            payloads[index] = secret_dto.secret
+
+    return list(zip(payloads, content_types))
+
+
 def get_transport_key_id_for_retrieval(secret_model):
     """Return a transport key ID for retrieval if the plugin supports it."""
 
@@ -173,6 +388,7 @@ def generate_secret(spec, content_type, project_model):
     _save_secret_in_repo(secret_model, project_model)
     _save_secret_metadata_in_repo(secret_model, secret_metadata,
                                   generate_plugin, content_type)
+    repos.flush('Secret')
 
     return secret_model
 
@@ -232,6 +448,7 @@ def generate_asymmetric_secret(spec, content_type, project_model):
     _save_asymmetric_secret_in_repo(
         container_model, private_secret_model, public_secret_model,
         passphrase_secret_model)
+    repos.flush('Container')
 
     return container_model
 
@@ -252,6 +469,8 @@ def delete_secret(secret_model, project_id):
         # Delete the secret from plugin storage.
         delete_plugin.delete_secret(secret_metadata)
 
+    _PAYLOAD_CACHE.invalidate(secret_model.id)
+
     # Delete the secret from data model.
     secret_repo = repos.get_secret_repository()
     secret_repo.delete_entity_by_id(entity_id=secret_model.id,
@@ -316,16 +535,23 @@ def _get_secret(retrieve_plugin, secret_metadata, secret_model, project_model):
 
 
 def _get_secret_meta(secret_model):
+    """Returns the secret store metadata of a secret as a new dict.
+
+    The dict is built from the secret's secret_store_metadata relationship,
+    which is only queried if not loaded already.
+    """
     if secret_model:
-        secret_meta_repo = repos.get_secret_meta_repository()
-        return secret_meta_repo.get_metadata_for_secret(secret_model.id)
+        return dict(
+            (key, datum.value)
+            for key, datum in secret_model.secret_store_metadata.items()
+            if not datum.deleted)
     else:
         return {}
 
 
 def _save_secret_metadata_in_repo(secret_model, secret_metadata,
                                   store_plugin, content_type):
-    """Add secret metadata to a secret."""
+    """Stage secret metadata of a secret."""
 
     if not secret_metadata:
         secret_metadata = {}
@@ -334,19 +560,19 @@ def _save_secret_metadata_in_repo(secret_model, secret_metadata,
     secret_metadata['content_type'] = content_type
 
     secret_meta_repo = repos.get_secret_meta_repository()
-    secret_meta_repo.save(secret_metadata, secret_model)
+    secret_meta_repo.save(secret_metadata, secret_model, flush=False)
 
 
 def _save_secret_in_repo(secret_model, project_model):
-    """Save a Secret entity."""
+    """Stage a Secret entity, to be written at the next flush."""
 
     secret_repo = repos.get_secret_repository()
     # Create Secret entities in data store.
     if not secret_model.id:
         secret_model.project_id = project_model.id
-        secret_repo.create_from(secret_model)
+        secret_repo.create_from(secret_model, flush=False)
     else:
-        secret_repo.save(secret_model)
+        secret_repo.save(secret_model, flush=False)
 
 
 def _secret_already_has_stored_data(secret_model):
@@ -369,7 +595,7 @@ def _save_asymmetric_secret_in_repo(container_model, private_secret_model,
                                     public_secret_model,
                                     passphrase_secret_model):
     container_repo = repos.get_container_repository()
-    container_repo.create_from(container_model)
+    container_repo.create_from(container_model, flush=False)
 
     # create container_secret for private_key
     _create_container_secret_association('private_key',
@@ -396,4 +622,4 @@ def _create_container_secret_association(assoc_name, secret_model,
     container_secret.secret_id = secret_model.id
 
     container_secret_repo = repos.get_container_secret_repository()
-    container_secret_repo.create_from(container_secret)
+    container_secret_repo.create_from(container_secret, flush=False)
@@ -18,11 +18,11 @@ import datetime
 import fnmatch
 import os
 import re
-from tempfile import mkstemp
 import uuid
 
 from OpenSSL import crypto
 from oslo_config import cfg
+import six
 
 from barbican.common import config
 from barbican.common import utils
@@ -55,6 +55,57 @@ CONF.register_opts(snakeoil_ca_plugin_opts, group=snakeoil_ca_plugin_group)
 config.parse_args(CONF)
 
 
+PEM_CERT_RE = re.compile(
+    br'-----BEGIN CERTIFICATE-----.+?-----END CERTIFICATE-----', re.DOTALL)
+
+OID_PKCS7_DATA = (1, 2, 840, 113549, 1, 7, 1)
+OID_PKCS7_SIGNED_DATA = (1, 2, 840, 113549, 1, 7, 2)
+
+
+def _der(tag, content):
+    """DER encodes a tag, the length of content and content."""
+    length = len(content)
+    if length < 0x80:
+        encoded_length = six.int2byte(length)
+    else:
+        length_bytes = bytearray()
+        while length:
+            length_bytes.insert(0, length & 0xff)
+            length >>= 8
+        encoded_length = (six.int2byte(0x80 | len(length_bytes)) +
+                          bytes(length_bytes))
+    return six.int2byte(tag) + encoded_length + content
+
+
+def _der_sequence(*items):
+    return _der(0x30, b''.join(items))
+
+
+def _der_set(*items):
+    return _der(0x31, b''.join(items))
+
+
+def _der_integer(value):
+    # Only small non-negative values are needed here.
+    return _der(0x02, six.int2byte(value))
+
+
+def _der_oid(oid):
+    content = bytearray([40 * oid[0] + oid[1]])
+    for arc in oid[2:]:
+        encoded_arc = bytearray([arc & 0x7f])
+        arc >>= 7
+        while arc:
+            encoded_arc.insert(0, 0x80 | (arc & 0x7f))
+            arc >>= 7
+        content += encoded_arc
+    return _der(0x06, bytes(content))
+
+
+def _file_version(stat_result):
+    return stat_result.st_mtime, stat_result.st_size
+
+
 def set_subject_X509Name(target, dn):
     """Set target X509Name object with parsed dn.
 
@@ -113,76 +164,83 @@ class SnakeoilCA(object):
         self._chain_val = None
         self._pkcs7_val = None
 
-    @property
-    def cert(self):
+        # Maps the CA material names to the modification time and size of
+        # the file they were read from (None when kept in memory) and their
+        # parsed value, so the files are only read again once modified.
+        self._material = {}
+
+    def _get_material(self, name, path, parse):
+        cached = self._material.get(name)
+        if path is None:
+            if cached is None:
+                self.ensure_exists()
+                cached = self._material[name]
+            return cached[1]
+
+        try:
+            version = _file_version(os.stat(path))
+        except OSError:
+            version = None
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+
         self.ensure_exists()
-        if self.cert_path:
-            with open(self.cert_path) as cert_fh:
-                return crypto.load_certificate(crypto.FILETYPE_PEM,
-                                               cert_fh.read())
+        with open(path) as fh:
+            version = _file_version(os.fstat(fh.fileno()))
+            value = parse(fh.read())
+        self._material[name] = (version, value)
+        return value
+
+    def _set_material(self, name, path, data, value):
+        if path:
+            with open(path, 'w') as fh:
+                fh.write(data)
+                fh.flush()
+                version = _file_version(os.fstat(fh.fileno()))
         else:
-            return crypto.load_certificate(crypto.FILETYPE_PEM, self._cert_val)
+            setattr(self, '_{0}_val'.format(name), data)
+            version = None
+        self._material[name] = (version, value)
+
+    @property
+    def cert(self):
+        return self._get_material(
+            'cert', self.cert_path,
+            lambda data: crypto.load_certificate(crypto.FILETYPE_PEM, data))
 
     @cert.setter
     def cert(self, val):
-        if self.cert_path:
-            with open(self.cert_path, 'w') as cert_fh:
-                cert_fh.write(crypto.dump_certificate(crypto.FILETYPE_PEM,
-                                                      val))
-        else:
-            self._cert_val = crypto.dump_certificate(crypto.FILETYPE_PEM, val)
+        self._set_material(
+            'cert', self.cert_path,
+            crypto.dump_certificate(crypto.FILETYPE_PEM, val), val)
 
     @property
     def key(self):
-        self.ensure_exists()
-        if self.key_path:
-            with open(self.key_path) as key_fh:
-                return crypto.load_privatekey(crypto.FILETYPE_PEM,
-                                              key_fh.read())
-        else:
-            return crypto.load_privatekey(crypto.FILETYPE_PEM, self._key_val)
+        return self._get_material(
+            'key', self.key_path,
+            lambda data: crypto.load_privatekey(crypto.FILETYPE_PEM, data))
 
     @key.setter
     def key(self, val):
-        if self.key_path:
-            with open(self.key_path, 'w') as key_fh:
-                key_fh.write(crypto.dump_privatekey(crypto.FILETYPE_PEM, val))
-        else:
-            self._key_val = crypto.dump_privatekey(crypto.FILETYPE_PEM, val)
+        self._set_material(
+            'key', self.key_path,
+            crypto.dump_privatekey(crypto.FILETYPE_PEM, val), val)
 
     @property
     def chain(self):
-        self.ensure_exists()
-        if self.chain_path:
-            with open(self.chain_path) as chain_fh:
-                return chain_fh.read()
-        else:
-            return self._chain_val
+        return self._get_material('chain', self.chain_path, lambda data: data)
 
     @chain.setter
     def chain(self, val):
-        if self.chain_path:
-            with open(self.chain_path, 'w') as chain_fh:
-                chain_fh.write(val)
-        else:
-            self._chain_val = val
+        self._set_material('chain', self.chain_path, val, val)
 
     @property
     def pkcs7(self):
-        self.ensure_exists()
-        if self.pkcs7_path:
-            with open(self.pkcs7_path) as pkcs7_fh:
-                return pkcs7_fh.read()
-        else:
-            return self._pkcs7_val
+        return self._get_material('pkcs7', self.pkcs7_path, lambda data: data)
 
     @pkcs7.setter
     def pkcs7(self, val):
-        if self.pkcs7_path:
-            with open(self.pkcs7_path, 'w') as pkcs7_fh:
-                pkcs7_fh.write(val)
-        else:
-            self._pkcs7_val = val
+        self._set_material('pkcs7', self.pkcs7_path, val, val)
 
     @property
     def exists(self):
@@ -252,22 +310,33 @@ class SnakeoilCA(object):
         return cert, key, chain, pkcs7
 
     def _generate_pkcs7(self, chain):
-        fin, temp_in = mkstemp()
-        os.write(fin, chain)
-        os.close(fin)
-
-        fout, temp_out = mkstemp()
-        os.close(fout)
-
-        command = ("openssl crl2pkcs7 -nocrl -out " + temp_out +
-                   " -certfile " + temp_in)
-        os.system(command)
-        with open(temp_out) as pkcs7_fh:
-            pkcs7 = pkcs7_fh.read()
-
-        os.remove(temp_in)
-        os.remove(temp_out)
-        return pkcs7
+        """Returns the PEM PKCS#7 bundle of the certificates in chain.
+
+        This is the certificates-only SignedData structure that
+        'openssl crl2pkcs7 -nocrl' generates, built in-process.
+        """
+        if isinstance(chain, six.text_type):
+            chain = chain.encode('ascii')
+        certs = [
+            crypto.dump_certificate(
+                crypto.FILETYPE_ASN1,
+                crypto.load_certificate(crypto.FILETYPE_PEM, pem))
+            for pem in PEM_CERT_RE.findall(chain)]
+
+        signed_data = _der_sequence(
+            _der_integer(1),                 # version
+            _der_set(),                      # digestAlgorithms
+            _der_sequence(_der_oid(OID_PKCS7_DATA)),
+            _der(0xa0, b''.join(certs)),     # [0] IMPLICIT certificates
+            _der_set())                      # signerInfos
+        content_info = _der_sequence(
+            _der_oid(OID_PKCS7_SIGNED_DATA),
+            _der(0xa0, signed_data))         # [0] EXPLICIT content
+
+        encoded = base64.b64encode(content_info)
+        lines = [encoded[i:i + 64] for i in range(0, len(encoded), 64)]
+        return (b'-----BEGIN PKCS7-----\n' + b'\n'.join(lines) +
+                b'\n-----END PKCS7-----\n')
 
 
 class CertManager(object):
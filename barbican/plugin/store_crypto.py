@@ -12,6 +12,7 @@
 # limitations under the License.
 
 import base64
+import collections
 
 from barbican.common import config
 from barbican.common import utils
@@ -142,6 +143,56 @@ class StoreCryptoAdapterPlugin(object):
                                 secret, key_spec,
                                 datum_model.content_type)
 
+    def get_secrets(self, secrets):
+        """Retrieve several secrets.
+
+        Secrets protected by the same project KEK are decrypted with a single
+        call to the crypto plugin's decrypt_batch(), so the KEK is unwrapped
+        once per batch rather than once per secret.
+
+        :param secrets: list of (secret_type, metadata, context) tuples
+        :returns: list of SecretDTOs, in the order of secrets
+        """
+        batches = collections.OrderedDict()
+        for index, (secret_type, metadata, context) in enumerate(secrets):
+            if (not context.secret_model or
+                    not context.secret_model.encrypted_data):
+                raise sstore.SecretNotFoundException()
+            datum_model = context.secret_model.encrypted_data[0]
+            kek_datum = datum_model.kek_meta_project
+            batches.setdefault((kek_datum.plugin_name, kek_datum.id),
+                               []).append(index)
+
+        secret_dtos = [None] * len(secrets)
+        for (plugin_name, kek_id), indexes in batches.items():
+            decrypting_plugin = manager.get_manager().get_plugin_retrieve(
+                plugin_name)
+            first_context = secrets[indexes[0]][2]
+            kek_meta_dto = crypto.KEKMetaDTO(
+                first_context.secret_model.encrypted_data[0].kek_meta_project)
+
+            decrypt_requests = []
+            for index in indexes:
+                datum_model = secrets[index][2].secret_model.encrypted_data[0]
+                encrypted = base64.b64decode(datum_model.cypher_text)
+                decrypt_requests.append((crypto.DecryptDTO(encrypted),
+                                         datum_model.kek_meta_extended))
+
+            decrypted = decrypting_plugin.decrypt_batch(
+                decrypt_requests, kek_meta_dto,
+                first_context.project_model.external_id)
+
+            for index, secret in zip(indexes, decrypted):
+                secret_type, metadata, context = secrets[index]
+                secret_model = context.secret_model
+                key_spec = sstore.KeySpec(alg=secret_model.algorithm,
+                                          bit_length=secret_model.bit_length,
+                                          mode=secret_model.mode)
+                secret_dtos[index] = sstore.SecretDTO(
+                    secret_type, base64.b64encode(secret), key_spec,
+                    secret_model.encrypted_data[0].content_type)
+        return secret_dtos
+
     def delete_secret(self, secret_metadata):
         """Delete a secret."""
         pass
@@ -292,7 +343,7 @@ def _find_or_create_kek_objects(plugin_inst, project_model):
             raise crypto.CryptoKEKBindingException(full_plugin_name)
 
         _indicate_bind_completed(kek_meta_dto, kek_datum_model)
-        kek_repo.save(kek_datum_model)
+        kek_repo.save(kek_datum_model, flush=False)
 
     return kek_datum_model, kek_meta_dto
 
@@ -300,10 +351,12 @@ def _find_or_create_kek_objects(plugin_inst, project_model):
 def _store_secret_and_datum(
         context, secret_model, kek_datum_model, generated_dto):
 
-    # Create Secret entities in data store.
+    # Stage Secret entities, the caller flushes them along with their
+    # metadata.
     if not secret_model.id:
         secret_model.project_id = context.project_model.id
-        repositories.get_secret_repository().create_from(secret_model)
+        repositories.get_secret_repository().create_from(secret_model,
+                                                         flush=False)
 
     # setup and store encrypted datum
     datum_model = models.EncryptedDatum(secret_model, kek_datum_model)
@@ -312,7 +365,7 @@ def _store_secret_and_datum(
     datum_model.kek_meta_extended = generated_dto.kek_meta_extended
     datum_model.secret_id = secret_model.id
     repositories.get_encrypted_datum_repository().create_from(
-        datum_model)
+        datum_model, flush=False)
 
 
 def _indicate_bind_completed(kek_meta_dto, kek_datum):
@@ -16,6 +16,8 @@
 """
 Barbican certificate processing plugins and support.
 """
+import datetime
+
 from oslo_config import cfg
 from requests import exceptions as request_exceptions
 #from symantecssl.core import Symantec
@@ -46,13 +48,39 @@ symantec_plugin_opts = [
     cfg.StrOpt('partnercode',
                help=u._('Symantec partner code for authentication')),
     cfg.StrOpt('testmode',
-               help=u._('If true, the sandbox environment will be used instead of production. This requires a dedicated sandbox account!'))
+               help=u._('If true, the sandbox environment will be used '
+                        'instead of production. This requires a dedicated '
+                        'sandbox account!')),
+    cfg.StrOpt('order_wsdl_url',
+               help=u._('URL of the order API WSDL, such as a file:// URL '
+                        'of a local copy. Defaults to the WSDL of the '
+                        'selected environment.')),
+    cfg.StrOpt('query_wsdl_url',
+               help=u._('URL of the query API WSDL, such as a file:// URL '
+                        'of a local copy. Defaults to the WSDL of the '
+                        'selected environment.')),
+    cfg.StrOpt('wsdl_cache_dir',
+               help=u._('Directory to cache the parsed WSDL files in. '
+                        'Defaults to the suds cache in the temporary '
+                        'directory.'))
 ]
 
 CONF.register_group(symantec_plugin_group)
 CONF.register_opts(symantec_plugin_opts, group=symantec_plugin_group)
 config.parse_args(CONF)
 
+# Timestamp format of the date ranges of the query API.
+SYMANTEC_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+
+def _as_list(value):
+    """suds returns a single object rather than a list for one element."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
 
 class SymantecCertificatePlugin(cert.CertificatePluginBase):
     """Symantec certificate plugin."""
@@ -81,8 +109,16 @@ class SymantecCertificatePlugin(cert.CertificatePluginBase):
         if self.testmode.lower() == 'true':
             testmode = True
         # Create and configure the Symantec API plugin
+        # The API object builds its SOAP clients once and shares them between
+        # calls, so the WSDL is not fetched and parsed for every request.
         self.api = SymAPI(useTestAPI = testmode, verbose=False)
         self.api.setCredentials(self.partnercode, self.username, self.password)
+        if conf.symantec_plugin.wsdl_cache_dir:
+            self.api.setWSDLCache(conf.symantec_plugin.wsdl_cache_dir)
+        if conf.symantec_plugin.order_wsdl_url:
+            self.api.setOrderAPIURL(conf.symantec_plugin.order_wsdl_url)
+        if conf.symantec_plugin.query_wsdl_url:
+            self.api.setQueryAPIURL(conf.symantec_plugin.query_wsdl_url)
 
     def get_default_ca_name(self):
         return "Symantec CA"
@@ -204,6 +240,30 @@ class SymantecCertificatePlugin(cert.CertificatePluginBase):
         
         #raise NotImplementedError  # pragma: no cover
 
+    def get_changed_orders(self, modified_since):
+        """Lists the orders modified since a time with a single CA query
+
+        :param modified_since: UTC datetime to list changes from
+        :returns: set of the changed order IDs, or None if the CA refused
+                  the query
+        :raises: any error reaching the CA, for the caller to log
+        """
+        summary = self.api.GetModifiedOrderSummary(
+            modified_since.strftime(SYMANTEC_TIMESTAMP_FORMAT),
+            datetime.datetime.utcnow().strftime(SYMANTEC_TIMESTAMP_FORMAT))
+
+        if summary.QueryResponseHeader.SuccessCode != 0:
+            return None
+        if not summary.QueryResponseHeader.ReturnCount:
+            return set()
+
+        # Master resellers get a ModifiedPartnerOrder per sub-reseller.
+        order_ids = set()
+        for partner in _as_list(summary.ModifiedPartnerOrder):
+            for order in _as_list(partner.ModifiedOrders.ModifiedOrder):
+                order_ids.add(order.PartnerOrderID)
+        return order_ids
+
     def supports(self, certificate_spec):
         """Indicates if the plugin supports the certificate type.
 
@@ -27,12 +27,21 @@ from barbican.common import utils
 from barbican import i18n as u
 from barbican.model import models
 from barbican.model import repositories
+from barbican.plugin.interface import certificate_manager as cert
 from barbican.queue import client as async_client
 
 LOG = utils.getLogger(__name__)
 
 CONF = config.CONF
 
+# RPC task checking the status of a certificate order with its CA, see
+# barbican.queue.server.MAP_RETRY_TASKS.
+CERT_STATUS_CHECK_TASK = 'check_certificate_status'
+
+# Changed orders are listed from a little before the previous listing, so
+# that changes made while it was in progress aren't missed.
+CHANGED_ORDERS_OVERLAP = datetime.timedelta(minutes=1)
+
 
 def _compute_next_periodic_interval():
     periodic_interval = (
@@ -71,6 +80,15 @@ class PeriodicServer(service.Service):
             periodic_interval_max=periodic_interval)
 
         self.order_retry_repo = repositories.get_order_retry_tasks_repository()
+        self.order_barbican_meta_repo = (
+            repositories.get_order_barbican_meta_repository())
+
+        # Maps certificate plugin names to the time of, and the order IDs
+        # returned by, their last attempt to list changed orders, and to the
+        # time changes are to be listed from.
+        self._changed_orders_listed_at = {}
+        self._changed_orders = {}
+        self._changed_orders_since = {}
 
     def start(self):
         LOG.info("Starting the PeriodicServer")
@@ -114,6 +132,9 @@ class PeriodicServer(service.Service):
         # Retrieve tasks to retry.
         entities, total = self._retrieve_tasks()
 
+        if CONF.retry_scheduler.certificate_status_batch_interval_seconds > 0:
+            entities = self._batch_certificate_status_checks(entities)
+
         # Create RPC tasks for each retry task found.
         for task in entities:
             self._enqueue_task(task)
@@ -132,6 +153,110 @@ class PeriodicServer(service.Service):
 
         return entities, total
 
+    def _batch_certificate_status_checks(self, tasks):
+        """Postpones status checks of orders that didn't change with the CA.
+
+        For certificate plugins able to list the orders that changed with
+        their CA, the CA is asked once per batch interval which orders
+        changed. Status checks of those orders are moved up to now when the
+        listing is made, while due status checks of the other orders are
+        postponed until the next listing, so the CA isn't queried for every
+        pending order.
+
+        :param tasks: The retry tasks that are due.
+        :return: The tasks to enqueue now.
+        """
+        status_tasks = [task for task in tasks
+                        if task.retry_task == CERT_STATUS_CHECK_TASK]
+        if not status_tasks:
+            return tasks
+
+        now = datetime.datetime.utcnow()
+        interval = datetime.timedelta(
+            seconds=CONF.retry_scheduler.
+            certificate_status_batch_interval_seconds)
+        postponed_task_ids = set()
+
+        repositories.start()
+        try:
+            plugin_names = self.order_barbican_meta_repo.get_values_for_orders(
+                set(task.order_id for task in status_tasks), 'plugin_name')
+
+            for plugin_name in set(plugin_names.values()):
+                changed_order_ids, listed = self._get_changed_orders(
+                    plugin_name, now, interval)
+                if changed_order_ids is None:
+                    continue
+
+                # Changed orders are only expedited once per listing, so a
+                # changed order still pending with the CA isn't checked
+                # again on every run until the next listing.
+                if listed:
+                    self.order_retry_repo.expedite_tasks_for_orders(
+                        changed_order_ids, CERT_STATUS_CHECK_TASK, now)
+                postponed_task_ids.update(
+                    task.id for task in status_tasks
+                    if plugin_names.get(task.order_id) == plugin_name and
+                    task.order_id not in changed_order_ids)
+
+            self.order_retry_repo.postpone_tasks(
+                postponed_task_ids, now + interval)
+
+            repositories.commit()
+        except Exception:
+            LOG.exception(
+                u._LE("Problem batching certificate status checks, checking "
+                      "the status of each order instead")
+            )
+            repositories.rollback()
+            return tasks
+        finally:
+            repositories.clear()
+
+        LOG.debug("Postponed status checks of '%s' unchanged orders",
+                  len(postponed_task_ids))
+        return [task for task in tasks if task.id not in postponed_task_ids]
+
+    def _get_changed_orders(self, plugin_name, now, interval):
+        """Returns the IDs of orders changed with a plugin's CA.
+
+        The CA is only asked once per interval, even when it fails to
+        answer; in between, the IDs from the last listing are returned.
+
+        :return: A tuple of the set of changed order IDs, or None if the
+            plugin can't tell which orders changed, and whether the CA was
+            just asked for them.
+        """
+        listed_at = self._changed_orders_listed_at.get(plugin_name)
+        if listed_at is None:
+            # Nothing is known of the changes made before now, so due orders
+            # are checked one by one until the first listing.
+            self._changed_orders_listed_at[plugin_name] = now
+            self._changed_orders_since[plugin_name] = now
+            return None, False
+
+        if now - listed_at < interval:
+            return self._changed_orders.get(plugin_name), False
+
+        self._changed_orders_listed_at[plugin_name] = now
+        try:
+            plugin = cert.get_manager().get_plugin_by_name(plugin_name)
+            changed_order_ids = plugin.get_changed_orders(
+                self._changed_orders_since[plugin_name] -
+                CHANGED_ORDERS_OVERLAP)
+        except Exception:
+            LOG.exception(
+                u._LE("Problem listing the changed orders of certificate "
+                      "plugin '%s'"), plugin_name)
+            changed_order_ids = None
+
+        # Keep listing from the last successful listing on failure, so no
+        # changes are missed by the next one.
+        if changed_order_ids is not None:
+            self._changed_orders_since[plugin_name] = now
+        self._changed_orders[plugin_name] = changed_order_ids
+        return changed_order_ids, True
+
     def _enqueue_task(self, task):
         """Re-enqueue the specified task."""
         retry_task_name = 'N/A'
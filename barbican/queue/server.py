@@ -33,7 +33,9 @@ from barbican.common import utils
 from barbican import i18n as u
 from barbican.model import models
 from barbican.model import repositories
+from barbican.plugin.interface import certificate_manager as cert
 from barbican import queue
+from barbican.tasks import certificate_resources
 from barbican.tasks import common
 from barbican.tasks import resources
 
@@ -281,6 +283,16 @@ class TaskServer(Tasks, service.Service):
 
     def start(self):
         LOG.info(u._LI("Starting the TaskServer"))
+
+        # Keep the CA table fresh in the background, so that certificate
+        # orders don't have to wait on CA discovery.
+        cert.get_manager().refreshed_in_background = True
+        self.tg.add_dynamic_timer(
+            self._refresh_ca_table,
+            initial_delay=0,
+            periodic_interval_max=(
+                cert.CONF.certificate.ca_refresh_interval_max_seconds))
+
         self._server.start()
         super(TaskServer, self).start()
 
@@ -288,3 +300,24 @@ class TaskServer(Tasks, service.Service):
         LOG.info(u._LI("Halting the TaskServer"))
         super(TaskServer, self).stop()
         self._server.stop()
+        cert.get_manager().refreshed_in_background = False
+
+    def _refresh_ca_table(self):
+        """Periodically refresh the CA table ahead of certificate orders.
+
+        :return: Return the number of seconds to wait before invoking this
+            method again.
+        """
+        check_again_in_seconds = cert.CA_REFRESH_RETRY_SECONDS
+        repositories.start()
+        try:
+            check_again_in_seconds = (
+                certificate_resources.refresh_certificate_resources())
+        except Exception:
+            LOG.exception(u._LE("Problem seen refreshing the CA table"))
+        finally:
+            repositories.clear()
+
+        LOG.debug("Will check the CA table again in '%s' seconds.",
+                  check_again_in_seconds)
+        return check_again_in_seconds
@@ -68,7 +68,7 @@ ORDER_STATUS_CA_UNAVAIL_FOR_CHECK = models.OrderStatus(
 
 def refresh_certificate_resources():
     # Before CA operations can be performed, the CA table must be populated
-    cert.CertificatePluginManager().refresh_ca_table()
+    return cert.get_manager().refresh_ca_table()
 
 
 def issue_certificate_request(order_model, project_model, result_follow_on):
@@ -95,9 +95,12 @@ def issue_certificate_request(order_model, project_model, result_follow_on):
     # 'extended_meta_dto' or some such.
     barbican_meta_for_plugins_dto = cert.BarbicanMetaDTO()
 
-    # refresh the CA table.  This is mostly a no-op unless the entries
-    # for a plugin are expired.
-    cert.CertificatePluginManager().refresh_ca_table()
+    # refresh the CA table.  This is a no-op unless the entries for a plugin
+    # are expired, and is left to the worker when it refreshes the table in
+    # the background.
+    cert_manager = cert.get_manager()
+    if not cert_manager.refreshed_in_background:
+        cert_manager.refresh_ca_table()
 
     cert_plugin = _get_cert_plugin(barbican_meta,
                                    barbican_meta_for_plugins_dto,
@@ -133,16 +136,16 @@ def _get_cert_plugin(barbican_meta, barbican_meta_for_plugins_dto,
                      order_model, project_model):
     cert_plugin_name = barbican_meta.get('plugin_name')
     if cert_plugin_name:
-        return cert.CertificatePluginManager().get_plugin_by_name(
+        return cert.get_manager().get_plugin_by_name(
             cert_plugin_name)
     ca_id = _get_ca_id(order_model.meta, project_model.id)
     if ca_id:
         ca = repos.get_ca_repository().get(ca_id)
         barbican_meta_for_plugins_dto.plugin_ca_id = ca.plugin_ca_id
-        return cert.CertificatePluginManager().get_plugin_by_name(
+        return cert.get_manager().get_plugin_by_name(
             ca.plugin_name)
     else:
-        return cert.CertificatePluginManager().get_plugin(order_model.meta)
+        return cert.get_manager().get_plugin(order_model.meta)
 
 
 def check_certificate_request(order_model, project_model, result_follow_on):
@@ -166,7 +169,7 @@ def check_certificate_request(order_model, project_model, result_follow_on):
     # TODO(john-wood-w) See note above about DTO's name.
     barbican_meta_for_plugins_dto = cert.BarbicanMetaDTO()
 
-    cert_plugin = cert.CertificatePluginManager().get_plugin_by_name(
+    cert_plugin = cert.get_manager().get_plugin_by_name(
         barbican_meta.get('plugin_name'))
 
     result = cert_plugin.check_certificate_status(
@@ -206,7 +209,7 @@ def create_subordinate_ca(project_model, name, description, subject_dn,
         raise excep.UnauthorizedSubCA()
 
     # get the parent plugin, raises CertPluginNotFound if missing
-    cert_plugin = cert.CertificatePluginManager().get_plugin_by_name(
+    cert_plugin = cert.get_manager().get_plugin_by_name(
         parent_ca.plugin_name)
 
     # confirm that the plugin supports creating subordinate CAs
@@ -276,7 +279,7 @@ def delete_subordinate_ca(external_project_id, ca):
                                             external_project_id)
 
     # Delete the CA entry from plugin
-    cert_plugin = cert.CertificatePluginManager().get_plugin_by_name(
+    cert_plugin = cert.get_manager().get_plugin_by_name(
         ca.plugin_name)
     cert_plugin.delete_ca(ca.plugin_ca_id)
 
@@ -285,6 +288,7 @@ def delete_subordinate_ca(external_project_id, ca):
     ca_repo.delete_entity_by_id(
         entity_id=ca.id,
         external_project_id=external_project_id)
+    cert.get_manager().forget_ca(ca.id)
 
 
 def is_last_project_ca(project_id):
@@ -129,6 +129,7 @@ class KeystoneEventConsumer(resources.BaseTask):
         project_id = project.id
 
         rep.delete_all_project_resources(project_id)
+        rep.invalidate_project_cache(project.external_id)
 
         # reached here means there is no error so log the successful
         # cleanup log entry.
@@ -12,9 +12,16 @@
 # implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import base64
 import os
 import uuid
 
+import mock
+import sqlalchemy
+
+from barbican.api.controllers import acls
+from barbican.api.controllers import consumers
+from barbican.api.controllers import containers
 from barbican.common import exception
 from barbican.model import repositories
 from barbican.tests.api.controllers import test_secrets as secret_helper
@@ -265,6 +272,131 @@ class WhenGettingOrDeletingContainerUsingContainerResource(
         self.assertEqual("application/json", resp.content_type)
 
 
+class WhenRoutingToContainerSubResources(utils.BaseTestCase):
+
+    def test_should_build_sub_controllers_only_when_routed_to(self):
+        container = mock.MagicMock()
+        consumers_patcher = mock.patch.object(
+            consumers, 'ContainerConsumersController')
+        acls_patcher = mock.patch.object(acls, 'ContainerACLsController')
+        with consumers_patcher as consumers_cls:
+            with acls_patcher as acls_cls:
+                controller = containers.ContainerController(container)
+                self.assertFalse(consumers_cls.called)
+                self.assertFalse(acls_cls.called)
+
+                self.assertEqual(consumers_cls.return_value,
+                                 controller.consumers)
+                self.assertEqual(acls_cls.return_value, controller.acl)
+
+        consumers_cls.assert_called_once_with(container.id)
+        acls_cls.assert_called_once_with(container)
+
+
+class WhenGettingContainerPayloads(utils.BarbicanAPIBaseTestCase,
+                                   SuccessfulContainerCreateMixin):
+
+    def _create_certificate_container(self):
+        members = [('certificate', 'cert payload', 'text/plain'),
+                   ('private_key', 'key payload', 'text/plain'),
+                   ('intermediates', 'chain payload', 'text/plain')]
+        secret_refs = []
+        for name, payload, content_type in members:
+            resp, secret_uuid = secret_helper.create_secret(
+                self.app, payload=payload, content_type=content_type)
+            self.assertEqual(201, resp.status_int)
+            secret_refs.append({'name': name,
+                                'secret_ref': resp.json['secret_ref']})
+
+        resp, container_uuid = create_container(
+            self.app,
+            name='test container name',
+            container_type='certificate',
+            secret_refs=secret_refs
+        )
+        self._assert_successful_container_create(resp, container_uuid)
+        return container_uuid, secret_refs
+
+    def test_should_get_all_member_payloads(self):
+        container_uuid, secret_refs = self._create_certificate_container()
+
+        resp = self.app.get('/containers/{0}/payloads'.format(container_uuid))
+
+        self.assertEqual(200, resp.status_int)
+        self.assertIn(container_uuid, resp.json['container_ref'])
+        secrets = dict((secret['name'], secret)
+                       for secret in resp.json['secrets'])
+        self.assertEqual(
+            set(['certificate', 'private_key', 'intermediates']),
+            set(secrets))
+        for secret_ref in secret_refs:
+            secret = secrets[secret_ref['name']]
+            self.assertEqual(secret_ref['secret_ref'], secret['secret_ref'])
+            self.assertEqual('text/plain', secret['payload_content_type'])
+            self.assertEqual('base64', secret['payload_content_encoding'])
+        self.assertEqual('key payload', base64.b64decode(
+            secrets['private_key']['payload']))
+
+    def test_should_load_member_secrets_with_one_query(self):
+        container_uuid, secret_refs = self._create_certificate_container()
+        repositories.clear()
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = repositories._ENGINE
+        sqlalchemy.event.listen(engine, 'before_cursor_execute',
+                                before_cursor_execute)
+        try:
+            members = containers_repo.get_container_secrets(container_uuid)
+            for name, secret in members:
+                secret.project.external_id
+                secret.encrypted_data[0].kek_meta_project.plugin_name
+                secret.secret_store_metadata.items()
+        finally:
+            sqlalchemy.event.remove(engine, 'before_cursor_execute',
+                                    before_cursor_execute)
+
+        self.assertEqual(3, len(members))
+        self.assertEqual(1, len(statements))
+
+    def test_should_get_empty_list_for_container_without_secrets(self):
+        resp, container_uuid = create_container(
+            self.app,
+            name='test container name',
+            container_type='generic'
+        )
+        self._assert_successful_container_create(resp, container_uuid)
+
+        resp = self.app.get('/containers/{0}/payloads'.format(container_uuid))
+
+        self.assertEqual(200, resp.status_int)
+        self.assertEqual([], resp.json['secrets'])
+
+    def test_should_leave_out_deleted_secrets(self):
+        container_uuid, secret_refs = self._create_certificate_container()
+        self.app.delete(secret_refs[0]['secret_ref'].split('/v1', 1)[-1],
+                        headers={'Accept': 'application/json'})
+
+        resp = self.app.get('/containers/{0}/payloads'.format(container_uuid))
+
+        self.assertEqual(200, resp.status_int)
+        self.assertEqual(2, len(resp.json['secrets']))
+
+    def test_should_not_allow_post_on_container_payloads(self):
+        container_uuid, secret_refs = self._create_certificate_container()
+
+        resp = self.app.post_json(
+            '/containers/{0}/payloads'.format(container_uuid),
+            {},
+            expect_errors=True
+        )
+
+        self.assertEqual(405, resp.status_int)
+
+
 class WhenPerformingUnallowedOperationsOnContainers(
         utils.BarbicanAPIBaseTestCase,
         SuccessfulContainerCreateMixin):
@@ -20,6 +20,7 @@ import mock
 from barbican.common import resources
 from barbican.model import models
 from barbican.model import repositories
+from barbican.queue import client
 from barbican.tests.api.controllers import test_acls
 from barbican.tests.api import test_resources_policy as test_policy
 from barbican.tests import utils
@@ -210,8 +211,9 @@ class WhenPuttingAnOrderWithMetadata(utils.BarbicanAPIBaseTestCase):
     def setUp(self):
         # Temporarily mock the queue until we can figure out a better way
         # TODO(jvrbanac): Remove dependence on mocks
-        self.update_order_mock = mock.MagicMock()
-        repositories.OrderRepo.update_order = self.update_order_mock
+        patcher = mock.patch.object(client.TaskClient, 'update_order')
+        self.update_order_mock = patcher.start()
+        self.addCleanup(patcher.stop)
 
         super(WhenPuttingAnOrderWithMetadata, self).setUp()
 
@@ -17,10 +17,12 @@ import os
 
 import mock
 from oslo_utils import timeutils
+import sqlalchemy
 
 from barbican.common import validators
 from barbican.model import models
 from barbican.model import repositories
+from barbican.plugin.crypto import simple_crypto
 from barbican.tests import utils
 
 project_repo = repositories.get_project_repository()
@@ -247,6 +249,82 @@ class WhenGettingSecretsList(utils.BarbicanAPIBaseTestCase):
         self.assertIn('offset=0', previous_ref)
         self.assertIn('offset=4', next_ref)
 
+    def test_marker_pagination_attributes(self):
+        for _ in range(3):
+            create_resp, _ = create_secret(self.app, name='Lana Kane')
+            self.assertEqual(201, create_resp.status_int)
+
+        get_resp = self.app.get('/secrets/', {'limit': '2', 'marker': ''})
+
+        self.assertEqual(200, get_resp.status_int)
+        self.assertNotIn('previous', get_resp.json)
+        last_id = get_resp.json['secrets'][-1]['secret_ref'].split('/')[-1]
+        self.assertIn('marker={0}'.format(last_id), get_resp.json['next'])
+
+        get_resp = self.app.get('/secrets/', {'limit': '2',
+                                              'marker': last_id})
+
+        self.assertEqual(200, get_resp.status_int)
+        self.assertEqual(1, len(get_resp.json['secrets']))
+        self.assertEqual(3, get_resp.json['total'])
+        self.assertNotIn('next', get_resp.json)
+
+    def test_list_secrets_without_total(self):
+        for _ in range(3):
+            create_resp, _ = create_secret(self.app, name='Cyril Figgis')
+            self.assertEqual(201, create_resp.status_int)
+
+        get_resp = self.app.get('/secrets/', {'limit': '2',
+                                              'total': 'false'})
+
+        self.assertEqual(200, get_resp.status_int)
+        self.assertNotIn('total', get_resp.json)
+        self.assertIn('offset=2', get_resp.json['next'])
+
+    def test_list_secrets_with_approximate_total(self):
+        for _ in range(3):
+            create_resp, _ = create_secret(self.app, name='Cheryl Tunt')
+            self.assertEqual(201, create_resp.status_int)
+
+        get_resp = self.app.get('/secrets/', {'total': 'approx'})
+
+        self.assertEqual(200, get_resp.status_int)
+        self.assertEqual(3, get_resp.json['total'])
+
+    def test_list_secrets_with_unknown_marker(self):
+        get_resp = self.app.get('/secrets/', {'marker': 'invalid_id'},
+                                expect_errors=True)
+
+        self.assertEqual(400, get_resp.status_int)
+
+    def test_list_secrets_statement_count_does_not_grow_with_page(self):
+        for _ in range(4):
+            create_resp, _ = create_secret(self.app, name='Ray Gillette',
+                                           payload='secret',
+                                           content_type='text/plain')
+            self.assertEqual(201, create_resp.status_int)
+
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        sqlalchemy.event.listen(repositories._ENGINE, 'before_cursor_execute',
+                                record_statement)
+        self.addCleanup(sqlalchemy.event.remove, repositories._ENGINE,
+                        'before_cursor_execute', record_statement)
+
+        counts = []
+        for limit in ('1', '4'):
+            del statements[:]
+            get_resp = self.app.get('/secrets/', {'limit': limit})
+            self.assertEqual(200, get_resp.status_int)
+            for secret in get_resp.json['secrets']:
+                self.assertIn('content_types', secret)
+            counts.append(len(statements))
+
+        self.assertEqual(counts[0], counts[1])
+
     def test_empty_list_of_secrets(self):
         params = {'name': 'Austin Powers'}
 
@@ -314,6 +392,45 @@ class WhenGettingPuttingOrDeletingSecret(utils.BarbicanAPIBaseTestCase):
         self.assertEqual(200, get_resp.status_int)
         self.assertEqual(payload, get_resp.body)
 
+    def _get_payload_statements(self, path, headers):
+        resp, secret_uuid = create_secret(
+            self.app,
+            payload='a very interesting string',
+            content_type='text/plain'
+        )
+        self.assertEqual(201, resp.status_int)
+        repositories.clear()
+
+        statements = []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(' '.join(statement.split()))
+
+        sqlalchemy.event.listen(repositories._ENGINE, 'before_cursor_execute',
+                                record_statement)
+        self.addCleanup(sqlalchemy.event.remove, repositories._ENGINE,
+                        'before_cursor_execute', record_statement)
+
+        get_resp = self.app.get(path.format(secret_uuid), headers=headers)
+        self.assertEqual(200, get_resp.status_int)
+        self.assertEqual('a very interesting string', get_resp.body)
+        return statements
+
+    def _assert_payload_data_loaded_with_secret(self, statements):
+        for table in ('secret_store_metadata', 'encrypted_data'):
+            self.assertEqual([], [s for s in statements
+                                  if ' FROM {0} '.format(table) in s])
+
+    def test_get_secret_payload_loads_payload_data_with_secret(self):
+        statements = self._get_payload_statements(
+            '/secrets/{0}/payload', {'Accept': 'text/plain'})
+        self._assert_payload_data_loaded_with_secret(statements)
+
+    def test_get_secret_as_plain_loads_payload_data_with_secret(self):
+        statements = self._get_payload_statements(
+            '/secrets/{0}', {'Accept': 'text/plain'})
+        self._assert_payload_data_loaded_with_secret(statements)
+
     def test_get_secret_is_decoded_for_binary(self):
         payload = 'a123'
         resp, secret_uuid = create_secret(
@@ -607,6 +724,125 @@ class WhenGettingPuttingOrDeletingSecret(utils.BarbicanAPIBaseTestCase):
         self.assertEqual(204, delete_resp.status_int)
 
 
+class WhenGettingSecretPayloads(utils.BarbicanAPIBaseTestCase):
+
+    def _create_secrets(self, count):
+        secret_refs = []
+        for index in range(count):
+            resp, secret_uuid = create_secret(
+                self.app,
+                payload='payload {0}'.format(index),
+                content_type='text/plain'
+            )
+            self.assertEqual(201, resp.status_int)
+            secret_refs.append(resp.json['secret_ref'])
+        return secret_refs
+
+    def _get_payloads(self, secret_refs, expect_errors=False):
+        return self.app.post_json(
+            '/secrets/payloads',
+            {'secret_refs': secret_refs},
+            expect_errors=expect_errors
+        )
+
+    def test_should_get_payloads_in_request_order(self):
+        secret_refs = self._create_secrets(3)
+        secret_refs.reverse()
+
+        resp = self._get_payloads(secret_refs)
+
+        self.assertEqual(200, resp.status_int)
+        secrets = resp.json['secrets']
+        self.assertEqual(secret_refs,
+                         [secret['secret_ref'] for secret in secrets])
+        self.assertEqual(
+            ['payload 2', 'payload 1', 'payload 0'],
+            [base64.b64decode(secret['payload']) for secret in secrets])
+        for secret in secrets:
+            self.assertEqual('text/plain',
+                             secret['payload_content_type'])
+            self.assertEqual('base64', secret['payload_content_encoding'])
+
+    def test_should_get_binary_payload(self):
+        payload = base64.b64encode(b'\x01\x02\x03')
+        resp, secret_uuid = create_secret(
+            self.app,
+            payload=payload,
+            content_type='application/octet-stream',
+            content_encoding='base64'
+        )
+        self.assertEqual(201, resp.status_int)
+
+        resp = self._get_payloads([resp.json['secret_ref']])
+
+        self.assertEqual(200, resp.status_int)
+        secret = resp.json['secrets'][0]
+        self.assertEqual(payload, secret['payload'])
+        self.assertEqual('application/octet-stream',
+                         secret['payload_content_type'])
+
+    def test_should_unwrap_project_kek_once_per_request(self):
+        secret_refs = self._create_secrets(3)
+
+        get_kek = simple_crypto.SimpleCryptoPlugin._get_kek
+        with mock.patch.object(simple_crypto.SimpleCryptoPlugin, '_get_kek',
+                               autospec=True,
+                               side_effect=get_kek) as mocked_get_kek:
+            resp = self._get_payloads(secret_refs)
+
+        self.assertEqual(200, resp.status_int)
+        self.assertEqual(1, mocked_get_kek.call_count)
+
+    def test_query_count_does_not_grow_with_secret_count(self):
+        secret_refs = self._create_secrets(4)
+
+        def count_statements(refs):
+            statements = []
+
+            def before_cursor_execute(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            engine = repositories._ENGINE
+            sqlalchemy.event.listen(engine, 'before_cursor_execute',
+                                    before_cursor_execute)
+            try:
+                resp = self._get_payloads(refs)
+            finally:
+                sqlalchemy.event.remove(engine, 'before_cursor_execute',
+                                        before_cursor_execute)
+            self.assertEqual(200, resp.status_int)
+            return len(statements)
+
+        self.assertEqual(count_statements(secret_refs[:1]),
+                         count_statements(secret_refs))
+
+    def test_should_return_404_when_a_secret_is_missing(self):
+        secret_refs = self._create_secrets(1)
+        secret_refs.append(secret_refs[0].rsplit('/', 1)[0] + '/' +
+                           '5a0ab4f5-1db1-4d9a-8ae3-ae0e8e6c3c4b')
+
+        resp = self._get_payloads(secret_refs, expect_errors=True)
+
+        self.assertEqual(404, resp.status_int)
+
+    def test_should_return_400_for_duplicate_refs(self):
+        secret_refs = self._create_secrets(1)
+
+        resp = self._get_payloads(secret_refs * 2, expect_errors=True)
+
+        self.assertEqual(400, resp.status_int)
+
+    def test_should_return_400_for_empty_refs(self):
+        resp = self._get_payloads([], expect_errors=True)
+
+        self.assertEqual(400, resp.status_int)
+
+    def test_should_return_405_for_get(self):
+        resp = self.app.get('/secrets/payloads', expect_errors=True)
+
+        self.assertEqual(405, resp.status_int)
+
+
 @utils.parameterized_test_case
 class WhenPerformingUnallowedOperations(utils.BarbicanAPIBaseTestCase):
 
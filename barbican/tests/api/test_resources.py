@@ -380,7 +380,8 @@ class WhenGettingPuttingOrDeletingSecretUsingSecretResource(FunctionalTest):
         )
         self.secret_repo.get_secret_by_id.assert_called_once_with(
             entity_id=self.secret.id,
-            suppress_exception=True)
+            suppress_exception=True,
+            load_payload=False)
         self.assertEqual(200, resp.status_int)
 
         self.assertNotIn('content_encodings', resp.namespace)
@@ -403,7 +404,8 @@ class WhenGettingPuttingOrDeletingSecretUsingSecretResource(FunctionalTest):
 
         self.secret_repo.get_secret_by_id.assert_called_once_with(
             entity_id=self.secret.id,
-            suppress_exception=True)
+            suppress_exception=True,
+            load_payload=True)
         self.assertEqual(200, resp.status_int)
 
         self.assertEqual(data, resp.body)
@@ -430,7 +432,8 @@ class WhenGettingPuttingOrDeletingSecretUsingSecretResource(FunctionalTest):
 
         self.secret_repo.get_secret_by_id.assert_called_once_with(
             entity_id=self.secret.id,
-            suppress_exception=True)
+            suppress_exception=True,
+            load_payload=True)
         self.assertEqual(200, resp.status_int)
 
         self.assertEqual(data, resp.body)
@@ -459,7 +462,8 @@ class WhenGettingPuttingOrDeletingSecretUsingSecretResource(FunctionalTest):
 
         self.secret_repo.get_secret_by_id.assert_called_once_with(
             entity_id=self.secret.id,
-            suppress_exception=True)
+            suppress_exception=True,
+            load_payload=True)
         self.assertEqual(200, resp.status_int)
 
         self.assertEqual(data, resp.body)
@@ -487,7 +491,8 @@ class WhenGettingPuttingOrDeletingSecretUsingSecretResource(FunctionalTest):
 
         self.secret_repo.get_secret_by_id.assert_called_once_with(
             entity_id=self.secret.id,
-            suppress_exception=True)
+            suppress_exception=True,
+            load_payload=True)
         self.assertEqual(400, resp.status_int)
 
     @testcase.attr('deprecated')
@@ -507,7 +512,8 @@ class WhenGettingPuttingOrDeletingSecretUsingSecretResource(FunctionalTest):
 
         self.secret_repo.get_secret_by_id.assert_called_once_with(
             entity_id=self.secret.id,
-            suppress_exception=True)
+            suppress_exception=True,
+            load_payload=True)
         self.assertEqual(400, resp.status_int)
 
     @mock.patch('barbican.plugin.resources.get_transport_key_id_for_retrieval')
@@ -526,7 +532,8 @@ class WhenGettingPuttingOrDeletingSecretUsingSecretResource(FunctionalTest):
 
         self.secret_repo.get_secret_by_id.assert_called_once_with(
             entity_id=self.secret.id,
-            suppress_exception=True)
+            suppress_exception=True,
+            load_payload=False)
 
         self.assertEqual(200, resp.status_int)
 
@@ -553,7 +560,8 @@ class WhenGettingPuttingOrDeletingSecretUsingSecretResource(FunctionalTest):
 
         self.secret_repo.get_secret_by_id.assert_called_once_with(
             entity_id=self.secret.id,
-            suppress_exception=True)
+            suppress_exception=True,
+            load_payload=False)
 
         self.assertEqual(200, resp.status_int)
 
@@ -927,7 +935,9 @@ class WhenGettingOrDeletingConsumersUsingConsumerResource(FunctionalTest):
             self.container.id,
             limit_arg=None,
             offset_arg=0,
-            suppress_exception=True
+            suppress_exception=True,
+            marker_arg=None,
+            total_arg=None
         )
 
         self.assertEqual(self.consumer.name, resp.json['consumers'][0]['name'])
@@ -92,6 +92,11 @@ class OrderResource(TestableResource):
 class ContainerResource(TestableResource):
     controller_cls = containers.ContainerController
 
+    def payloads(self, req, resp, *args, **kwargs):
+        with mock.patch('pecan.request', req):
+            with mock.patch('pecan.response', resp):
+                return self.controller.payloads(*args, **kwargs)
+
 
 class ConsumersResource(TestableResource):
     controller_cls = consumers.ContainerConsumersController
@@ -692,6 +697,7 @@ class WhenTestingContainerResource(BaseTestCase):
                                      side_effect=self._generate_get_error())
         self.container_repo.get = fail_method
         self.container_repo.delete_entity_by_id = fail_method
+        self.container_repo.get_container_secrets = fail_method
 
         acl_read = models.ContainerACL(
             container_id=self.container_id, operation='read',
@@ -877,6 +883,68 @@ class WhenTestingContainerResource(BaseTestCase):
         self._assert_fail_rbac([None, 'bogus'],
                                self._invoke_on_get)
 
+    def test_should_pass_get_container_payloads(self):
+        self._assert_pass_rbac(['admin', 'observer', 'creator'],
+                               self._invoke_get_payloads,
+                               user_id=self.user_id,
+                               project_id=self.external_project_id)
+
+    def test_should_raise_get_container_payloads_for_audit(self):
+        self.acl_list.pop()  # remove read acl from default setup
+        self._assert_fail_rbac(['audit'],
+                               self._invoke_get_payloads,
+                               user_id=self.user_id,
+                               project_id=self.external_project_id)
+
+    def test_should_pass_get_container_payloads_with_read_acl(self):
+        self._assert_pass_rbac(['admin', 'observer', 'creator', 'audit'],
+                               self._invoke_get_payloads,
+                               user_id=self.user_id,
+                               project_id='different_id')
+
+    def test_should_raise_get_container_payloads_for_different_project(self):
+        self.acl_list.pop()  # remove read acl from default setup
+        self._assert_fail_rbac(['admin', 'observer', 'creator', 'audit'],
+                               self._invoke_get_payloads,
+                               user_id=self.user_id,
+                               project_id='different_id')
+
+    def _set_private_member_secret(self, acl_user_ids):
+        secret = mock.MagicMock()
+        secret.secret_acls = [models.SecretACL(
+            secret_id='12345secretMember', operation='read',
+            project_access=False, user_ids=acl_user_ids)]
+        secret.project.external_id = self.external_project_id
+        secret.creator_id = 'secretCreatorUser'
+        self.container_repo.get_container_secrets = mock.MagicMock(
+            return_value=[('member', secret)])
+
+        # Force an error once member decryption passes RBAC.
+        patcher = mock.patch('barbican.plugin.resources.get_secrets',
+                             side_effect=self._generate_get_error())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_should_raise_get_container_payloads_for_private_member(self):
+        """Member secrets are authorized on their own ACLs.
+
+        The container creator may decrypt the container, but not a private
+        member secret whose read ACL doesn't list them.
+        """
+        self._set_private_member_secret(['anyRandomUserX', 'aclUser1'])
+        self._assert_fail_rbac(['creator'],
+                               self._invoke_get_payloads,
+                               user_id=self.creator_user_id,
+                               project_id=self.external_project_id)
+
+    def test_should_pass_get_container_payloads_for_private_member_acl(self):
+        self._set_private_member_secret(['anyRandomUserX',
+                                         self.creator_user_id])
+        self._assert_pass_rbac(['creator'],
+                               self._invoke_get_payloads,
+                               user_id=self.creator_user_id,
+                               project_id=self.external_project_id)
+
     def test_should_pass_delete_container(self):
         self._assert_pass_rbac(['admin'], self._invoke_on_delete,
                                user_id=self.user_id,
@@ -900,6 +968,10 @@ class WhenTestingContainerResource(BaseTestCase):
     def _invoke_on_delete(self):
         self.resource.on_delete(self.req, self.resp)
 
+    def _invoke_get_payloads(self):
+        self.req.method = 'GET'
+        self.resource.payloads(self.req, self.resp)
+
 
 class WhenTestingOrdersResource(BaseTestCase):
     """RBAC tests for the barbican.api.resources.OrdersResource class."""
@@ -32,3 +32,33 @@ class WhenTestingGetContainerID(test_utils.BaseTestCase):
         self.assertRaises(IndexError,
                           hrefs.get_container_id_from_ref,
                           test_ref)
+
+
+class WhenTestingAddNavHrefs(test_utils.BaseTestCase):
+
+    def test_offset_paging_adds_previous_and_next(self):
+        data = hrefs.add_nav_hrefs('secrets', 10, 10, 30, {})
+
+        self.assertIn('offset=0', data['previous'])
+        self.assertIn('offset=20', data['next'])
+
+    def test_marker_paging_adds_next(self):
+        data = hrefs.add_nav_hrefs('secrets', 0, 10, 30, {},
+                                   marker_paging=True,
+                                   next_marker='last_id')
+
+        self.assertNotIn('previous', data)
+        self.assertIn('limit=10&marker=last_id', data['next'])
+
+    def test_marker_paging_on_last_page(self):
+        data = hrefs.add_nav_hrefs('secrets', 0, 10, 30, {},
+                                   marker_paging=True,
+                                   next_marker=None)
+
+        self.assertEqual({}, data)
+
+    def test_offset_paging_without_total(self):
+        data = hrefs.add_nav_hrefs('secrets', 0, 10, None, {},
+                                   next_marker='last_id')
+
+        self.assertIn('offset=10', data['next'])
@@ -0,0 +1,88 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+
+import mock
+from oslo_policy import opts
+from oslo_policy import policy as oslo_policy
+
+from barbican.common import config
+from barbican.common import policy
+from barbican import context
+from barbican.tests import utils
+
+
+class WhenTestingSharedPolicyEnforcer(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenTestingSharedPolicyEnforcer, self).setUp()
+        policy.reset()
+        self.addCleanup(policy.reset)
+
+        fd, self.policy_file = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, self.policy_file)
+        self._write_policy({'secret:get': '@'}, mtime=1000)
+
+        opts.set_defaults(config.CONF)
+        config.CONF.set_override('policy_file', self.policy_file,
+                                 group='oslo_policy')
+        self.addCleanup(config.CONF.clear_override, 'policy_file',
+                        group='oslo_policy')
+
+        self.creds = {'roles': [], 'user': None, 'project': None}
+
+    def _write_policy(self, rules, mtime):
+        with open(self.policy_file, 'w') as policy_file:
+            json.dump(rules, policy_file)
+        os.utime(self.policy_file, (mtime, mtime))
+
+    def test_should_share_enforcer_between_contexts(self):
+        ctx1 = context.RequestContext(project='project1')
+        ctx2 = context.RequestContext(project='project2')
+
+        self.assertIs(policy.get_enforcer(), ctx1.policy_enforcer)
+        self.assertIs(ctx1.policy_enforcer, ctx2.policy_enforcer)
+
+    def test_should_use_enforcer_given_to_context(self):
+        enforcer = mock.MagicMock()
+        ctx = context.RequestContext(policy_enforcer=enforcer)
+
+        self.assertIs(enforcer, ctx.policy_enforcer)
+
+    def test_should_parse_unchanged_policy_file_once(self):
+        enforcer = policy.get_enforcer()
+        with mock.patch.object(oslo_policy.Rules, 'load_json',
+                               wraps=oslo_policy.Rules.load_json) as mock_load:
+            for _ in range(3):
+                self.assertTrue(enforcer.enforce('secret:get', {},
+                                                 self.creds))
+
+        self.assertEqual(1, mock_load.call_count)
+
+    def test_should_reload_policy_file_when_modified(self):
+        enforcer = policy.get_enforcer()
+        self.assertTrue(enforcer.enforce('secret:get', {}, self.creds))
+
+        self._write_policy({'secret:get': '!'}, mtime=2000)
+
+        self.assertFalse(enforcer.enforce('secret:get', {}, self.creds))
+
+    def test_reset_should_create_new_enforcer(self):
+        enforcer = policy.get_enforcer()
+        policy.reset()
+
+        self.assertIsNot(enforcer, policy.get_enforcer())
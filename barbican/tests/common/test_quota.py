@@ -15,9 +15,13 @@
 
 import unittest
 
+import mock
+
+from barbican.common import config
 from barbican.common import exception as excep
 from barbican.common import quota
 from barbican.model import models
+from barbican.model import repositories
 from barbican.tests import database_utils
 
 
@@ -202,7 +206,7 @@ class DummyRepoForTestingQuotaEnforcement(object):
     def __init__(self, get_count_return_value):
         self.get_count_return_value = get_count_return_value
 
-    def get_count(self, internal_project_id):
+    def get_approximate_count(self, internal_project_id):
         return self.get_count_return_value
 
 
@@ -284,6 +288,91 @@ class WhenTestingQuotaEnforcingFunctions(database_utils.RepositoryTestCase):
         self.assertIn('secrets', exception.message)
         self.assertIn(str(5), exception.message)
 
+    def test_should_not_count_when_unlimited(self):
+        test_repo = mock.MagicMock()
+        quota_enforcer = quota.QuotaEnforcer('secrets', test_repo)
+        quota_enforcer.enforce(self.project)
+        self.assertFalse(test_repo.get_approximate_count.called)
+        self.assertFalse(test_repo.get_count.called)
+
+    def test_should_enforce_using_project_usage_counter(self):
+        project = database_utils.create_project(
+            external_id=self.project.external_id)
+        secret_repo = repositories.get_secret_repository()
+        quota_enforcer = quota.QuotaEnforcer('secrets', secret_repo)
+        self.quota_driver.set_project_quotas(project.external_id,
+                                             {'secrets': 2})
+
+        for _ in range(2):
+            quota_enforcer.enforce(project)
+            secret_repo.create_from(models.Secret({'project_id': project.id}))
+        usages_repo = repositories.get_project_usages_repository()
+        self.assertEqual(2, usages_repo.get_usage(project.id, 'secrets'))
+
+        with mock.patch.object(secret_repo, 'get_count') as mock_get_count:
+            self.assertRaises(excep.QuotaReached,
+                              quota_enforcer.enforce, project)
+        self.assertFalse(mock_get_count.called)
+
+
+class WhenTestingEffectiveQuotasCache(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenTestingEffectiveQuotasCache, self).setUp()
+        self.quota_driver = quota.QuotaDriver()
+        self.project = models.Project()
+        self.project.id = 'my_internal_id'
+        self.project.external_id = 'my_keystone_id'
+        self.quota_enforcer = quota.QuotaEnforcer(
+            'secrets', DummyRepoForTestingQuotaEnforcement(5))
+
+    def _count_quota_lookups(self):
+        return mock.patch.object(
+            self.quota_driver.repo, 'get_by_external_project_id',
+            wraps=self.quota_driver.repo.get_by_external_project_id)
+
+    def test_should_look_up_quotas_once(self):
+        self.quota_enforcer.quota_driver = self.quota_driver
+        with self._count_quota_lookups() as mock_lookup:
+            self.quota_enforcer.enforce(self.project)
+            self.quota_enforcer.enforce(self.project)
+        self.assertEqual(1, mock_lookup.call_count)
+
+    def test_should_enforce_quotas_set_after_caching(self):
+        self.quota_enforcer.enforce(self.project)
+        self.quota_driver.set_project_quotas(self.project.external_id,
+                                             {'secrets': 5})
+        self.assertRaises(excep.QuotaReached,
+                          self.quota_enforcer.enforce, self.project)
+
+    def test_should_drop_quotas_deleted_after_caching(self):
+        self.quota_driver.set_project_quotas(self.project.external_id,
+                                             {'secrets': 5})
+        self.assertRaises(excep.QuotaReached,
+                          self.quota_enforcer.enforce, self.project)
+        self.quota_driver.delete_project_quotas(self.project.external_id)
+        self.quota_enforcer.enforce(self.project)
+
+    def test_should_not_cache_when_ttl_is_zero(self):
+        config.CONF.set_override('quota_cache_ttl_seconds', 0,
+                                 group='quotas')
+        self.addCleanup(config.CONF.clear_override,
+                        'quota_cache_ttl_seconds', group='quotas')
+        self.quota_enforcer.quota_driver = self.quota_driver
+        with self._count_quota_lookups() as mock_lookup:
+            self.quota_enforcer.enforce(self.project)
+            self.quota_enforcer.enforce(self.project)
+        self.assertEqual(2, mock_lookup.call_count)
+
+    def test_should_expire_cached_quotas(self):
+        self.quota_enforcer.quota_driver = self.quota_driver
+        with self._count_quota_lookups() as mock_lookup:
+            self.quota_enforcer.enforce(self.project)
+            with mock.patch.object(quota.time, 'time',
+                                   return_value=quota.time.time() + 3600):
+                self.quota_enforcer.enforce(self.project)
+        self.assertEqual(2, mock_lookup.call_count)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -17,6 +17,8 @@ import base64
 import datetime
 import unittest
 
+import jsonschema
+import mock
 import testtools
 
 from barbican.common import exception as excep
@@ -111,6 +113,58 @@ class WhenTestingValidatorsFunctions(utils.BaseTestCase):
         self.assertTrue(is_too_big)
 
 
+class WhenTestingCompiledSchemaValidators(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenTestingCompiledSchemaValidators, self).setUp()
+        patcher = mock.patch.dict(validators._SCHEMA_VALIDATORS, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_should_share_compiled_validator_between_instances(self):
+        with mock.patch.object(jsonschema.Draft4Validator, 'check_schema',
+                               wraps=jsonschema.Draft4Validator.check_schema
+                               ) as check_schema:
+            for _ in range(3):
+                validator = validators.NewSecretValidator()
+                validator.validate({'name': 'secret'})
+                validator.validate({'name': 'another secret'})
+
+        self.assertEqual(1, check_schema.call_count)
+        self.assertIs(
+            validators.NewSecretValidator()._get_schema_validator(),
+            validators.NewSecretValidator()._get_schema_validator())
+
+    def test_should_compile_validator_per_class(self):
+        secret_validator = validators.NewSecretValidator()
+        consumer_validator = validators.ContainerConsumerValidator()
+
+        self.assertIsNot(secret_validator._get_schema_validator(),
+                         consumer_validator._get_schema_validator())
+
+    def test_should_recompile_validator_when_schema_differs(self):
+        validator = validators.SecretPayloadsValidator()
+        compiled = validator._get_schema_validator()
+
+        changed_validator = validators.SecretPayloadsValidator()
+        changed_validator.schema['properties']['secret_refs']['maxItems'] = 1
+
+        self.assertIsNot(compiled, changed_validator._get_schema_validator())
+        self.assertRaises(
+            excep.InvalidObject,
+            changed_validator.validate,
+            {'secret_refs': ['first', 'second']}
+        )
+        validator.validate({'secret_refs': ['first', 'second']})
+
+    def test_should_raise_for_invalid_schema(self):
+        validator = validators.ContainerConsumerValidator()
+        validator.schema = {'type': 'object', 'required': 'name'}
+
+        self.assertRaises(jsonschema.SchemaError, validator.validate,
+                          {'name': 'consumer'})
+
+
 @utils.parameterized_test_case
 class WhenTestingSecretValidator(utils.BaseTestCase):
 
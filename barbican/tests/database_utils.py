@@ -19,6 +19,7 @@ break the DevStack functional test discovery process.
 """
 import oslotest.base as oslotest
 
+from barbican.common import quota
 from barbican.model import models
 from barbican.model import repositories
 
@@ -33,6 +34,9 @@ def setup_in_memory_db():
     # database can be removed prior to starting the next test run.
     repositories.hard_reset()
 
+    # Quotas cached for the previous database must not leak into this one.
+    quota.invalidate_effective_quotas()
+
     # Start the in-memory database, creating required tables.
     repositories.start()
 
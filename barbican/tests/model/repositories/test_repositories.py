@@ -93,6 +93,29 @@ class WhenCleaningRepositoryPagingParameters(utils.BaseTestCase):
         self.assertEqual(self.CONF.max_limit_paging, clean_limit)
 
 
+class WhenCleaningRepositoryTotalValues(utils.BaseTestCase):
+
+    def test_total_not_assigned(self):
+        self.assertEqual(config.CONF.default_list_total,
+                         repositories.clean_total_value())
+
+    def test_total_as_true(self):
+        self.assertEqual(repositories.TOTAL_EXACT,
+                         repositories.clean_total_value('True'))
+
+    def test_total_as_approx(self):
+        self.assertEqual(repositories.TOTAL_APPROX,
+                         repositories.clean_total_value('approx'))
+
+    def test_total_as_false(self):
+        self.assertEqual(repositories.TOTAL_NONE,
+                         repositories.clean_total_value('false'))
+
+    def test_total_as_unknown_value(self):
+        self.assertEqual(config.CONF.default_list_total,
+                         repositories.clean_total_value('maybe'))
+
+
 class WhenInvokingExceptionMethods(utils.BaseTestCase):
 
     def setUp(self):
@@ -197,6 +220,140 @@ class WhenTestingBaseRepository(database_utils.RepositoryTestCase):
             "Invalid status 'BOGUS_STATUS' for Entity.",
             exception_result.message)
 
+    def test_should_raise_duplicate_flushing_staged_duplicates(self):
+        project_repo = repositories.get_project_repository()
+        for _ in range(2):
+            project = models.Project()
+            project.external_id = 'my keystone id'
+            project_repo.create_from(project, flush=False)
+
+        exception_result = self.assertRaises(
+            exception.Duplicate,
+            repositories.flush,
+            'Project')
+
+        self.assertEqual(
+            "Entity 'Project' already exists",
+            exception_result.message)
+
+
+class WhenBulkDeletingProjectEntities(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenBulkDeletingProjectEntities, self).setUp()
+        self.session = repositories.get_session()
+        self.project = database_utils.create_project(session=self.session)
+        self.other_project = database_utils.create_project(
+            external_id='other keystone id', session=self.session)
+        self.secret_repo = repositories.get_secret_repository()
+        self.container_repo = repositories.get_container_repository()
+
+    def _create_secret(self, project, container=None):
+        secret = models.Secret()
+        secret.project_id = project.id
+        secret.secret_store_metadata['plugin_name'] = (
+            models.SecretStoreMetadatum('plugin_name', 'store_crypto'))
+        self.secret_repo.create_from(secret, session=self.session)
+
+        kek_datum = models.KEKDatum()
+        kek_datum.plugin_name = 'crypto'
+        kek_datum.project_id = project.id
+        kek_datum.save(session=self.session)
+
+        datum = models.EncryptedDatum(secret, kek_datum)
+        datum.cypher_text = 'c2VjcmV0'
+        datum.save(session=self.session)
+
+        models.SecretACL(secret.id, 'read', user_ids=['user1']).save(
+            session=self.session)
+
+        if container:
+            container_secret = models.ContainerSecret()
+            container_secret.container_id = container.id
+            container_secret.secret_id = secret.id
+            container_secret.save(session=self.session)
+        return secret
+
+    def _create_container(self, project):
+        container = models.Container()
+        container.project_id = project.id
+        self.container_repo.create_from(container, session=self.session)
+        models.ContainerACL(container.id, 'read', user_ids=['user1']).save(
+            session=self.session)
+        return container
+
+    def _count(self, model, **filters):
+        return self.session.query(model).filter_by(**filters).count()
+
+    def test_should_delete_secrets_and_children_in_chunks(self):
+        secret_ids = [self._create_secret(self.project).id
+                      for _ in range(5)]
+        other_secret = self._create_secret(self.other_project)
+
+        with mock.patch.object(self.session, 'commit',
+                               wraps=self.session.commit) as mock_commit:
+            deleted = self.secret_repo.bulk_delete_project_entities(
+                self.project.id, 2, session=self.session)
+
+        self.assertEqual(5, deleted)
+        self.assertEqual(3, mock_commit.call_count)
+        self.assertEqual(0, self.secret_repo.get_count(self.project.id))
+        self.assertEqual(1, self.secret_repo.get_count(self.other_project.id))
+
+        for secret_id in secret_ids:
+            secret = self.session.query(models.Secret).get(secret_id)
+            self.assertTrue(secret.deleted)
+            self.assertIsNotNone(secret.deleted_at)
+            self.assertEqual(0, self._count(models.SecretACL,
+                                            secret_id=secret_id))
+            self.assertEqual(0, self._count(models.SecretStoreMetadatum,
+                                            secret_id=secret_id,
+                                            deleted=False))
+            self.assertEqual(0, self._count(models.EncryptedDatum,
+                                            secret_id=secret_id,
+                                            deleted=False))
+        self.assertEqual(1, self._count(models.SecretACLUser))
+
+        self.assertFalse(self.session.query(models.Secret).get(
+            other_secret.id).deleted)
+        self.assertEqual(1, self._count(models.SecretStoreMetadatum,
+                                        secret_id=other_secret.id,
+                                        deleted=False))
+
+    def test_should_delete_containers_and_their_secret_links(self):
+        container = self._create_container(self.project)
+        secret = self._create_secret(self.project, container=container)
+
+        deleted = self.container_repo.bulk_delete_project_entities(
+            self.project.id, 1000, session=self.session)
+
+        self.assertEqual(1, deleted)
+        self.assertEqual(0, self.container_repo.get_count(self.project.id))
+        self.assertEqual(0, self._count(models.ContainerSecret))
+        self.assertEqual(0, self._count(models.ContainerACL))
+        self.assertEqual(0, self._count(models.ContainerACLUser))
+        self.assertEqual(1, self.secret_repo.get_count(self.project.id))
+        self.assertEqual(1, self._count(models.SecretACL,
+                                        secret_id=secret.id))
+
+    def test_should_delete_nothing_for_project_without_entities(self):
+        with mock.patch.object(self.session, 'commit') as mock_commit:
+            deleted = self.secret_repo.bulk_delete_project_entities(
+                'no such project', 2, session=self.session)
+
+        self.assertEqual(0, deleted)
+        self.assertFalse(mock_commit.called)
+
+    def test_should_raise_barbican_exception_on_db_error(self):
+        self._create_secret(self.project)
+
+        with mock.patch.object(
+                self.secret_repo, '_do_bulk_delete_children',
+                side_effect=sqlalchemy.exc.SQLAlchemyError):
+            self.assertRaises(exception.BarbicanException,
+                              self.secret_repo.bulk_delete_project_entities,
+                              self.project.id, 2, session=self.session)
+
 
 class WhenTestingWrapDbError(utils.BaseTestCase):
 
@@ -378,3 +535,14 @@ class WhenIncreasingRepositoryTestCoverage(utils.BaseTestCase):
         dummy_repo = DummyRepo()
         count = dummy_repo.get_project_entities('dummy_project_id')
         self.assertEqual([], count)
+
+
+class WhenGettingRepositorySingletons(utils.BaseTestCase):
+
+    def test_should_return_same_repository_instance(self):
+        getters = [getattr(repositories, name) for name in dir(repositories)
+                   if name.startswith('get_') and
+                   name.endswith('_repository')]
+        self.assertEqual(20, len(getters))
+        for getter in getters:
+            self.assertIs(getter(), getter())
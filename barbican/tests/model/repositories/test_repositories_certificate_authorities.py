@@ -96,6 +96,23 @@ class WhenTestingCertificateAuthorityRepo(database_utils.RepositoryTestCase):
         self.assertEqual(10, limit)
         self.assertEqual(1, total)
 
+    def test_get_by_create_date_with_marker(self):
+        session = self.ca_repo.get_session()
+        ca1 = self._add_ca(self.parsed_ca, session)
+        ca2 = self._add_ca(self.parsed_ca2, session)
+        session.commit()
+
+        for restrict_to_project_cas in (False, True):
+            retrieved_cas, offset, limit, total = (
+                self.ca_repo.get_by_create_date(
+                    session=session,
+                    marker_arg=ca1.id,
+                    restrict_to_project_cas=restrict_to_project_cas,
+                    suppress_exception=True))
+            self.assertEqual([ca2.id], [s.id for s in retrieved_cas])
+            self.assertEqual(0, offset)
+            self.assertEqual(2, total)
+
     def test_get_by_create_date_nothing(self):
         session = self.ca_repo.get_session()
         retrieved_cas, offset, limit, total = self.ca_repo.get_by_create_date(
@@ -67,6 +67,30 @@ class WhenTestingOrderRepository(database_utils.RepositoryTestCase):
 
         self.assertEqual(order.id, order_from_get.id)
 
+    def test_get_by_create_date_with_marker(self):
+        session = self.repo.get_session()
+
+        project = models.Project()
+        project.external_id = "my keystone id"
+        project.save(session=session)
+
+        orders = []
+        for _ in range(3):
+            order = models.Order()
+            order.project_id = project.id
+            orders.append(self.repo.create_from(order, session=session))
+        session.commit()
+
+        entities, offset, limit, total = self.repo.get_by_create_date(
+            "my keystone id",
+            marker_arg=orders[0].id,
+            session=session)
+
+        self.assertEqual([o.id for o in orders[1:]],
+                         [o.id for o in entities])
+        self.assertEqual(0, offset)
+        self.assertEqual(3, total)
+
     def test_should_get_count_zero(self):
         session = self.repo.get_session()
 
@@ -0,0 +1,104 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+
+from barbican.model import models
+from barbican.model import repositories
+from barbican.tests import database_utils
+
+
+class WhenTestingProjectUsagesRepo(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenTestingProjectUsagesRepo, self).setUp()
+        self.usages_repo = repositories.ProjectUsagesRepo()
+        self.secret_repo = repositories.SecretRepo()
+
+        self.session = self.usages_repo.get_session()
+
+        self.project = models.Project()
+        self.project.external_id = "my keystone id"
+        self.project.save(session=self.session)
+
+    def _create_secret(self):
+        secret_model = models.Secret()
+        secret_model.project_id = self.project.id
+        return self.secret_repo.create_from(secret_model,
+                                            session=self.session)
+
+    def test_usage_is_none_until_seeded(self):
+        self._create_secret()
+
+        self.assertIsNone(self.usages_repo.get_usage(
+            self.project.id, 'secrets', session=self.session))
+
+    def test_approximate_count_seeds_usage(self):
+        self._create_secret()
+        self._create_secret()
+
+        count = self.secret_repo.get_approximate_count(
+            self.project.id, session=self.session)
+
+        self.assertEqual(2, count)
+        self.assertEqual(2, self.usages_repo.get_usage(
+            self.project.id, 'secrets', session=self.session))
+        self.assertIsNone(self.usages_repo.get_usage(
+            self.project.id, 'orders', session=self.session))
+
+    def test_usage_follows_creates_and_deletes(self):
+        self.secret_repo.get_approximate_count(self.project.id,
+                                               session=self.session)
+
+        secret = self._create_secret()
+        self._create_secret()
+        self.assertEqual(2, self.usages_repo.get_usage(
+            self.project.id, 'secrets', session=self.session))
+
+        self.secret_repo.delete_entity_by_id(
+            secret.id, "my keystone id", session=self.session)
+        self.assertEqual(1, self.secret_repo.get_approximate_count(
+            self.project.id, session=self.session))
+
+    def test_delete_project_entities(self):
+        self.secret_repo.get_approximate_count(self.project.id,
+                                               session=self.session)
+
+        self.usages_repo.delete_project_entities(self.project.id,
+                                                 session=self.session)
+
+        self.assertIsNone(self.usages_repo.get_usage(
+            self.project.id, 'secrets', session=self.session))
+
+    def test_set_usage_updates_counters_created_concurrently(self):
+        self._create_secret()
+        usages = models.ProjectUsages(self.project.id)
+        usages.orders = 3
+        usages.save(session=self.session)
+        self.session.commit()
+
+        # Have the update miss the counters, as if another request created
+        # them right after it.
+        real_query = self.usages_repo._build_get_project_entities_query
+        with mock.patch.object(
+                self.usages_repo, '_build_get_project_entities_query',
+                side_effect=[real_query('other project', self.session),
+                             real_query(self.project.id, self.session)]):
+            self.usages_repo.set_usage(self.project.id, 'secrets', 1,
+                                       session=self.session)
+
+        self.assertEqual(1, self.usages_repo.get_usage(
+            self.project.id, 'secrets', session=self.session))
+        self.assertEqual(3, self.usages_repo.get_usage(
+            self.project.id, 'orders', session=self.session))
+        self.assertEqual(1, self.secret_repo.get_count(
+            self.project.id, session=self.session))
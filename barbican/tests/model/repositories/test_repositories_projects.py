@@ -10,7 +10,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sqlalchemy
+
 from barbican.common import exception
+from barbican.common import resources
 from barbican.model import models
 from barbican.model import repositories
 from barbican.tests import database_utils
@@ -47,3 +50,82 @@ class WhenTestingProjectRepository(database_utils.RepositoryTestCase):
             "my keystone id",
             session=session,
             suppress_exception=False)
+
+
+class WhenCachingProjects(database_utils.RepositoryTestCase):
+
+    def setUp(self):
+        super(WhenCachingProjects, self).setUp()
+        self.repo = repositories.get_project_repository()
+        self.statements = []
+        sqlalchemy.event.listen(repositories._ENGINE, 'before_cursor_execute',
+                                self._record_statement)
+        self.addCleanup(sqlalchemy.event.remove, repositories._ENGINE,
+                        'before_cursor_execute', self._record_statement)
+
+    def _record_statement(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def _create_project(self, external_id):
+        project = models.Project()
+        project.external_id = external_id
+        project.status = models.States.ACTIVE
+        self.repo.create_from(project)
+        repositories.commit()
+        return project.id
+
+    def test_should_find_cached_project_without_query(self):
+        project_id = self._create_project('my keystone id')
+        self.repo.find_by_external_project_id('my keystone id')
+        repositories.clear()
+
+        del self.statements[:]
+        project = self.repo.find_by_external_project_id('my keystone id')
+
+        self.assertEqual(project_id, project.id)
+        self.assertEqual('my keystone id', project.external_id)
+        self.assertEqual([], self.statements)
+
+    def test_should_get_project_id_from_negative_entry_without_query(self):
+        self.assertIsNone(self.repo.get_project_id('my keystone id'))
+
+        del self.statements[:]
+        self.assertIsNone(self.repo.get_project_id('my keystone id'))
+        self.assertEqual([], self.statements)
+
+    def test_should_not_trust_negative_entry_when_finding_project(self):
+        self.assertIsNone(self.repo.get_project_id('my keystone id'))
+        project_id = self._create_project('my keystone id')
+
+        project = self.repo.find_by_external_project_id('my keystone id')
+        self.assertEqual(project_id, project.id)
+
+    def test_should_drop_negative_entry_on_create(self):
+        self.assertIsNone(self.repo.get_project_id('my keystone id'))
+
+        project = resources.get_or_create_project('my keystone id')
+
+        self.assertEqual(project.id,
+                         self.repo.get_project_id('my keystone id'))
+
+    def test_should_query_again_after_invalidation(self):
+        self._create_project('my keystone id')
+        self.repo.get_project_id('my keystone id')
+
+        repositories.invalidate_project_cache('my keystone id')
+        del self.statements[:]
+        self.repo.get_project_id('my keystone id')
+
+        self.assertEqual(1, len(self.statements))
+
+    def test_should_not_cache_when_disabled(self):
+        repositories.CONF.set_override('project_cache_ttl_seconds', 0)
+        self.addCleanup(repositories.CONF.clear_override,
+                        'project_cache_ttl_seconds')
+        self._create_project('my keystone id')
+        self.repo.get_project_id('my keystone id')
+
+        del self.statements[:]
+        self.repo.get_project_id('my keystone id')
+
+        self.assertEqual(1, len(self.statements))
@@ -10,6 +10,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_utils import timeutils
+import sqlalchemy
+
 from barbican.common import exception
 from barbican.model import models
 from barbican.model import repositories
@@ -134,6 +137,151 @@ class WhenTestingSecretRepository(database_utils.RepositoryTestCase):
         self.assertEqual(10, limit)
         self.assertEqual(1, total)
 
+    def test_get_by_create_date_with_marker(self):
+        session = self.repo.get_session()
+
+        project = models.Project()
+        project.external_id = "my keystone id"
+        project.save(session=session)
+
+        # Secrets sharing a creation time are still paged in a stable order.
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        secret_ids = []
+        for _ in range(5):
+            secret_model = models.Secret()
+            secret_model.project_id = project.id
+            secret_ids.append(
+                self.repo.create_from(secret_model, session=session).id)
+        session.commit()
+
+        paged_ids = []
+        marker = ''
+        while marker is not None:
+            secrets, offset, limit, total = self.repo.get_by_create_date(
+                "my keystone id",
+                limit_arg=2,
+                marker_arg=marker,
+                session=session,
+            )
+            self.assertEqual(0, offset)
+            self.assertEqual(5, total)
+            paged_ids.extend(s.id for s in secrets)
+            marker = secrets[-1].id if len(secrets) == limit else None
+
+        self.assertEqual(sorted(secret_ids), paged_ids)
+
+    def test_get_by_create_date_with_unknown_marker(self):
+        session = self.repo.get_session()
+
+        self.assertRaises(
+            exception.InvalidMarker,
+            self.repo.get_by_create_date,
+            "my keystone id",
+            marker_arg="invalid_id",
+            session=session,
+            suppress_exception=True)
+
+    def test_get_by_create_date_with_marker_of_other_project(self):
+        session = self.repo.get_session()
+
+        projects = []
+        for external_id in ("my keystone id", "other keystone id"):
+            project = models.Project()
+            project.external_id = external_id
+            project.save(session=session)
+            projects.append(project)
+
+        secret_model = models.Secret()
+        secret_model.project_id = projects[1].id
+        other_secret = self.repo.create_from(secret_model, session=session)
+        session.commit()
+
+        self.assertRaises(
+            exception.InvalidMarker,
+            self.repo.get_by_create_date,
+            "my keystone id",
+            marker_arg=other_secret.id,
+            session=session,
+            suppress_exception=True)
+
+    def test_get_by_create_date_without_total(self):
+        session = self.repo.get_session()
+
+        project = models.Project()
+        project.external_id = "my keystone id"
+        project.save(session=session)
+
+        secret_model = models.Secret()
+        secret_model.project_id = project.id
+        secret = self.repo.create_from(secret_model, session=session)
+        session.commit()
+
+        secrets, offset, limit, total = self.repo.get_by_create_date(
+            "my keystone id",
+            total_arg='false',
+            session=session,
+        )
+
+        self.assertEqual([secret.id], [s.id for s in secrets])
+        self.assertIsNone(total)
+
+    def test_get_by_create_date_with_approximate_total(self):
+        session = self.repo.get_session()
+
+        project = models.Project()
+        project.external_id = "my keystone id"
+        project.save(session=session)
+
+        for name in ('name1', 'name2'):
+            secret_model = models.Secret({'name': name})
+            secret_model.project_id = project.id
+            self.repo.create_from(secret_model, session=session)
+        session.commit()
+
+        _, _, _, total = self.repo.get_by_create_date(
+            "my keystone id", total_arg='approx', session=session)
+        self.assertEqual(2, total)
+        usages_repo = repositories.get_project_usages_repository()
+        self.assertEqual(2, usages_repo.get_usage(project.id, 'secrets',
+                                                  session=session))
+
+        # Filtered listings are still counted exactly.
+        _, _, _, total = self.repo.get_by_create_date(
+            "my keystone id", name='name1', total_arg='approx',
+            session=session)
+        self.assertEqual(1, total)
+
+    def test_get_by_create_date_does_not_load_encrypted_data(self):
+        session = self.repo.get_session()
+        project = database_utils.create_project(session=session)
+
+        secret_model = models.Secret()
+        secret_model.project_id = project.id
+        self.repo.create_from(secret_model, session=session)
+
+        kek_datum = models.KEKDatum()
+        kek_datum.project_id = project.id
+        kek_datum.plugin_name = 'plugin'
+        kek_datum.save(session=session)
+        datum = models.EncryptedDatum(secret_model, kek_datum)
+        datum.cypher_text = 'cypher text'
+        datum.save(session=session)
+        session.commit()
+        session.expunge_all()
+
+        secrets, _, _, _ = self.repo.get_by_create_date(
+            "my keystone id", session=session)
+
+        self.assertIn('encrypted_data',
+                      sqlalchemy.inspect(secrets[0]).unloaded)
+
+        # The payload path loads the data along with its KEK.
+        encrypted_data = secrets[0].encrypted_data
+        self.assertEqual('cypher text', encrypted_data[0].cypher_text)
+        self.assertNotIn('kek_meta_project',
+                         sqlalchemy.inspect(encrypted_data[0]).unloaded)
+
     def test_get_by_create_date_nothing(self):
         session = self.repo.get_session()
         secrets, offset, limit, total = self.repo.get_by_create_date(
@@ -134,6 +134,26 @@ class WhenTestingSimpleCryptoPlugin(utils.BaseTestCase):
             mock.MagicMock(),
         )
 
+    def test_decrypt_batch(self):
+        kek_meta_dto = self._get_mocked_kek_meta_dto()
+        secrets = [b'first_secret', b'second_secret']
+        decrypt_requests = []
+        for unencrypted in secrets:
+            response_dto = self.plugin.encrypt(plugin.EncryptDTO(unencrypted),
+                                               kek_meta_dto,
+                                               mock.MagicMock())
+            decrypt_requests.append(
+                (plugin.DecryptDTO(response_dto.cypher_text), None))
+
+        with mock.patch.object(self.plugin, '_get_kek',
+                               wraps=self.plugin._get_kek) as get_kek:
+            decrypted = self.plugin.decrypt_batch(decrypt_requests,
+                                                  kek_meta_dto,
+                                                  mock.MagicMock())
+
+        self.assertEqual(secrets, decrypted)
+        self.assertEqual(1, get_kek.call_count)
+
     def test_byte_string_encryption(self):
         unencrypted = b'some_secret'
         encrypt_dto = plugin.EncryptDTO(unencrypted)
@@ -11,7 +11,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import mock
+
+from barbican.common import utils as common_utils
+from barbican.plugin.crypto import crypto
 from barbican.plugin.crypto import manager
+from barbican.plugin.interface import secret_store
 from barbican.tests import utils
 
 
@@ -35,3 +40,61 @@ class WhenTestingManager(utils.BaseTestCase):
 
         self.assertListEqual(['foo_plugin'],
                              manager_to_test._names)
+
+
+class WhenTestingManagerPluginLookup(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenTestingManagerPluginLookup, self).setUp()
+        self.manager = manager._CryptoPluginManager()
+        self.plugin = mock.MagicMock()
+        self.plugin.supports.return_value = True
+        self.manager.extensions = [mock.MagicMock(obj=self.plugin)]
+
+    def test_should_check_support_once_per_key_attributes(self):
+        for _ in range(3):
+            self.assertEqual(
+                self.plugin,
+                self.manager.get_plugin_store_generate(
+                    crypto.PluginSupportTypes.SYMMETRIC_KEY_GENERATION,
+                    'aes', 128, 'cbc'))
+        self.manager.get_plugin_store_generate(
+            crypto.PluginSupportTypes.ENCRYPT_DECRYPT)
+
+        self.assertEqual(2, self.plugin.supports.call_count)
+
+    def test_should_raise_when_no_plugin_supports_type(self):
+        self.plugin.supports.return_value = False
+
+        for _ in range(2):
+            self.assertRaises(
+                secret_store.SecretStorePluginNotFound,
+                self.manager.get_plugin_store_generate,
+                crypto.PluginSupportTypes.ENCRYPT_DECRYPT)
+
+        self.assertEqual(1, self.plugin.supports.call_count)
+
+    @mock.patch('barbican.common.utils.generate_fullname_for')
+    def test_should_name_plugins_once(self, generate_fullname_for):
+        generate_fullname_for.return_value = 'plugin name'
+        self.manager.extensions = [mock.MagicMock(obj=self.plugin)]
+
+        for _ in range(3):
+            self.assertEqual(self.plugin,
+                             self.manager.get_plugin_retrieve('plugin name'))
+
+        self.assertEqual(1, generate_fullname_for.call_count)
+
+    def test_should_raise_for_unknown_plugin_name(self):
+        self.assertRaises(
+            secret_store.SecretStorePluginNotFound,
+            self.manager.get_plugin_retrieve,
+            'unknown plugin')
+
+    def test_should_raise_when_no_plugins_are_active(self):
+        self.manager.extensions = []
+
+        self.assertRaises(
+            crypto.CryptoPluginNotFound,
+            self.manager.get_plugin_retrieve,
+            common_utils.generate_fullname_for(self.plugin))
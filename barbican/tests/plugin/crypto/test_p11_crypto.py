@@ -29,6 +29,11 @@ def write_random_first_byte(session, buf, length):
     return pkcs11.CKR_OK
 
 
+def write_logged_in_state(session, session_info):
+    session_info.state = pkcs11.CKS_RW_USER_FUNCTIONS
+    return pkcs11.CKR_OK
+
+
 class WhenTestingP11CryptoPlugin(utils.BaseTestCase):
 
     def setUp(self):
@@ -44,6 +49,8 @@ class WhenTestingP11CryptoPlugin(utils.BaseTestCase):
         self.lib.C_GenerateKey.return_value = pkcs11.CKR_OK
         self.lib.C_Login.return_value = pkcs11.CKR_OK
         self.lib.C_GenerateRandom.side_effect = write_random_first_byte
+        self.lib.C_GetSessionInfo.side_effect = write_logged_in_state
+        self.lib.C_DestroyObject.return_value = pkcs11.CKR_OK
         self.ffi = pkcs11.build_ffi()
         setattr(self.ffi, 'dlopen', lambda x: self.lib)
 
@@ -52,6 +59,11 @@ class WhenTestingP11CryptoPlugin(utils.BaseTestCase):
         self.cfg_mock.p11_crypto_plugin.hmac_label = "hmac"
         self.cfg_mock.p11_crypto_plugin.mkek_length = 32
         self.cfg_mock.p11_crypto_plugin.slot_id = 1
+        self.cfg_mock.p11_crypto_plugin.session_pool_min_size = 1
+        self.cfg_mock.p11_crypto_plugin.session_pool_max_size = 2
+        self.cfg_mock.p11_crypto_plugin.session_pool_timeout = 0
+        self.cfg_mock.p11_crypto_plugin.kek_cache_size = 10
+        self.cfg_mock.p11_crypto_plugin.kek_cache_ttl = 300
         with mock.patch.object(pkcs11.PKCS11, 'get_key_handle') as mocked:
             mocked.return_value = long(1)
             self.plugin = p11_crypto.P11CryptoPlugin(
@@ -172,6 +184,39 @@ class WhenTestingP11CryptoPlugin(utils.BaseTestCase):
                                 mock.MagicMock())
             self.assertEqual(1, self.lib.C_Decrypt.call_count)
 
+    def test_decrypt_batch_unwraps_kek_once_in_one_session(self):
+        def c_decrypt(session, ct, ctlen, pt, ptlen):
+            pt[ptlen[0] - 1] = 1
+            return pkcs11.CKR_OK
+
+        self.lib.C_Decrypt.side_effect = c_decrypt
+        self.lib.C_DecryptInit.return_value = pkcs11.CKR_OK
+        kek_meta_extended = '{"iv": "AQIDBAUGBwgJCgsMDQ4PEA=="}'
+        decrypt_requests = [
+            (plugin_import.DecryptDTO(b"somedata" * 4), kek_meta_extended)
+            for _ in range(3)
+        ]
+
+        kek_meta = mock.MagicMock()
+        kek_meta.plugin_meta = ('{"iv":123,'
+                                '"hmac": "hmac",'
+                                '"wrapped_key": "wrapped_key",'
+                                '"mkek_label": "mkek_label",'
+                                '"hmac_label": "hmac_label"}')
+        with mock.patch.object(self.plugin.pkcs11, 'unwrap_key') as key_mock:
+            key_mock.return_value = 'unwrapped_key'
+            with mock.patch.object(self.plugin.pkcs11, 'call_with_session',
+                                   wraps=self.plugin.pkcs11.call_with_session
+                                   ) as session_mock:
+                result = self.plugin.decrypt_batch(decrypt_requests,
+                                                   kek_meta,
+                                                   mock.MagicMock())
+
+        self.assertEqual(3, len(result))
+        self.assertEqual(1, session_mock.call_count)
+        self.assertEqual(1, key_mock.call_count)
+        self.assertEqual(3, self.lib.C_Decrypt.call_count)
+
     def test_generate_wrapped_kek(self):
         self.lib.C_GenerateKey.return_value = pkcs11.CKR_OK
         self.lib.C_WrapKey.return_value = pkcs11.CKR_OK
@@ -181,6 +226,17 @@ class WhenTestingP11CryptoPlugin(utils.BaseTestCase):
         self.assertEqual(1, self.lib.C_WrapKey.call_count)
         self.assertEqual(1, self.lib.C_SignInit.call_count)
         self.assertEqual(1, self.lib.C_Sign.call_count)
+        self.lib.C_DestroyObject.assert_called_once_with(self.test_session,
+                                                         long(0))
+
+    def test_generate_wrapped_kek_destroys_kek_on_error(self):
+        self.lib.C_GenerateKey.return_value = pkcs11.CKR_OK
+        self.lib.C_WrapKey.return_value = 0x60  # CKR_KEY_HANDLE_INVALID
+
+        self.assertRaises(pkcs11.P11CryptoPluginException,
+                          self.plugin.pkcs11.generate_wrapped_kek,
+                          "label", 32, self.test_session)
+        self.assertEqual(1, self.lib.C_DestroyObject.call_count)
 
     def test_bind_kek_metadata_without_existing_key(self):
         with mock.patch.object(self.plugin.pkcs11, 'generate_wrapped_kek'):
@@ -259,6 +315,7 @@ class WhenTestingP11CryptoPlugin(utils.BaseTestCase):
         self.assertEqual(1, self.lib.C_UnwrapKey.call_count)
         self.assertEqual(1, self.lib.C_WrapKey.call_count)
         self.assertEqual(1, self.lib.C_Verify.call_count)
+        self.assertEqual(1, self.lib.C_DestroyObject.call_count)
 
     def test_generate_asymmetric_raises_error(self):
         self.assertRaises(NotImplementedError,
@@ -350,3 +407,234 @@ class WhenTestingP11CryptoPlugin(utils.BaseTestCase):
                 'hmac',
                 self.test_session
             )
+
+    def test_encrypt_reuses_pooled_session(self):
+        self.lib.C_EncryptInit.return_value = pkcs11.CKR_OK
+        self.lib.C_Encrypt.return_value = pkcs11.CKR_OK
+        open_count = self.lib.C_OpenSession.call_count
+        login_count = self.lib.C_Login.call_count
+        kek_meta = mock.MagicMock()
+        kek_meta.plugin_meta = ('{"iv":123,'
+                                '"hmac": "hmac",'
+                                '"wrapped_key": "wrapped_key",'
+                                '"mkek_label": "mkek_label",'
+                                '"hmac_label": "hmac_label"}')
+        with mock.patch.object(self.plugin.pkcs11, 'unwrap_key') as key_mock:
+            key_mock.return_value = 'unwrapped_key'
+            for _ in range(3):
+                self.plugin.encrypt(plugin_import.EncryptDTO('encrypt me!!'),
+                                    kek_meta, mock.MagicMock())
+
+        self.assertEqual(open_count, self.lib.C_OpenSession.call_count)
+        self.assertEqual(login_count, self.lib.C_Login.call_count)
+        self.assertEqual(0, self.lib.C_CloseSession.call_count)
+        stats = self.plugin.pkcs11.session_pool.get_stats()
+        self.assertEqual(1, stats['size'])
+        self.assertEqual(1, stats['idle'])
+        self.assertEqual(0, stats['in_use'])
+
+    def test_session_pool_logs_session_back_in(self):
+        self.lib.C_GetSessionInfo.side_effect = None
+        self.lib.C_GetSessionInfo.return_value = pkcs11.CKR_OK
+        login_count = self.lib.C_Login.call_count
+
+        pool = self.plugin.pkcs11.session_pool
+        session = pool.get()
+        pool.put(session)
+
+        self.assertEqual(login_count + 1, self.lib.C_Login.call_count)
+        self.assertEqual(1, pool.get_stats()['relogins'])
+
+    def test_session_pool_opens_sessions_while_already_logged_in(self):
+        # New sessions report a public state, and the HSM refuses to log in
+        # again while another session of the application is open.
+        self.lib.C_GetSessionInfo.side_effect = None
+        self.lib.C_GetSessionInfo.return_value = pkcs11.CKR_OK
+        self.lib.C_Login.side_effect = [pkcs11.CKR_OK,
+                                        pkcs11.CKR_USER_ALREADY_LOGGED_IN]
+        pool = pkcs11.SessionPool(self.plugin.pkcs11, min_size=0, max_size=2)
+
+        sessions = [pool.get(), pool.get()]
+
+        self.assertEqual(2, self.lib.C_Login.call_count)
+        self.assertEqual(2, pool.get_stats()['in_use'])
+        self.assertEqual(0, self.lib.C_CloseSession.call_count)
+        for session in sessions:
+            pool.put(session)
+
+    def test_create_working_session_skips_login_when_logged_in(self):
+        login_count = self.lib.C_Login.call_count
+
+        self.plugin.pkcs11.create_working_session()
+
+        self.assertEqual(login_count, self.lib.C_Login.call_count)
+
+    def test_session_pool_closes_session_on_login_error(self):
+        self.lib.C_GetSessionInfo.side_effect = None
+        self.lib.C_GetSessionInfo.return_value = pkcs11.CKR_OK
+        self.lib.C_Login.return_value = 0xa0  # CKR_PIN_INCORRECT
+        pool = pkcs11.SessionPool(self.plugin.pkcs11, min_size=0, max_size=2)
+
+        self.assertRaises(pkcs11.P11CryptoPluginException, pool.get)
+        self.assertEqual(1, self.lib.C_CloseSession.call_count)
+        self.assertEqual(0, pool.get_stats()['size'])
+
+    def test_session_pool_replaces_invalid_session(self):
+        results = [pkcs11.CKR_SESSION_HANDLE_INVALID]
+
+        def get_session_info(session, session_info):
+            if results:
+                return results.pop()
+            return write_logged_in_state(session, session_info)
+
+        self.lib.C_GetSessionInfo.side_effect = get_session_info
+        open_count = self.lib.C_OpenSession.call_count
+
+        pool = self.plugin.pkcs11.session_pool
+        pool.put(pool.get())
+
+        self.assertEqual(open_count + 1, self.lib.C_OpenSession.call_count)
+        self.assertEqual(1, pool.get_stats()['replaced'])
+        self.assertEqual(1, pool.get_stats()['size'])
+
+    def test_call_with_session_retries_on_logged_out_session(self):
+        func = mock.Mock(side_effect=[
+            pkcs11.P11CryptoSessionException(), 'result'
+        ])
+
+        result = self.plugin.pkcs11.call_with_session(func)
+
+        self.assertEqual('result', result)
+        self.assertEqual(2, func.call_count)
+        stats = self.plugin.pkcs11.session_pool.get_stats()
+        self.assertEqual(1, stats['discarded'])
+        self.assertEqual(1, stats['size'])
+
+    def test_call_with_session_raises_after_retry(self):
+        func = mock.Mock(side_effect=pkcs11.P11CryptoSessionException())
+
+        self.assertRaises(pkcs11.P11CryptoSessionException,
+                          self.plugin.pkcs11.call_with_session,
+                          func)
+        self.assertEqual(2, func.call_count)
+        self.assertEqual(0, self.plugin.pkcs11.session_pool.get_stats()[
+            'size'])
+
+    def test_call_with_session_discards_session_on_hsm_error(self):
+        func = mock.Mock(side_effect=pkcs11.P11CryptoPluginException())
+
+        self.assertRaises(pkcs11.P11CryptoPluginException,
+                          self.plugin.pkcs11.call_with_session,
+                          func)
+        self.assertEqual(1, func.call_count)
+        self.assertEqual(1, self.lib.C_CloseSession.call_count)
+
+    def test_check_error_raises_session_exception(self):
+        self.assertRaises(
+            pkcs11.P11CryptoSessionException,
+            self.plugin.pkcs11.check_error,
+            pkcs11.CKR_USER_NOT_LOGGED_IN
+        )
+
+    def test_session_pool_times_out_when_exhausted(self):
+        pool = self.plugin.pkcs11.session_pool
+        sessions = [pool.get(), pool.get()]
+
+        self.assertRaises(pkcs11.P11CryptoSessionPoolTimeout, pool.get)
+        self.assertEqual(1, pool.get_stats()['timeouts'])
+
+        for session in sessions:
+            pool.put(session)
+        self.assertEqual(2, pool.get_stats()['idle'])
+
+    def _encrypt_twice(self):
+        self.lib.C_EncryptInit.return_value = pkcs11.CKR_OK
+        self.lib.C_Encrypt.return_value = pkcs11.CKR_OK
+        kek_meta = mock.MagicMock(kek_label='kek-label')
+        kek_meta.plugin_meta = ('{"iv":123,'
+                                '"hmac": "hmac",'
+                                '"wrapped_key": "wrapped_key",'
+                                '"mkek_label": "mkek_label",'
+                                '"hmac_label": "hmac_label"}')
+        with mock.patch.object(self.plugin.pkcs11, 'unwrap_key') as key_mock:
+            key_mock.return_value = 'unwrapped_key'
+            for _ in range(2):
+                self.plugin.encrypt(plugin_import.EncryptDTO('encrypt me!!'),
+                                    kek_meta, mock.MagicMock())
+        return key_mock
+
+    def test_encrypt_reuses_cached_kek_handle(self):
+        key_mock = self._encrypt_twice()
+
+        self.assertEqual(1, key_mock.call_count)
+        stats = self.plugin.pkcs11.key_cache.get_stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['size'])
+        self.assertEqual(0, self.lib.C_DestroyObject.call_count)
+
+    def test_encrypt_destroys_kek_handle_when_cache_disabled(self):
+        self.plugin.pkcs11.key_cache.max_size = 0
+
+        key_mock = self._encrypt_twice()
+
+        self.assertEqual(2, key_mock.call_count)
+        self.lib.C_DestroyObject.assert_called_once_with(mock.ANY,
+                                                         'unwrapped_key')
+
+    def test_encrypt_unwraps_again_after_ttl(self):
+        self.plugin.pkcs11.key_cache.ttl = 0
+
+        key_mock = self._encrypt_twice()
+
+        self.assertEqual(2, key_mock.call_count)
+        self.assertEqual(1, self.plugin.pkcs11.key_cache.get_stats()[
+            'expired'])
+
+    def test_key_cache_evicts_least_recently_used(self):
+        cache = pkcs11.KeyHandleCache(max_size=2)
+        cache.put(1, ('a', 'h', 'mkek'), 10)
+        cache.put(1, ('b', 'h', 'mkek'), 11)
+        cache.get(1, ('a', 'h', 'mkek'))
+        cache.put(2, ('c', 'h', 'mkek'), 12)
+
+        self.assertIsNone(cache.get(1, ('b', 'h', 'mkek')))
+        self.assertEqual(10, cache.get(1, ('a', 'h', 'mkek')))
+        self.assertEqual([11], cache.pop_expired(1))
+        self.assertEqual([], cache.pop_expired(2))
+
+    def test_key_cache_only_serves_owning_session(self):
+        cache = pkcs11.KeyHandleCache()
+        cache.put(1, ('a', 'h', 'mkek'), 10)
+
+        self.assertIsNone(cache.get(2, ('a', 'h', 'mkek')))
+
+    def test_close_session_forgets_cached_handles(self):
+        self._encrypt_twice()
+        session = self.plugin.pkcs11.session_pool.get()
+
+        self.plugin.pkcs11.session_pool.discard(session)
+
+        self.assertEqual(0, self.plugin.pkcs11.key_cache.get_stats()['size'])
+
+    def test_rewrap_kek_invalidates_handles_of_old_mkek(self):
+        self._encrypt_twice()
+        self.lib.C_WrapKey.return_value = pkcs11.CKR_OK
+        self.lib.C_UnwrapKey.return_value = pkcs11.CKR_OK
+        self.lib.C_VerifyInit.return_value = pkcs11.CKR_OK
+        self.lib.C_Verify.return_value = pkcs11.CKR_OK
+        self.lib.C_SignInit.return_value = pkcs11.CKR_OK
+        self.lib.C_Sign.return_value = pkcs11.CKR_OK
+
+        self.plugin.pkcs11.rewrap_kek(
+            base64.b64encode(b"\x00" * 16),
+            base64.b64encode(b"\x00" * 48),
+            base64.b64encode(b"\x00" * 32),
+            'mkek_label',
+            'hmac_label',
+            32,
+            self.test_session
+        )
+
+        stats = self.plugin.pkcs11.key_cache.get_stats()
+        self.assertEqual(0, stats['size'])
+        self.assertEqual(1, stats['invalidations'])
@@ -169,6 +169,41 @@ class WhenTestingCertificatePluginManager(database_utils.RepositoryTestCase,
         self.assertEqual(self.plugin_returned,
                          self.manager.get_plugin_by_ca_id('ca_id'))
 
+    def test_get_plugin_by_ca_id_remembers_ca_plugin(self):
+        self.manager.get_plugin_by_ca_id('ca_id')
+        self.manager.get_plugin_by_ca_id('ca_id')
+
+        self.ca_repo.get.assert_called_once_with('ca_id',
+                                                 suppress_exception=True)
+
+    def test_get_plugin_by_ca_id_after_forget_ca(self):
+        self.manager.get_plugin_by_ca_id('ca_id')
+        self.manager.forget_ca('ca_id')
+        self.ca_repo.get.return_value = None
+
+        self.assertRaises(
+            cm.CertificatePluginNotFoundForCAID,
+            self.manager.get_plugin_by_ca_id,
+            'ca_id'
+        )
+
+    def test_get_plugin_by_name_after_extensions_replaced(self):
+        self.manager.get_plugin_by_name(self.plugin_name)
+        self.manager.extensions = []
+
+        self.assertRaises(
+            cm.CertificatePluginNotFound,
+            self.manager.get_plugin_by_name,
+            self.plugin_name
+        )
+
+    def test_get_manager_returns_singleton(self):
+        with mock.patch.object(cm, '_CERTIFICATE_PLUGIN_MANAGER', None):
+            manager = cm.get_manager()
+
+            self.assertIsInstance(manager, cm.CertificatePluginManager)
+            self.assertIs(manager, cm.get_manager())
+
     def test_raises_error_with_no_plugin_by_ca_id_found(self):
         self.ca_repo.get.return_value = None
         self.assertRaises(
@@ -289,6 +324,49 @@ class WhenTestingCertificatePluginManager(database_utils.RepositoryTestCase,
             None)
         self.ca_repo.create_from.assert_has_calls([])
 
+    def test_refresh_ca_table_skips_check_while_cas_unexpired(self):
+        self.ca.expiration = (datetime.datetime.utcnow() +
+                              datetime.timedelta(days=1))
+        self.ca_repo.get_by_create_date.return_value = ([self.ca], 0, 1, 1)
+
+        next_check = self.manager.refresh_ca_table()
+        self.manager.refresh_ca_table()
+
+        self.assertEqual(1, self.ca_repo.get_by_create_date.call_count)
+        self.assertFalse(self.plugin_returned.get_ca_info.called)
+        self.assertTrue(3600 - 5 < next_check <= 3600)
+
+    def test_refresh_ca_table_checks_again_once_a_ca_expires(self):
+        self.ca_repo.get_by_create_date.return_value = ([self.ca], 0, 1, 1)
+        self.manager.refresh_ca_table()
+
+        self.manager._ca_table_fresh_until[self.plugin_name] = (
+            datetime.datetime.utcnow() - datetime.timedelta(seconds=1))
+        self.manager.refresh_ca_table()
+
+        self.assertEqual(2, self.ca_repo.get_by_create_date.call_count)
+
+    def test_refresh_ca_table_tracks_expiration_of_new_cas(self):
+        self.ca_repo.get_by_create_date.return_value = (None, 0, 4, 0)
+
+        next_check = self.manager.refresh_ca_table()
+        self.manager.refresh_ca_table()
+
+        self.plugin_returned.get_ca_info.assert_called_once_with()
+        # The CA returned by the plugin expires in a day, which is later
+        # than the maximum refresh interval.
+        self.assertTrue(3600 - 5 < next_check <= 3600)
+
+    def test_refresh_ca_table_retries_plugin_without_cas(self):
+        self.ca_repo.get_by_create_date.return_value = (None, 0, 4, 0)
+        self.plugin_returned.get_ca_info.return_value = {}
+
+        next_check = self.manager.refresh_ca_table()
+        self.manager.refresh_ca_table()
+
+        self.assertEqual(2, self.plugin_returned.get_ca_info.call_count)
+        self.assertTrue(next_check <= cm.CA_REFRESH_RETRY_SECONDS)
+
     def test_refresh_ca_list_plugin_when_get_ca_info_raises(self):
         self.ca_repo.get_by_create_date.return_value = (None, 0, 4, 0)
         self.plugin_returned.get_ca_info.side_effect = Exception()
@@ -243,3 +243,65 @@ class WhenTestingSecretStorePluginManager(utils.BaseTestCase):
                          self.manager.get_plugin_store(
                              key_spec=keySpec,
                              transport_key_needed=True))
+
+    def test_should_check_store_support_once_per_key_spec(self):
+        plugin = TestSecretStore([str.KeyAlgorithm.AES])
+        self.manager.extensions = [mock.MagicMock(obj=plugin)]
+
+        with mock.patch.object(plugin, 'store_secret_supports',
+                               wraps=plugin.store_secret_supports) as supports:
+            for _ in range(3):
+                self.manager.get_plugin_store(
+                    str.KeySpec(str.KeyAlgorithm.AES, 128))
+            self.manager.get_plugin_store(
+                str.KeySpec(str.KeyAlgorithm.AES, 256))
+
+        self.assertEqual(2, supports.call_count)
+
+    def test_should_check_generate_support_once_per_key_spec(self):
+        plugin = TestSecretStore([])
+        self.manager.extensions = [mock.MagicMock(obj=plugin)]
+        keySpec = str.KeySpec(str.KeyAlgorithm.AES, 128)
+
+        with mock.patch.object(plugin, 'generate_supports',
+                               wraps=plugin.generate_supports) as supports:
+            for _ in range(3):
+                self.assertRaises(
+                    str.SecretStoreSupportedPluginNotFound,
+                    self.manager.get_plugin_generate,
+                    keySpec,
+                )
+
+        self.assertEqual(1, supports.call_count)
+
+    @mock.patch('barbican.common.utils.generate_fullname_for')
+    def test_should_name_plugins_once(self, generate_fullname_for):
+        plugin = TestSecretStore([str.KeyAlgorithm.AES])
+        self.manager.extensions = [mock.MagicMock(obj=plugin)]
+        generate_fullname_for.return_value = 'plugin name'
+
+        for _ in range(3):
+            self.assertEqual(
+                plugin,
+                self.manager.get_plugin_retrieve_delete('plugin name'))
+
+        self.assertEqual(1, generate_fullname_for.call_count)
+
+    def test_should_rebuild_tables_when_extensions_replaced(self):
+        plugin1 = TestSecretStore([])
+        self.manager.extensions = [mock.MagicMock(obj=plugin1)]
+        keySpec = str.KeySpec(str.KeyAlgorithm.AES, 128)
+        self.assertRaises(
+            str.SecretStoreSupportedPluginNotFound,
+            self.manager.get_plugin_store,
+            keySpec,
+        )
+
+        plugin2 = TestSecretStore([str.KeyAlgorithm.AES])
+        self.manager.extensions = [mock.MagicMock(obj=plugin2)]
+
+        self.assertEqual(plugin2, self.manager.get_plugin_store(keySpec))
+        self.assertEqual(
+            plugin2,
+            self.manager.get_plugin_retrieve_delete(
+                common_utils.generate_fullname_for(plugin2)))
@@ -15,6 +15,7 @@
 import base64
 import socket
 import stat
+import time
 
 import mock
 
@@ -918,3 +919,109 @@ class WhenTestingKMIPSecretStore(utils.BaseTestCase):
             CONF.kmip_plugin.keyfile = '/some/path'
             kss.KMIPSecretStore(CONF)
             self.assertEqual(1, len(m.mock_calls))
+
+
+class WhenTestingKMIPClientPool(utils.BaseTestCase):
+    """Test pooling the KMIP server connections."""
+
+    def setUp(self):
+        super(WhenTestingKMIPClientPool, self).setUp()
+        self.clients = []
+        self.pool = kss.KMIPClientPool(self._create_client, max_size=2,
+                                       timeout=0, max_idle=60)
+
+    def _create_client(self):
+        kmip_client = mock.MagicMock()
+        kmip_client.proxy.socket = None
+        kmip_client.get.return_value = 'managed object'
+        self.clients.append(kmip_client)
+        return kmip_client
+
+    def test_reuses_open_connection(self):
+        self.pool.call('get', 'uuid')
+        self.pool.call('get', 'uuid')
+
+        self.assertEqual(1, len(self.clients))
+        self.assertEqual(1, self.clients[0].open.call_count)
+        self.assertFalse(self.clients[0].close.called)
+
+    def test_uses_given_clients_first(self):
+        given_client = self._create_client()
+        pool = kss.KMIPClientPool(self._create_client,
+                                  clients=[given_client])
+
+        self.assertEqual('managed object', pool.call('get', 'uuid'))
+
+        given_client.open.assert_called_once_with()
+        self.assertEqual(1, len(self.clients))
+
+    def test_reconnects_when_reused_connection_fails(self):
+        self.pool.call('get', 'uuid')
+        self.clients[0].get.side_effect = socket.error
+
+        self.assertEqual('managed object', self.pool.call('get', 'uuid'))
+
+        self.assertEqual(2, len(self.clients))
+        self.clients[0].close.assert_called_once_with()
+
+    def test_does_not_retry_non_idempotent_operations(self):
+        for method in ('create', 'create_key_pair', 'register'):
+            kmip_client = self._create_client()
+            pool = kss.KMIPClientPool(self._create_client,
+                                      clients=[kmip_client])
+            pool.call('get', 'uuid')
+            getattr(kmip_client, method).side_effect = socket.error
+            client_count = len(self.clients)
+
+            self.assertRaises(socket.error, pool.call, method, 'arg')
+
+            self.assertEqual(1, getattr(kmip_client, method).call_count)
+            self.assertEqual(client_count, len(self.clients))
+            kmip_client.close.assert_called_once_with()
+
+    def test_does_not_retry_new_connection(self):
+        self.pool.call('get', 'uuid')
+        self.clients[0].get.side_effect = socket.error
+        self.pool.max_size = 1
+
+        with mock.patch.object(self.pool, 'create_client') as create_client:
+            create_client.return_value.get.side_effect = socket.error
+            self.assertRaises(socket.error, self.pool.call, 'get', 'uuid')
+            self.assertEqual(1, create_client.call_count)
+
+    def test_keeps_connection_after_operation_failure(self):
+        self.pool.call('get', 'uuid')
+        self.clients[0].destroy.side_effect = (
+            kss.kmip_exceptions.KmipOperationFailure(
+                enums.ResultStatus.OPERATION_FAILED,
+                enums.ResultReason.GENERAL_FAILURE, 'failed'))
+
+        self.assertRaises(kss.kmip_exceptions.KmipOperationFailure,
+                          self.pool.call, 'destroy', 'uuid')
+        self.pool.call('get', 'uuid')
+
+        self.assertEqual(1, len(self.clients))
+        self.assertFalse(self.clients[0].close.called)
+
+    def test_closes_idle_connections(self):
+        self.pool.call('get', 'uuid')
+
+        with mock.patch('time.time', return_value=time.time() + 120):
+            self.pool.call('get', 'uuid')
+
+        self.assertEqual(2, len(self.clients))
+        self.clients[0].close.assert_called_once_with()
+
+    def test_times_out_when_exhausted(self):
+        self.pool.get()
+        self.pool.get()
+
+        self.assertRaises(kss.KMIPClientPoolTimeout, self.pool.get)
+
+    def test_releases_slot_when_open_fails(self):
+        self.pool.max_size = 1
+        with mock.patch.object(self.pool, 'create_client') as create_client:
+            create_client.return_value.open.side_effect = socket.error
+            self.assertRaises(socket.error, self.pool.get)
+
+        self.assertEqual('managed object', self.pool.call('get', 'uuid'))
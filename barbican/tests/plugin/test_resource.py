@@ -13,14 +13,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import base64
+import collections
 
 import mock
+import sqlalchemy
 import testtools
 
+from barbican.common import resources as common_resources
 from barbican.model import models
+from barbican.model import repositories
+from barbican.plugin.crypto import manager
 from barbican.plugin.interface import secret_store
 from barbican.plugin import resources
 from barbican.plugin import store_crypto
+from barbican.tests import database_utils
 from barbican.tests import utils
 
 
@@ -79,6 +85,10 @@ class WhenTestingPluginResource(testtools.TestCase,
         self.secret_meta_repo.create_from.return_value = None
         self.setup_secret_meta_repository_mock(self.secret_meta_repo)
 
+        self.flush_patcher = mock.patch('barbican.model.repositories.flush')
+        self.mock_flush = self.flush_patcher.start()
+        self.addCleanup(self.flush_patcher.stop)
+
     def tearDown(self):
         super(WhenTestingPluginResource, self).tearDown()
 
@@ -197,16 +207,17 @@ class WhenTestingPluginResource(testtools.TestCase,
     def test_delete_secret_w_metadata(self):
         project_id = "some_id"
         secret_model = mock.MagicMock()
-        secret_meta = mock.MagicMock()
-        self.secret_meta_repo.get_metadata_for_secret.return_value = (
-            secret_meta)
+        secret_model.secret_store_metadata = {
+            'key1': mock.MagicMock(value='value1', deleted=False),
+            'key2': mock.MagicMock(value='value2', deleted=True),
+        }
         self.plugin_resource.delete_secret(secret_model=secret_model,
                                            project_id=project_id)
 
-        self.secret_meta_repo.get_metadata_for_secret.assert_called_once_with(
-            secret_model.id)
+        self.assertFalse(self.secret_meta_repo.get_metadata_for_secret.called)
 
-        self.moc_plugin.delete_secret.assert_called_once_with(secret_meta)
+        self.moc_plugin.delete_secret.assert_called_once_with(
+            {'key1': 'value1'})
 
         self.secret_repo.delete_entity_by_id.assert_called_once_with(
             entity_id=secret_model.id, external_project_id=project_id)
@@ -214,12 +225,252 @@ class WhenTestingPluginResource(testtools.TestCase,
     def test_delete_secret_w_out_metadata(self):
         project_id = "some_id"
         secret_model = mock.MagicMock()
-        self.secret_meta_repo.get_metadata_for_secret.return_value = None
+        secret_model.secret_store_metadata = {}
         self.plugin_resource.delete_secret(secret_model=secret_model,
                                            project_id=project_id)
 
-        self.secret_meta_repo.get_metadata_for_secret.assert_called_once_with(
-            secret_model.id)
+        self.assertFalse(self.secret_meta_repo.get_metadata_for_secret.called)
 
         self.secret_repo.delete_entity_by_id.assert_called_once_with(
             entity_id=secret_model.id, external_project_id=project_id)
+
+
+class WhenCachingSecretPayloads(testtools.TestCase):
+
+    def setUp(self):
+        super(WhenCachingSecretPayloads, self).setUp()
+        resources.invalidate_payload_cache()
+        self.addCleanup(resources.invalidate_payload_cache)
+        self.stats = resources.get_payload_cache_stats()
+
+        self._override('enabled', True)
+        self.content_type = 'application/octet-stream'
+
+        self.moc_plugin = mock.MagicMock()
+        self.moc_plugin.get_secret.side_effect = (
+            lambda secret_type, metadata: secret_store.SecretDTO(
+                secret_type, base64.b64encode('payload'), None,
+                self.content_type))
+        moc_plugin_config = {
+            'return_value.get_plugin_retrieve_delete.return_value':
+            self.moc_plugin
+        }
+        self.moc_plugin_patcher = mock.patch(
+            'barbican.plugin.interface.secret_store.get_manager',
+            **moc_plugin_config
+        )
+        self.moc_plugin_patcher.start()
+        self.addCleanup(self.moc_plugin_patcher.stop)
+
+        self.secret_repo_patcher = mock.patch(
+            'barbican.model.repositories.get_secret_repository')
+        self.secret_repo_patcher.start()
+        self.addCleanup(self.secret_repo_patcher.stop)
+
+    def _override(self, name, value):
+        resources.CONF.set_override(name, value, group='secret_payload_cache')
+        self.addCleanup(resources.CONF.clear_override, name,
+                        group='secret_payload_cache')
+
+    def _secret_model(self, secret_id='secret-id', updated_at=1,
+                      secret_type='symmetric'):
+        return mock.MagicMock(id=secret_id, updated_at=updated_at,
+                              secret_type=secret_type,
+                              secret_store_metadata={})
+
+    def _get_secret(self, secret_model, twsk=None):
+        return resources.get_secret(self.content_type, secret_model,
+                                    mock.MagicMock(), twsk=twsk)
+
+    def _counter(self, name):
+        return resources.get_payload_cache_stats()[name] - self.stats[name]
+
+    def test_should_decrypt_hot_secret_once(self):
+        secret_model = self._secret_model()
+
+        self.assertEqual('payload', self._get_secret(secret_model))
+        self.assertEqual('payload', self._get_secret(secret_model))
+
+        self.assertEqual(1, self.moc_plugin.get_secret.call_count)
+        self.assertEqual(1, self._counter('hits'))
+        self.assertEqual(1, self._counter('misses'))
+
+    def test_should_not_cache_when_disabled(self):
+        self._override('enabled', False)
+        secret_model = self._secret_model()
+
+        self._get_secret(secret_model)
+        self._get_secret(secret_model)
+
+        self.assertEqual(2, self.moc_plugin.get_secret.call_count)
+        self.assertEqual(0, self._counter('misses'))
+
+    def test_should_not_cache_secret_types_not_enabled(self):
+        self._override('secret_types', ['symmetric'])
+        secret_model = self._secret_model(secret_type='private')
+
+        self._get_secret(secret_model)
+        self._get_secret(secret_model)
+
+        self.assertEqual(2, self.moc_plugin.get_secret.call_count)
+
+    def test_should_not_cache_transport_wrapped_payloads(self):
+        secret_model = self._secret_model()
+
+        self._get_secret(secret_model, twsk='twsk')
+        self._get_secret(secret_model, twsk='twsk')
+
+        self.assertEqual(2, self.moc_plugin.get_secret.call_count)
+
+    def test_should_miss_once_secret_is_updated(self):
+        self._get_secret(self._secret_model(updated_at=1))
+        self._get_secret(self._secret_model(updated_at=2))
+
+        self.assertEqual(2, self.moc_plugin.get_secret.call_count)
+        self.assertEqual(1, resources.get_payload_cache_stats()['entries'])
+
+    @mock.patch('time.time')
+    def test_should_expire_payloads(self, mock_time):
+        self._override('ttl_seconds', 10)
+        secret_model = self._secret_model()
+
+        mock_time.return_value = 100
+        self._get_secret(secret_model)
+        mock_time.return_value = 109
+        self._get_secret(secret_model)
+        mock_time.return_value = 110
+        self._get_secret(secret_model)
+
+        self.assertEqual(2, self.moc_plugin.get_secret.call_count)
+
+    def test_should_invalidate_deleted_secret(self):
+        secret_model = self._secret_model()
+        self._get_secret(secret_model)
+
+        resources.delete_secret(secret_model, 'project-id')
+        self._get_secret(secret_model)
+
+        self.assertEqual(2, self.moc_plugin.get_secret.call_count)
+
+    def test_should_evict_least_recently_used_to_max_entries(self):
+        self._override('max_entries', 2)
+        first, second, third = [self._secret_model(secret_id=secret_id)
+                                for secret_id in ('1', '2', '3')]
+        self._get_secret(first)
+        self._get_secret(second)
+        self._get_secret(first)
+        self._get_secret(third)
+
+        self.moc_plugin.get_secret.reset_mock()
+        self._get_secret(first)
+        self._get_secret(third)
+        self.assertEqual(0, self.moc_plugin.get_secret.call_count)
+        self._get_secret(second)
+        self.assertEqual(1, self.moc_plugin.get_secret.call_count)
+        self.assertEqual(2, self._counter('evictions'))
+
+    def test_should_keep_within_max_bytes(self):
+        payload_size = len(base64.b64encode('payload'))
+        self._override('max_bytes', payload_size * 2)
+        for secret_id in ('1', '2', '3'):
+            self._get_secret(self._secret_model(secret_id=secret_id))
+
+        stats = resources.get_payload_cache_stats()
+        self.assertEqual(2, stats['entries'])
+        self.assertEqual(payload_size * 2, stats['bytes'])
+
+    def test_should_not_cache_payload_larger_than_max_bytes(self):
+        self._override('max_bytes', 4)
+        self._get_secret(self._secret_model())
+
+        self.assertEqual(0, resources.get_payload_cache_stats()['entries'])
+
+    def test_should_zeroize_evicted_payloads(self):
+        cache = resources.SecretPayloadCache()
+        secret_model = self._secret_model()
+        cache.put(secret_model, 'payload')
+        payload = cache._entries[(secret_model.id, 1)][1]
+
+        cache.invalidate(secret_model.id)
+
+        self.assertEqual(bytearray(len('payload')), payload)
+        self.assertEqual(0, cache.stats()['bytes'])
+
+
+class WhenCreatingSecretsWithPluginResource(database_utils.RepositoryTestCase):
+    """Checks that each creation writes its entities with a single flush."""
+
+    def setUp(self):
+        super(WhenCreatingSecretsWithPluginResource, self).setUp()
+        # Force a refresh of the singleton plugin manager for each test.
+        manager._PLUGIN_MANAGER = None
+        manager.CONF.set_override('enabled_crypto_plugins',
+                                  'simple_crypto',
+                                  group='crypto')
+        self.addCleanup(manager.CONF.clear_override,
+                        'enabled_crypto_plugins', group='crypto')
+
+        self.project = common_resources.get_or_create_project('keystone_id')
+        self.content_type = 'application/octet-stream'
+        self.inserts = collections.Counter()
+        self.updates = collections.Counter()
+
+    def _record_statement(self, conn, cursor, statement, *args):
+        words = statement.split()
+        if words[0] == 'INSERT':
+            self.inserts[words[2]] += 1
+        elif words[0] == 'UPDATE':
+            self.updates[words[1]] += 1
+
+    def _record_statements(self):
+        sqlalchemy.event.listen(repositories._ENGINE, 'before_cursor_execute',
+                                self._record_statement)
+        self.addCleanup(sqlalchemy.event.remove, repositories._ENGINE,
+                        'before_cursor_execute', self._record_statement)
+
+    def _generate_secret(self):
+        spec = {'algorithm': 'aes', 'bit_length': 128, 'mode': 'cbc'}
+        return resources.generate_secret(spec, self.content_type,
+                                         self.project)
+
+    def test_store_secret_inserts_each_table_once(self):
+        self._generate_secret()
+        self._record_statements()
+
+        secret_model = models.Secret({'name': 'secret', 'algorithm': 'aes',
+                                      'bit_length': 128, 'mode': 'cbc'})
+        resources.store_secret(base64.b64encode('payload'),
+                               self.content_type, 'base64', secret_model,
+                               self.project)
+
+        self.assertEqual({'secrets': 1, 'encrypted_data': 1,
+                          'secret_store_metadata': 1}, self.inserts)
+        self.assertEqual({'project_usages': 1}, self.updates)
+        self.assertEqual(2, len(secret_model.secret_store_metadata))
+
+    def test_first_secret_of_project_inserts_kek_once(self):
+        self._record_statements()
+
+        self._generate_secret()
+
+        self.assertEqual({'kek_data': 1, 'secrets': 1, 'encrypted_data': 1,
+                          'secret_store_metadata': 1}, self.inserts)
+        self.assertNotIn('kek_data', self.updates)
+
+    def test_generate_asymmetric_secret_inserts_each_table_once(self):
+        self._generate_secret()
+        self._record_statements()
+
+        spec = {'algorithm': 'rsa', 'bit_length': 1024,
+                'passphrase': 'changeit'}
+        container_model = resources.generate_asymmetric_secret(
+            spec, self.content_type, self.project)
+
+        self.assertEqual({'secrets': 1, 'encrypted_data': 1,
+                          'secret_store_metadata': 1, 'containers': 1,
+                          'container_secret': 1}, self.inserts)
+        self.assertEqual({'project_usages': 4}, self.updates)
+
+        container = repositories.get_container_repository().get(
+            container_model.id, 'keystone_id')
+        self.assertEqual(3, len(container.container_secrets))
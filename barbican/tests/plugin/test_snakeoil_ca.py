@@ -138,6 +138,69 @@ class CaTestCase(BaseTestCase):
         self.assertEqual("Test O", subject.O)
         self.assertEqual("Sub CA Test CN", subject.CN)
 
+    def _create_file_storage_ca(self, prefix='', **kwargs):
+        return snakeoil_ca.SnakeoilCA(
+            cert_path=os.path.join(self.tmp_dir, prefix + 'cert.pem'),
+            key_path=os.path.join(self.tmp_dir, prefix + 'key.pem'),
+            chain_path=os.path.join(self.tmp_dir, prefix + 'cert.chain'),
+            pkcs7_path=os.path.join(self.tmp_dir, prefix + 'cert.p7b'),
+            key_size=512,
+            **kwargs)
+
+    def test_should_not_reread_unchanged_files(self):
+        ca = self._create_file_storage_ca(subject_dn='cn=Test CN')
+        ca.cert
+        ca.key
+
+        with mock.patch('six.moves.builtins.open') as mock_open:
+            self.assertIsNotNone(ca.cert)
+            self.assertIsNotNone(ca.key)
+            self.assertIsNotNone(ca.chain)
+            self.assertIsNotNone(ca.pkcs7)
+
+        self.assertFalse(mock_open.called)
+
+    def test_should_reread_modified_files(self):
+        ca = self._create_file_storage_ca(subject_dn='cn=Test CN')
+        other_ca = self._create_file_storage_ca(prefix='other_',
+                                                subject_dn='cn=Other CN')
+        ca.cert
+        other_ca.cert
+
+        with open(other_ca.cert_path) as src, open(ca.cert_path, 'w') as dst:
+            dst.write(src.read())
+        os.utime(ca.cert_path, (0, 0))
+
+        self.assertEqual("Other CN", ca.cert.get_subject().CN)
+
+    def test_should_generate_pkcs7_of_chain(self):
+        parent_ca = self._create_file_storage_ca(subject_dn='cn=Test CN')
+        sub_ca = self._create_file_storage_ca(
+            prefix='sub_', subject_dn='cn=Sub CA Test CN',
+            parent_chain_path=parent_ca.chain_path,
+            signing_dn=parent_ca.subject_dn,
+            signing_key=parent_ca.key)
+
+        pkcs7 = crypto.load_pkcs7_data(crypto.FILETYPE_PEM, sub_ca.pkcs7)
+        self.assertTrue(pkcs7.type_is_signed())
+
+        pkcs7_der = base64.b64decode(
+            b''.join(sub_ca.pkcs7.strip().splitlines()[1:-1]))
+        for ca in (parent_ca, sub_ca):
+            self.assertIn(
+                crypto.dump_certificate(crypto.FILETYPE_ASN1, ca.cert),
+                pkcs7_der)
+
+    def test_should_der_encode_long_contents_and_oid_arcs(self):
+        self.assertEqual(b'\x04\x81\x80' + b'\x00' * 0x80,
+                         snakeoil_ca._der(0x04, b'\x00' * 0x80))
+        self.assertEqual(b'\x04\x82\x01\x00' + b'\x00' * 0x100,
+                         snakeoil_ca._der(0x04, b'\x00' * 0x100))
+        self.assertEqual(b'\x02\x01\x01', snakeoil_ca._der_integer(1))
+        self.assertEqual(
+            b'\x06\x09\x2a\x86\x48\x86\xf7\x0d\x01\x07\x02',
+            snakeoil_ca._der_oid(snakeoil_ca.OID_PKCS7_SIGNED_DATA))
+
 
 class CertManagerTestCase(BaseTestCase):
 
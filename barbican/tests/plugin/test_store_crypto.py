@@ -269,6 +269,51 @@ class WhenTestingStoreCrypto(TestSecretStoreBase):
 
         self.assertEqual(self.project_id, test_project_id)
 
+    def test_get_secrets_decrypts_one_batch_per_kek(self):
+        """Test getting several secrets protected by two KEKs."""
+        self.kek_meta_project_model.id = 'kek-1'
+        other_kek_model = models.KEKDatum()
+        other_kek_model.id = 'kek-2'
+        other_kek_model.plugin_name = 'plugin-name'
+
+        contexts = []
+        for kek_model in (self.kek_meta_project_model, other_kek_model,
+                          self.kek_meta_project_model):
+            datum_model = models.EncryptedDatum()
+            datum_model.kek_meta_project = kek_model
+            datum_model.cypher_text = base64.b64encode(
+                'cypher_text_{0}'.format(len(contexts)))
+            datum_model.content_type = 'content_type'
+            datum_model.kek_meta_extended = 'extended_meta'
+            secret_model = models.Secret()
+            secret_model.encrypted_data = [datum_model]
+            contexts.append(store_crypto.StoreCryptoContext(
+                self.project_model, secret_model=secret_model))
+
+        decrypt_batch_mock = self.retrieving_plugin.decrypt_batch
+        decrypt_batch_mock.side_effect = (
+            lambda requests, kek_meta_dto, project_id:
+            [dto.encrypted.replace('cypher', 'plain') for dto, _ in requests])
+
+        secret_dtos = self.plugin_to_test.get_secrets(
+            [(secret_store.SecretType.OPAQUE, None, context)
+             for context in contexts])
+
+        self.assertEqual(
+            ['plain_text_0', 'plain_text_1', 'plain_text_2'],
+            [base64.b64decode(dto.secret) for dto in secret_dtos])
+        self.assertEqual(2, decrypt_batch_mock.call_count)
+        self.assertFalse(self.retrieving_plugin.decrypt.called)
+
+        args, kwargs = decrypt_batch_mock.call_args_list[0]
+        test_requests, test_kek_meta, test_project_id = tuple(args)
+        self.assertEqual(2, len(test_requests))
+        self.assertEqual('extended_meta', test_requests[0][1])
+        self.assertEqual(
+            self.kek_meta_project_model.plugin_meta,
+            test_kek_meta.plugin_meta)
+        self.assertEqual(self.project_id, test_project_id)
+
     @test_utils.parameterized_dataset(dataset_for_pem)
     def test_get_secret_encoding(self, input_secret_dto):
         """Test getting a secret that should be returend in PEM format."""
@@ -13,11 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+import threading
+
 import mock
 import testtools
 
 try:
     import barbican.plugin.interface.certificate_manager as cm
+    from barbican.plugin.interface import SymAPI
     import barbican.plugin.symantec as sym
     imports_ok = True
 except ImportError:
@@ -109,3 +113,127 @@ class WhenTestingSymantecPlugin(utils.BaseTestCase):
             plugin_meta,
             self.barbican_plugin_dto
         )
+
+
+@testtools.skipIf(not imports_ok, "Symantec imports not available")
+class WhenUsingSymAPIClients(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenUsingSymAPIClients, self).setUp()
+        client_patcher = mock.patch(
+            'barbican.plugin.interface.SymAPI.Client'
+        )
+        self.mock_client = client_patcher.start()
+        self.addCleanup(client_patcher.stop)
+
+        self.api = SymAPI.SymAPI(verbose=False)
+        self.api.setCredentials('partner', 'user', 'password')
+
+    def test_should_build_client_once(self):
+        self.api.hello('one')
+        self.api.hello('two')
+
+        self.mock_client.assert_called_once_with(
+            self.api.url_queryAPI_demo)
+        self.assertEqual(2, self.mock_client.return_value.clone.call_count)
+
+    def test_should_build_client_per_api(self):
+        self.api.hello('one')
+        self.api.ModifyOrder('order id', 'APPROVE')
+
+        self.assertEqual(2, self.mock_client.call_count)
+
+    def test_should_rebuild_client_after_clear(self):
+        self.api.hello('one')
+        self.api.clearClients()
+        self.api.hello('two')
+
+        self.assertEqual(2, self.mock_client.call_count)
+
+    def test_should_use_wsdl_cache(self):
+        self.api.setWSDLCache('/tmp/cache')
+        self.api.hello('one')
+
+        self.mock_client.assert_called_once_with(
+            self.api.url_queryAPI_demo, cache=self.api.wsdlCache)
+
+    def test_should_set_query_api_url(self):
+        order_url = self.api.url_orderAPI_demo
+
+        self.api.setQueryAPIURL('file:///tmp/query.wsdl')
+
+        self.assertEqual('file:///tmp/query.wsdl', self.api.url_queryAPI_demo)
+        self.assertEqual(order_url, self.api.url_orderAPI_demo)
+
+    def test_should_keep_current_client_per_thread(self):
+        self.api.hello('one')
+        clients = []
+
+        def run():
+            clients.append(self.api.client)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+        self.assertEqual([None], clients)
+        self.assertIsNotNone(self.api.client)
+
+
+@testtools.skipIf(not imports_ok, "Symantec imports not available")
+class WhenListingChangedSymantecOrders(utils.BaseTestCase):
+
+    def setUp(self):
+        super(WhenListingChangedSymantecOrders, self).setUp()
+        conf = mock.MagicMock()
+        conf.symantec_plugin.username = 'user'
+        conf.symantec_plugin.password = 'password'
+        conf.symantec_plugin.partnercode = 'partner'
+        conf.symantec_plugin.testmode = 'true'
+        conf.symantec_plugin.wsdl_cache_dir = None
+        conf.symantec_plugin.order_wsdl_url = None
+        conf.symantec_plugin.query_wsdl_url = None
+
+        api_patcher = mock.patch('barbican.plugin.symantec.SymAPI')
+        self.api = api_patcher.start().return_value
+        self.addCleanup(api_patcher.stop)
+
+        self.symantec = sym.SymantecCertificatePlugin(conf)
+        self.summary = self.api.GetModifiedOrderSummary.return_value
+        self.summary.QueryResponseHeader.SuccessCode = 0
+        self.summary.QueryResponseHeader.ReturnCount = 2
+
+    def test_should_list_changed_orders(self):
+        first, second = mock.MagicMock(), mock.MagicMock()
+        first.PartnerOrderID = 'order-1'
+        second.PartnerOrderID = 'order-2'
+        self.summary.ModifiedPartnerOrder.ModifiedOrders.ModifiedOrder = [
+            first, second]
+
+        changed = self.symantec.get_changed_orders(
+            datetime.datetime(2015, 6, 1, 12, 30))
+
+        self.assertEqual(set(['order-1', 'order-2']), changed)
+        from_date = self.api.GetModifiedOrderSummary.call_args[0][0]
+        self.assertEqual('2015-06-01T12:30:00', from_date)
+
+    def test_should_list_no_orders_if_none_changed(self):
+        self.summary.QueryResponseHeader.ReturnCount = 0
+
+        changed = self.symantec.get_changed_orders(datetime.datetime.utcnow())
+
+        self.assertEqual(set(), changed)
+
+    def test_should_return_none_if_query_fails(self):
+        self.summary.QueryResponseHeader.SuccessCode = -1
+
+        self.assertIsNone(
+            self.symantec.get_changed_orders(datetime.datetime.utcnow()))
+
+    def test_should_raise_if_ca_unavailable(self):
+        self.api.GetModifiedOrderSummary.side_effect = ValueError()
+
+        self.assertRaises(
+            ValueError,
+            self.symantec.get_changed_orders,
+            datetime.datetime.utcnow())
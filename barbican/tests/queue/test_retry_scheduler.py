@@ -29,6 +29,8 @@ eventlet.monkey_patch()
 
 INITIAL_DELAY_SECONDS = 5.0
 NEXT_RETRY_SECONDS = 5.0
+BATCH_INTERVAL_SECONDS = 600.0
+PLUGIN_NAME = 'barbican.tests.queue.test_retry_scheduler.PluginStub'
 
 
 def is_interval_in_expected_range(interval):
@@ -148,6 +150,202 @@ class WhenRunningPeriodicServerRetryLogic(database_utils.RepositoryTestCase):
         return args, kwargs, retry_repo
 
 
+class WhenBatchingCertificateStatusChecks(database_utils.RepositoryTestCase):
+    """Tests batching certificate status checks in the retry server."""
+
+    def setUp(self):
+        super(WhenBatchingCertificateStatusChecks, self).setUp()
+
+        retry_scheduler.CONF.set_override(
+            "certificate_status_batch_interval_seconds",
+            BATCH_INTERVAL_SECONDS,
+            group='retry_scheduler')
+        self.addCleanup(
+            retry_scheduler.CONF.clear_override,
+            "certificate_status_batch_interval_seconds",
+            group='retry_scheduler')
+
+        self.plugin = mock.MagicMock()
+        self.plugin.get_changed_orders.return_value = set()
+        manager = mock.MagicMock()
+        manager.get_plugin_by_name.return_value = self.plugin
+        get_manager_patcher = mock.patch(
+            'barbican.plugin.interface.certificate_manager.get_manager',
+            return_value=manager)
+        get_manager_patcher.start()
+        self.addCleanup(get_manager_patcher.stop)
+
+        self.queue_client = mock.MagicMock()
+        self.periodic_server = retry_scheduler.PeriodicServer(
+            queue_resource=self.queue_client)
+        self.addCleanup(self.periodic_server.stop)
+
+        self.retry_repo = repositories.get_order_retry_tasks_repository()
+        self.project_id = database_utils.create_project().id
+
+    def test_should_check_each_order_before_the_first_listing(self):
+        order_id = self._create_status_task()
+
+        self.periodic_server._process_retry_tasks()
+
+        self.assertFalse(self.plugin.get_changed_orders.called)
+        self.queue_client.check_certificate_status.assert_called_once_with(
+            order_id=order_id)
+
+    def test_should_postpone_checks_of_unchanged_orders(self):
+        self._list_changed_orders_once()
+        self._create_status_task()
+
+        self.periodic_server._process_retry_tasks()
+
+        self.assertEqual(1, self.plugin.get_changed_orders.call_count)
+        self.assertFalse(self.queue_client.check_certificate_status.called)
+        tasks, _, _, _ = self.retry_repo.get_by_create_date()
+        self.assertEqual(1, len(tasks))
+        self.assertGreater(
+            tasks[0].retry_at,
+            datetime.datetime.utcnow() + datetime.timedelta(
+                seconds=BATCH_INTERVAL_SECONDS / 2))
+
+    def test_should_check_changed_orders(self):
+        self._list_changed_orders_once()
+        changed_order_id = self._create_status_task()
+        later_order_id = self._create_status_task(
+            retry_at=datetime.datetime.utcnow() + datetime.timedelta(hours=1))
+        self.plugin.get_changed_orders.return_value = set(
+            [changed_order_id, later_order_id])
+
+        self.periodic_server._process_retry_tasks()
+
+        self.queue_client.check_certificate_status.assert_called_once_with(
+            order_id=changed_order_id)
+
+        # The task of the other changed order is due now.
+        tasks, _, _, _ = self.retry_repo.get_by_create_date(
+            only_at_or_before_this_date=datetime.datetime.utcnow())
+        self.assertEqual([later_order_id], [task.order_id for task in tasks])
+
+    def test_should_list_changed_orders_once_per_interval(self):
+        self._list_changed_orders_once()
+        self._create_status_task()
+
+        self.periodic_server._process_retry_tasks()
+        self._create_status_task()
+        self.periodic_server._process_retry_tasks()
+
+        self.assertEqual(1, self.plugin.get_changed_orders.call_count)
+        self.assertFalse(self.queue_client.check_certificate_status.called)
+
+    def test_should_expedite_changed_orders_once_per_listing(self):
+        self._list_changed_orders_once()
+        changed_order_id = self._create_status_task()
+        self.plugin.get_changed_orders.return_value = set([changed_order_id])
+
+        retry_repo = self.periodic_server.order_retry_repo
+        with mock.patch.object(
+                retry_repo, 'expedite_tasks_for_orders',
+                wraps=retry_repo.expedite_tasks_for_orders) as expedite:
+            self.periodic_server._process_retry_tasks()
+            self._create_status_task()
+            self.periodic_server._process_retry_tasks()
+
+        self.assertEqual(1, self.plugin.get_changed_orders.call_count)
+        expedite.assert_called_once_with(
+            set([changed_order_id]), retry_scheduler.CERT_STATUS_CHECK_TASK,
+            mock.ANY)
+
+    def test_should_check_each_order_if_listing_fails(self):
+        self._list_changed_orders_once()
+        order_id = self._create_status_task()
+        self.plugin.get_changed_orders.side_effect = Exception()
+
+        self.periodic_server._process_retry_tasks()
+
+        self.queue_client.check_certificate_status.assert_called_once_with(
+            order_id=order_id)
+
+    def test_should_list_once_per_interval_if_listing_fails(self):
+        self._list_changed_orders_once()
+        self.plugin.get_changed_orders.side_effect = Exception()
+        self._create_status_task()
+
+        self.periodic_server._process_retry_tasks()
+        order_id = self._create_status_task()
+        self.periodic_server._process_retry_tasks()
+
+        self.assertEqual(1, self.plugin.get_changed_orders.call_count)
+        self.queue_client.check_certificate_status.assert_called_with(
+            order_id=order_id)
+
+    def test_should_list_from_last_success_after_failure(self):
+        listed_at = self._list_changed_orders_once()
+        self.plugin.get_changed_orders.side_effect = Exception()
+        self._create_status_task()
+        self.periodic_server._process_retry_tasks()
+
+        # Pretend the interval since the failed listing has passed.
+        self.periodic_server._changed_orders_listed_at[PLUGIN_NAME] = (
+            listed_at)
+        self.plugin.get_changed_orders.side_effect = None
+        self._create_status_task()
+        self.periodic_server._process_retry_tasks()
+
+        self.assertEqual(2, self.plugin.get_changed_orders.call_count)
+        self.plugin.get_changed_orders.assert_called_with(
+            listed_at - retry_scheduler.CHANGED_ORDERS_OVERLAP)
+
+    def test_should_check_each_order_if_plugin_cannot_list(self):
+        self._list_changed_orders_once()
+        order_id = self._create_status_task()
+        self.plugin.get_changed_orders.return_value = None
+
+        self.periodic_server._process_retry_tasks()
+
+        self.queue_client.check_certificate_status.assert_called_once_with(
+            order_id=order_id)
+
+    def test_should_not_batch_if_disabled(self):
+        retry_scheduler.CONF.set_override(
+            "certificate_status_batch_interval_seconds", 0,
+            group='retry_scheduler')
+        self._list_changed_orders_once()
+        order_id = self._create_status_task()
+
+        self.periodic_server._process_retry_tasks()
+
+        self.assertFalse(self.plugin.get_changed_orders.called)
+        self.queue_client.check_certificate_status.assert_called_once_with(
+            order_id=order_id)
+
+    def _list_changed_orders_once(self):
+        """Pretends the changed orders were listed an interval ago."""
+        listed_at = datetime.datetime.utcnow() - datetime.timedelta(
+            seconds=BATCH_INTERVAL_SECONDS)
+        self.periodic_server._changed_orders_listed_at[PLUGIN_NAME] = (
+            listed_at)
+        self.periodic_server._changed_orders_since[PLUGIN_NAME] = listed_at
+        return listed_at
+
+    def _create_status_task(self, retry_at=None):
+        order = models.Order()
+        order.project_id = self.project_id
+        repositories.get_order_repository().create_from(order)
+        repositories.get_order_barbican_meta_repository().save(
+            {'plugin_name': PLUGIN_NAME}, order)
+
+        retry = models.OrderRetryTask()
+        retry.order_id = order.id
+        retry.retry_at = retry_at or datetime.datetime.utcnow()
+        retry.retry_task = retry_scheduler.CERT_STATUS_CHECK_TASK
+        retry.retry_args = []
+        retry.retry_kwargs = {'order_id': order.id}
+        self.retry_repo.create_from(retry)
+
+        database_utils.get_session().commit()
+
+        return order.id
+
+
 class WhenRunningPeriodicServer(oslotest.BaseTestCase):
     """Tests the timing-related functionality of the periodic task retry server.
 
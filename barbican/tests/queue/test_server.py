@@ -18,6 +18,7 @@ import six
 
 from barbican.model import models
 from barbican.model import repositories
+from barbican.plugin.interface import certificate_manager as cert_man
 from barbican.queue import server
 from barbican.tasks import common
 from barbican.tests import database_utils
@@ -386,6 +387,12 @@ class WhenUsingTaskServer(database_utils.RepositoryTestCase):
         )
         self.queue_get_server_mock = self.queue_get_server_patcher.start()
 
+        # Certificate manager mocking setup.
+        self.cert_get_manager_patcher = mock.patch(
+            'barbican.plugin.interface.certificate_manager.get_manager'
+        )
+        self.cert_get_manager_mock = self.cert_get_manager_patcher.start()
+
         self.server = server.TaskServer()
 
         # Add an order to the in-memory database.
@@ -400,6 +407,7 @@ class WhenUsingTaskServer(database_utils.RepositoryTestCase):
         super(WhenUsingTaskServer, self).tearDown()
         self.queue_get_target_patcher.stop()
         self.queue_get_server_patcher.stop()
+        self.cert_get_manager_patcher.stop()
 
     def test_should_start(self):
         self.server.start()
@@ -409,6 +417,30 @@ class WhenUsingTaskServer(database_utils.RepositoryTestCase):
             target=self.target, endpoints=[self.server])
         self.server_mock.start.assert_called_with()
 
+    def test_should_refresh_ca_table_in_background(self):
+        cert_manager = self.cert_get_manager_mock.return_value
+
+        self.server.start()
+        self.assertTrue(cert_manager.refreshed_in_background)
+
+        self.server.stop()
+        self.assertFalse(cert_manager.refreshed_in_background)
+
+    @mock.patch('barbican.tasks.certificate_resources'
+                '.refresh_certificate_resources')
+    def test_refresh_ca_table_returns_next_check(self, mock_refresh):
+        mock_refresh.return_value = 42
+
+        self.assertEqual(42, self.server._refresh_ca_table())
+
+    @mock.patch('barbican.tasks.certificate_resources'
+                '.refresh_certificate_resources')
+    def test_refresh_ca_table_suppresses_errors(self, mock_refresh):
+        mock_refresh.side_effect = Exception()
+
+        self.assertEqual(cert_man.CA_REFRESH_RETRY_SECONDS,
+                         self.server._refresh_ca_table())
+
     def test_should_stop(self):
         self.server.stop()
         self.queue_get_target_mock.assert_called_with()
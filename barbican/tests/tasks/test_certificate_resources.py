@@ -373,7 +373,7 @@ class BaseCertificateRequestsTestCase(database_utils.RepositoryTestCase):
         }
         self.cert_plugin_patcher = mock.patch(
             'barbican.plugin.interface.certificate_manager'
-            '.CertificatePluginManager',
+            '.get_manager',
             **cert_plugin_config
         )
         self.cert_plugin_patcher.start()
@@ -1056,7 +1056,7 @@ class WhenCreatingSubordinateCAs(database_utils.RepositoryTestCase):
         }
         self.cert_plugin_patcher = mock.patch(
             'barbican.plugin.interface.certificate_manager'
-            '.CertificatePluginManager',
+            '.get_manager',
             **cert_plugin_config
         )
         self.cert_plugin_patcher.start()
@@ -211,6 +211,18 @@ class WhenUsingKeystoneEventConsumerProcessMethod(
                                    operation_type='deleted')
         self.assertIsNone(result, 'No return is expected as result')
 
+    @mock.patch.object(rep, 'invalidate_project_cache')
+    def test_project_cleanup_invalidates_cached_project(self,
+                                                        mock_invalidate):
+        self._init_memory_db_setup()
+        self._create_secret_for_project(self.project1_data)
+
+        self.task.process(project_id=self.project_id1,
+                          resource_type='project',
+                          operation_type='deleted')
+
+        mock_invalidate.assert_called_with(self.project_id1)
+
     @mock.patch.object(consumer.KeystoneEventConsumer, 'handle_success')
     def test_existing_project_entities_cleanup_for_plain_secret(
             self, mock_handle_success):
@@ -277,10 +289,8 @@ class WhenUsingKeystoneEventConsumerProcessMethod(
                           entity_id=secret_metadata_id)
 
     @mock.patch.object(consumer.KeystoneEventConsumer, 'handle_error')
-    @mock.patch.object(rep.ProjectRepo, 'delete_project_entities',
-                       side_effect=exception.BarbicanException)
-    def test_rollback_with_error_during_project_cleanup(self, mock_delete,
-                                                        mock_handle_error):
+    def test_project_kept_on_error_during_project_cleanup(
+            self, mock_handle_error):
         self._init_memory_db_setup()
 
         secret = self._create_secret_for_project(self.project1_data)
@@ -300,12 +310,12 @@ class WhenUsingKeystoneEventConsumerProcessMethod(
         # Commit changes made so far before creating rollback scenario
         rep.commit()
 
-        handle_error_mock = mock.MagicMock()
-        self.task.handler_error = handle_error_mock
-
-        self.assertRaises(exception.BarbicanException,
-                          self.task.process, project_id=self.project_id1,
-                          resource_type='project', operation_type='deleted')
+        with mock.patch.object(rep.ProjectRepo, 'delete_project_entities',
+                               side_effect=exception.BarbicanException):
+            self.assertRaises(exception.BarbicanException,
+                              self.task.process, project_id=self.project_id1,
+                              resource_type='project',
+                              operation_type='deleted')
 
         mock_handle_error.assert_called_once_with(
             self.project1_data,
@@ -322,14 +332,22 @@ class WhenUsingKeystoneEventConsumerProcessMethod(
         self.assertEqual(self.project_id1, kwargs['project_id'])
         self.assertEqual('project', kwargs['resource_type'])
         self.assertEqual('deleted', kwargs['operation_type'])
-        # Make sure entities are still present after rollback
-        db_secrets = secret_repo.get_project_entities(project1_id)
-        self.assertEqual(1, len(db_secrets))
-        self.assertEqual(secret_id, db_secrets[0].id)
 
-        db_kek = kek_repo.get_project_entities(project1_id)
-        self.assertEqual(1, len(db_kek))
+        # Entities deleted in committed chunks stay deleted, but the project
+        # is kept so that handling the notification again completes cleanup.
+        self.assertEqual(0, len(secret_repo.get_project_entities(
+            project1_id)))
+        self.assertEqual(0, len(kek_repo.get_project_entities(project1_id)))
 
         project_repo = rep.get_project_repository()
         db_project = project_repo.get_project_entities(project1_id)
         self.assertEqual(1, len(db_project))
+
+        self.task.process(project_id=self.project_id1,
+                          resource_type='project', operation_type='deleted')
+
+        db_project = project_repo.get_project_entities(project1_id)
+        self.assertEqual(0, len(db_project))
+        self.assertRaises(exception.NotFound, secret_repo.get,
+                          entity_id=secret_id,
+                          external_project_id=self.project_id1)
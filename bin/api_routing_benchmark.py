@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks the API request overhead of GET secret and GET container.
+
+The v1 application is driven in-process through webtest, with the secret and
+container lookups patched to return in-memory models. The database (an
+in-memory SQLite one) is only used to build the application, so the timings
+cover routing, controller construction, RBAC against etc/barbican/policy.json
+and response rendering only. Run it on two trees to compare them.
+
+    python bin/api_routing_benchmark.py --requests 2000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import uuid
+
+import mock
+from oslo_policy import policy
+import webtest
+
+sys.path.insert(0, os.getcwd())
+
+from barbican.api import app
+from barbican.api.controllers import versions
+from barbican import context
+from barbican.model import models
+from barbican.model import repositories
+
+
+def build_models():
+    project = models.Project()
+    project.id = str(uuid.uuid4())
+    project.external_id = 'benchmark-project'
+
+    secret = models.Secret({'name': 'benchmark secret', 'algorithm': 'aes',
+                            'bit_length': 256, 'mode': 'cbc'})
+    secret.id = str(uuid.uuid4())
+    secret.project = project
+
+    container = models.Container({'name': 'benchmark container',
+                                  'type': 'generic', 'secret_refs': []})
+    container.id = str(uuid.uuid4())
+    container.project = project
+    return secret, container
+
+
+def build_app():
+    repositories.CONF.set_override('sql_connection', 'sqlite:///:memory:')
+    repositories.CONF.set_override('db_auto_create', True)
+    repositories.setup_database_engine_and_factory()
+
+    enforcer = policy.Enforcer(
+        repositories.CONF,
+        policy_file=os.path.abspath('etc/barbican/policy.json'))
+
+    test_app = webtest.TestApp(app.build_wsgi_app(versions.V1Controller()))
+    test_app.extra_environ = {
+        'barbican.context': context.RequestContext(
+            project='benchmark-project', roles=['admin'],
+            policy_enforcer=enforcer)
+    }
+    return test_app
+
+
+def time_per_request(test_app, path, requests):
+    headers = {'Accept': 'application/json'}
+    test_app.get(path, headers=headers)
+    timings = timeit.repeat(lambda: test_app.get(path, headers=headers),
+                            number=requests, repeat=3)
+    return min(timings) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip(),
+                                     formatter_class=argparse.
+                                     RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    secret, container = build_models()
+
+    with mock.patch.object(repositories.SecretRepo, 'get_secret_by_id',
+                           return_value=secret), \
+            mock.patch.object(repositories.ContainerRepo,
+                              'get_container_by_id', return_value=container):
+        test_app = build_app()
+        print('{0:<16} {1:>20}'.format('request', 'per request (us)'))
+        for description, path in (
+                ('GET secret', '/secrets/{0}'.format(secret.id)),
+                ('GET container', '/containers/{0}'.format(container.id))):
+            print('{0:<16} {1:>20.1f}'.format(
+                description, time_per_request(test_app, path,
+                                              args.requests)))
+
+
+if __name__ == '__main__':
+    main()
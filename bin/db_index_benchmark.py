@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks the repository queries targeted by the composite indexes of the
+barbican models, with and without those indexes.
+
+The script seeds a scratch database, drops the composite indexes, times the
+listing and lookup queries, recreates the indexes and times them again. Use
+--plans to also print the query plan of each statement. Note that the
+database is created from scratch, so never point --dburl at a live database.
+
+    python bin/db_index_benchmark.py --secrets 20000 --plans
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.getcwd())
+
+from oslo_utils import timeutils
+import sqlalchemy
+
+from barbican.model import models
+from barbican.model import repositories
+
+
+COMPOSITE_INDEXES = (
+    'ix_secrets_project_deleted_created',
+    'ix_secrets_project_deleted_name',
+    'ix_orders_project_deleted_created',
+    'ix_containers_project_deleted_created',
+    'ix_order_retry_tasks_deleted_retry_at',
+    'ix_kek_data_project_plugin_active',
+)
+
+PLUGIN_NAMES = ('p11_crypto', 'simple_crypto', 'kmip_plugin')
+
+
+def _row(**values):
+    now = timeutils.utcnow()
+    row = {'id': str(uuid.uuid4()), 'created_at': now, 'updated_at': now,
+           'deleted_at': None, 'deleted': False,
+           'status': models.States.ACTIVE}
+    row.update(values)
+    return row
+
+
+def seed(engine, args):
+    """Bulk inserts the benchmark data set."""
+    start = timeutils.utcnow() - datetime.timedelta(days=365)
+    projects = [_row(external_id='project-{0}'.format(i))
+                for i in range(args.projects)]
+    engine.execute(models.Project.__table__.insert(), projects)
+
+    for project in projects:
+        secrets = []
+        orders = []
+        containers = []
+        for i in range(args.secrets):
+            created = start + datetime.timedelta(seconds=i)
+            deleted = (i % 10 == 0)
+            secrets.append(_row(
+                project_id=project['id'], name='secret-{0}'.format(i % 100),
+                algorithm='aes', bit_length=256, mode='cbc',
+                secret_type='symmetric', expiration=None,
+                created_at=created, deleted=deleted))
+            if i % 4 == 0:
+                orders.append(_row(
+                    project_id=project['id'], type='key', meta={},
+                    created_at=created, deleted=deleted))
+                containers.append(_row(
+                    project_id=project['id'], name='container',
+                    type='generic', created_at=created, deleted=deleted))
+        engine.execute(models.Secret.__table__.insert(), secrets)
+        engine.execute(models.Order.__table__.insert(), orders)
+        engine.execute(models.Container.__table__.insert(), containers)
+
+        keks = []
+        for i in range(args.keks):
+            keks.append(_row(
+                project_id=project['id'],
+                plugin_name=PLUGIN_NAMES[i % len(PLUGIN_NAMES)],
+                kek_label='kek-{0}'.format(i), active=(i < len(PLUGIN_NAMES)),
+                bind_completed=True))
+        engine.execute(models.KEKDatum.__table__.insert(), keks)
+
+        order_ids = [order['id'] for order in orders]
+        tasks = []
+        for i in range(args.retry_tasks):
+            tasks.append(_row(
+                order_id=order_ids[i % len(order_ids)],
+                retry_task='process_type_order',
+                retry_at=start + datetime.timedelta(minutes=i),
+                retry_args=[], retry_kwargs={}, retry_count=0,
+                deleted=(i % 2 == 0)))
+        engine.execute(models.OrderRetryTask.__table__.insert(), tasks)
+
+    return [project['external_id'] for project in projects]
+
+
+def get_queries(external_project_id):
+    """Returns (description, callable) pairs for the benchmarked queries."""
+    secret_repo = repositories.get_secret_repository()
+    order_repo = repositories.get_order_repository()
+    container_repo = repositories.get_container_repository()
+    retry_repo = repositories.get_order_retry_tasks_repository()
+    kek_repo = repositories.get_kek_datum_repository()
+    project_repo = repositories.get_project_repository()
+
+    def find_kek():
+        project = project_repo.find_by_external_project_id(
+            external_project_id)
+        kek_repo.find_or_create_kek_datum(project, PLUGIN_NAMES[0])
+
+    return [
+        ('secrets: first page', lambda: secret_repo.get_by_create_date(
+            external_project_id, suppress_exception=True)),
+        ('secrets: filtered by name', lambda: secret_repo.get_by_create_date(
+            external_project_id, name='secret-7', suppress_exception=True)),
+        ('orders: first page', lambda: order_repo.get_by_create_date(
+            external_project_id, suppress_exception=True)),
+        ('containers: first page', lambda: container_repo.get_by_create_date(
+            external_project_id, suppress_exception=True)),
+        ('retry tasks: due now', lambda: retry_repo.get_by_create_date(
+            only_at_or_before_this_date=timeutils.utcnow(),
+            suppress_exception=True)),
+        ('kek data: active kek', find_kek),
+    ]
+
+
+class StatementRecorder(object):
+    """Records the SELECT statements issued through an engine."""
+
+    def __init__(self, engine):
+        self.statements = []
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context,
+                executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            self.statements.append((statement, parameters))
+
+
+def explain(engine, statement, parameters):
+    if engine.dialect.name == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(prefix + statement, parameters)
+        return cursor.fetchall()
+    finally:
+        connection.close()
+
+
+def run_queries(engine, queries, iterations, show_plans):
+    recorder = StatementRecorder(engine)
+    results = []
+    for description, query in queries:
+        timings = []
+        for _ in range(iterations):
+            began = time.time()
+            query()
+            timings.append(time.time() - began)
+            repositories.rollback()
+            repositories.clear()
+        timings.sort()
+        results.append((description, timings[len(timings) // 2] * 1000.0))
+
+        if show_plans:
+            print('-- {0}'.format(description))
+            for statement, parameters in recorder.statements[-2:]:
+                for row in explain(engine, statement, parameters):
+                    print('   {0}'.format(row))
+        del recorder.statements[:]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip(),
+                                     formatter_class=argparse.
+                                     RawDescriptionHelpFormatter)
+    parser.add_argument('--dburl', default='sqlite://',
+                        help='URL of a scratch database.')
+    parser.add_argument('--projects', type=int, default=5)
+    parser.add_argument('--secrets', type=int, default=10000,
+                        help='Secrets per project.')
+    parser.add_argument('--keks', type=int, default=30,
+                        help='KEK data rows per project.')
+    parser.add_argument('--retry-tasks', type=int, default=5000,
+                        help='Order retry tasks per project.')
+    parser.add_argument('--iterations', type=int, default=21)
+    parser.add_argument('--plans', action='store_true',
+                        help='Print the query plans.')
+    args = parser.parse_args()
+
+    repositories.CONF.set_override('sql_connection', args.dburl)
+    repositories.CONF.set_override('db_auto_create', True)
+    repositories.setup_database_engine_and_factory()
+    engine = repositories.get_session().get_bind()
+
+    external_project_ids = seed(engine, args)
+    queries = get_queries(external_project_ids[-1])
+
+    indexes = [index for table in models.BASE.metadata.sorted_tables
+               for index in table.indexes if index.name in COMPOSITE_INDEXES]
+
+    for index in indexes:
+        index.drop(engine)
+    print('== without composite indexes')
+    before = run_queries(engine, queries, args.iterations, args.plans)
+
+    for index in indexes:
+        index.create(engine)
+    print('== with composite indexes')
+    after = run_queries(engine, queries, args.iterations, args.plans)
+
+    print('')
+    print('{0:<28} {1:>12} {2:>12}'.format('query', 'before (ms)',
+                                           'after (ms)'))
+    for (description, slow), (_, fast) in zip(before, after):
+        print('{0:<28} {1:>12.2f} {2:>12.2f}'.format(description, slow, fast))
+
+
+if __name__ == '__main__':
+    main()
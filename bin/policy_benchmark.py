@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks the per-request cost of RBAC enforcement.
+
+Each request builds a request context, as done by the context middleware, and
+enforces 'secret:get' on a secret through the same _do_enforce_rbac() path as
+the API, against etc/barbican/policy.json. This is timed with a new policy
+enforcer per context (the former behaviour, which reads and parses the policy
+file on each request) and with the enforcer shared by all contexts.
+
+    python bin/policy_benchmark.py --requests 2000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import uuid
+
+from oslo_policy import opts
+from oslo_policy import policy as oslo_policy
+import webob
+
+sys.path.insert(0, os.getcwd())
+
+from barbican.api import controllers
+from barbican.api.controllers import secrets
+from barbican.common import config
+from barbican import context
+from barbican.model import models
+
+
+def build_secret_controller():
+    project = models.Project()
+    project.id = str(uuid.uuid4())
+    project.external_id = 'benchmark-project'
+
+    secret = models.Secret({'name': 'benchmark secret', 'algorithm': 'aes',
+                            'bit_length': 256, 'mode': 'cbc'})
+    secret.id = str(uuid.uuid4())
+    secret.project = project
+    secret.creator_id = 'benchmark-user'
+    return secrets.SecretController(secret)
+
+
+def enforce_request(controller, req, policy_enforcer=None):
+    ctx = context.RequestContext(project='benchmark-project',
+                                 user='benchmark-user', roles=['creator'],
+                                 policy_enforcer=policy_enforcer)
+    controllers._do_enforce_rbac(controller, req, 'secret:get', ctx)
+
+
+def time_per_request(func, requests):
+    func()
+    timings = timeit.repeat(func, number=requests, repeat=3)
+    return min(timings) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip(),
+                                     formatter_class=argparse.
+                                     RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    opts.set_defaults(config.CONF,
+                      policy_file=os.path.abspath('etc/barbican/policy.json'))
+
+    controller = build_secret_controller()
+    req = webob.Request.blank('/', headers={'Accept': 'application/json'})
+
+    print('{0:<20} {1:>20}'.format('enforcer', 'per request (us)'))
+    for description, func in (
+            ('new per request',
+             lambda: enforce_request(controller, req,
+                                     oslo_policy.Enforcer(config.CONF))),
+            ('shared',
+             lambda: enforce_request(controller, req))):
+        print('{0:<20} {1:>20.1f}'.format(
+            description, time_per_request(func, args.requests)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks the SOAP client handling of the Symantec API library.
+
+The script starts a local stub SOAP server for the query API and times
+calls made with a client built from the WSDL for every call (the former
+behaviour) against calls made with the cached client. The stub WSDL can be
+padded with extra types to resemble the size of the real one.
+
+    python bin/symantec_client_benchmark.py --calls 50 --types 400
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from six.moves import BaseHTTPServer
+from suds import cache
+
+sys.path.insert(0, os.getcwd())
+
+from barbican.plugin.interface import SymAPI
+
+
+NAMESPACE = 'http://api.geotrust.com/webtrust/query'
+
+WSDL = """<?xml version="1.0" encoding="UTF-8"?>
+<definitions xmlns="http://schemas.xmlsoap.org/wsdl/"
+    xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+    xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:tns="{namespace}" targetNamespace="{namespace}">
+  <types>
+    <xs:schema targetNamespace="{namespace}" elementFormDefault="qualified">
+      <xs:element name="hello">
+        <xs:complexType><xs:sequence>
+          <xs:element name="Input" type="xs:string"/>
+        </xs:sequence></xs:complexType>
+      </xs:element>
+      <xs:element name="helloResponse">
+        <xs:complexType><xs:sequence>
+          <xs:element name="helloResult" type="xs:string"/>
+        </xs:sequence></xs:complexType>
+      </xs:element>
+      {padding}
+    </xs:schema>
+  </types>
+  <message name="helloIn">
+    <part name="parameters" element="tns:hello"/>
+  </message>
+  <message name="helloOut">
+    <part name="parameters" element="tns:helloResponse"/>
+  </message>
+  <portType name="QueryPortType">
+    <operation name="hello">
+      <input message="tns:helloIn"/>
+      <output message="tns:helloOut"/>
+    </operation>
+  </portType>
+  <binding name="QueryBinding" type="tns:QueryPortType">
+    <soap:binding style="document"
+        transport="http://schemas.xmlsoap.org/soap/http"/>
+    <operation name="hello">
+      <soap:operation soapAction="hello"/>
+      <input><soap:body use="literal"/></input>
+      <output><soap:body use="literal"/></output>
+    </operation>
+  </binding>
+  <service name="QueryService">
+    <port name="QueryPort" binding="tns:QueryBinding">
+      <soap:address location="{location}"/>
+    </port>
+  </service>
+</definitions>
+"""
+
+PADDING_TYPE = """
+      <xs:complexType name="Padding{0}"><xs:sequence>
+        <xs:element name="Name" type="xs:string"/>
+        <xs:element name="Value" type="xs:string" minOccurs="0"/>
+        <xs:element name="Count" type="xs:int" minOccurs="0"/>
+      </xs:sequence></xs:complexType>"""
+
+RESPONSE = """<?xml version="1.0" encoding="UTF-8"?>
+<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap:Body>
+    <helloResponse xmlns="{namespace}">
+      <helloResult>hello</helloResult>
+    </helloResponse>
+  </soap:Body>
+</soap:Envelope>
+""".format(namespace=NAMESPACE)
+
+
+class StubSOAPHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serves the stub WSDL and answers every SOAP call with 'hello'."""
+
+    def do_GET(self):
+        self.server.wsdl_fetches += 1
+        self._respond(self.server.wsdl)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._respond(RESPONSE)
+
+    def _respond(self, body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(padding_types):
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), StubSOAPHandler)
+    url = 'http://127.0.0.1:{0}/query'.format(server.server_port)
+    padding = ''.join(PADDING_TYPE.format(i) for i in range(padding_types))
+    server.wsdl = WSDL.format(namespace=NAMESPACE, location=url,
+                              padding=padding)
+    server.wsdl_fetches = 0
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server, url + '?WSDL'
+
+
+def run_calls(api, calls, rebuild_clients):
+    timings = []
+    for _ in range(calls):
+        began = time.time()
+        if rebuild_clients:
+            api.clearClients()
+        api.hello('hello')
+        timings.append(time.time() - began)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip(),
+                                     formatter_class=argparse.
+                                     RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--types', type=int, default=400,
+                        help='Padding types added to the stub WSDL.')
+    parser.add_argument('--disk-cache', action='store_true',
+                        help='Keep the parsed WSDL in an on-disk cache.')
+    args = parser.parse_args()
+
+    server, wsdl_url = start_server(args.types)
+    cache_dir = tempfile.mkdtemp()
+    try:
+        print('{0:<24} {1:>14} {2:>14}'.format('clients', 'median (ms)',
+                                               'WSDL fetches'))
+        for description, rebuild in (('built for every call', True),
+                                     ('cached', False)):
+            api = SymAPI.SymAPI(verbose=False)
+            api.setCredentials('partner', 'user', 'password')
+            api.setQueryAPIURL(wsdl_url)
+            if args.disk_cache:
+                api.setWSDLCache(os.path.join(cache_dir, description))
+            else:
+                api.wsdlCache = cache.NoCache()
+            server.wsdl_fetches = 0
+            median = run_calls(api, args.calls, rebuild)
+            print('{0:<24} {1:>14.2f} {2:>14}'.format(description, median,
+                                                      server.wsdl_fetches))
+    finally:
+        server.shutdown()
+        shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    main()